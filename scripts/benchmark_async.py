@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Flask vs ASGI throughput benchmark for the real data ML service
+Serves /predict from the Flask app (Gunicorn, one gthread worker) and from the ASGI app
+(uvicorn, one process) with the same number of scoring threads, then drives each with
+concurrent keep-alive connections while extra idle keep-alive connections stay open
+
+Usage: python benchmark_async.py [--requests 3000] [--concurrency 1 16 256] [--idle 0 1000] [--threads 8]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from benchmark_data import sample_assessments
+from ml_service_real_data import RealDataMentalHealthPredictor
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+HOST = '127.0.0.1'
+SERVERS = {
+    'flask': 8410,
+    'asgi': 8411
+}
+RUN_TIMEOUT = 120
+KEEPALIVE = 75
+
+
+def server_command(name, port, threads):
+    if name == 'flask':
+        return [sys.executable, os.path.join(SCRIPT_DIR, 'serve_production.py'),
+                '--workers', '1', '--threads', str(threads), '--bind', f'{HOST}:{port}',
+                '--keepalive', str(KEEPALIVE)]
+    return [sys.executable, '-m', 'uvicorn', 'ml_service_async:app', '--host', HOST, '--port', str(port),
+            '--log-level', 'warning', '--timeout-keep-alive', str(KEEPALIVE)]
+
+
+class Connection:
+    """Minimal HTTP/1.1 keep-alive client, so the benchmark needs nothing beyond the stdlib"""
+
+    def __init__(self, reader, writer):
+        self.reader, self.writer = reader, writer
+
+    @classmethod
+    async def open(cls, port):
+        return cls(*await asyncio.open_connection(HOST, port))
+
+    async def request(self, method, path, body=b''):
+        self.writer.write(
+            f'{method} {path} HTTP/1.1\r\nHost: {HOST}\r\nContent-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n'.encode() + body
+        )
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Server closed the connection")
+        status = int(status_line.split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode().partition(':')
+            if name.lower() == 'content-length':
+                length = int(value)
+        await self.reader.readexactly(length)
+        return status
+
+    def close(self):
+        self.writer.close()
+
+
+async def wait_ready(port, timeout=300):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = await Connection.open(port)
+            status = await connection.request('GET', '/ready')
+            connection.close()
+            if status == 200:
+                return
+        except (OSError, IndexError, ValueError, asyncio.IncompleteReadError):
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError(f"Server on port {port} did not become ready")
+
+
+async def run_load(port, bodies, concurrency, idle):
+    """Return (requests/sec, p50 ms, p99 ms, errors) for one load level"""
+    idle_connections = []
+    for _ in range(idle):
+        connection = await Connection.open(port)
+        await connection.request('GET', '/health')
+        idle_connections.append(connection)
+
+    latencies, errors = [], 0
+    queue = iter(range(len(bodies)))
+
+    async def client():
+        nonlocal errors
+        connection = await Connection.open(port)
+        for i in queue:
+            start = time.perf_counter()
+            try:
+                status = await connection.request('POST', '/predict', bodies[i])
+            except (OSError, asyncio.IncompleteReadError):
+                # Dropped connection: count it and reconnect
+                errors += 1
+                connection.close()
+                connection = await Connection.open(port)
+                continue
+            latencies.append(time.perf_counter() - start)
+            errors += status != 200
+        connection.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    for connection in idle_connections:
+        connection.close()
+
+    latencies = np.array(latencies) * 1e3
+    return len(bodies) / elapsed, np.percentile(latencies, 50), np.percentile(latencies, 99), errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 16, 256])
+    parser.add_argument('--idle', type=int, nargs='+', default=[0, 1000])
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    assessments = sample_assessments(RealDataMentalHealthPredictor(), args.requests)
+    bodies = [json.dumps({'answers': assessment}).encode() for assessment in assessments]
+    env = {**os.environ, 'MINDNEST_SCORING_THREADS': str(args.threads)}
+    # Idle connections need a file descriptor each, on both ends
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    print(f"{args.requests} /predict requests per run, {args.threads} scoring threads per server")
+    print(f"{'server':>6}  {'idle conns':>10}  {'concurrency':>11}  {'req/s':>8}  {'p50 ms':>8}  "
+          f"{'p99 ms':>8}  {'errors':>6}")
+    for name, port in SERVERS.items():
+        server = subprocess.Popen(server_command(name, port, args.threads), cwd=SCRIPT_DIR, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            asyncio.run(wait_ready(port))
+            for idle in args.idle:
+                for concurrency in args.concurrency:
+                    try:
+                        rate, p50, p99, errors = asyncio.run(
+                            asyncio.wait_for(run_load(port, bodies, concurrency, idle), RUN_TIMEOUT)
+                        )
+                    except asyncio.TimeoutError:
+                        print(f"{name:>6}  {idle:>10}  {concurrency:>11}  timed out after {RUN_TIMEOUT}s")
+                        continue
+                    except (OSError, asyncio.IncompleteReadError) as e:
+                        print(f"{name:>6}  {idle:>10}  {concurrency:>11}  failed: {e}")
+                        continue
+                    print(f"{name:>6}  {idle:>10}  {concurrency:>11}  {rate:>8.0f}  {p50:>8.1f}  "
+                          f"{p99:>8.1f}  {errors:>6}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""
+Benchmark data helpers for the MindNest ML services
+Builds datasets of arbitrary size that follow the schema of the real CSVs in datasets/
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+DATASET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'datasets')
+DATASET1_PATH = os.path.join(DATASET_DIR, 'mentalhealthdataset2.csv')
+DATASET2_PATH = os.path.join(DATASET_DIR, 'mental_health_diagnosis_treatment.csv')
+
+
+def load_local_datasets():
+    """Load both real datasets from the local datasets/ directory"""
+    return pd.read_csv(DATASET1_PATH), pd.read_csv(DATASET2_PATH)
+
+
+def scale_datasets(df1, df2, n_rows, seed=42):
+    """Resample both datasets to n_rows in total, keeping their original size ratio"""
+    rng = np.random.default_rng(seed)
+    n1 = int(round(n_rows * len(df1) / (len(df1) + len(df2))))
+    n2 = n_rows - n1
+    scaled1 = df1.iloc[rng.integers(0, len(df1), n1)].reset_index(drop=True)
+    scaled2 = df2.iloc[rng.integers(0, len(df2), n2)].reset_index(drop=True)
+    return scaled1, scaled2
+
+
+def scaled_datasets(n_rows, seed=42):
+    """Load the local datasets and resample them to n_rows in total"""
+    df1, df2 = load_local_datasets()
+    return scale_datasets(df1, df2, n_rows, seed)
+
+
+def sample_assessments(predictor, n_rows, seed=42):
+    """Return n_rows assessment dicts drawn from the preprocessed real datasets"""
+    combined_df = predictor.preprocess_data(*scaled_datasets(n_rows, seed))
+    return combined_df[predictor.feature_names].to_dict('records')
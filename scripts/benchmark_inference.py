@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Inference engine microbenchmark for the real data ML service
+Compares scikit-learn scoring with the exported NumPy InferenceEngine per call and per batch,
+checks that both produce bit-identical probabilities, and times a cold import of each
+
+Usage: python benchmark_inference.py [--rows 2000] [--calls 2000] [--batch 1000]
+"""
+
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import time
+import warnings
+from dataclasses import replace
+
+import numpy as np
+
+from benchmark_data import sample_assessments
+from benchmark_prediction import ready_predictor
+from numpy_inference import InferenceEngine
+
+MODEL_TYPES = ['decision_tree', 'knn', 'ensemble']
+
+
+def sklearn_scores(predictor, feature_matrix, model_type):
+    """Score through the fitted estimators, bypassing the engine"""
+    return predictor._score_matrix(feature_matrix, model_type, replace(predictor.model_set, engine=None))
+
+
+def per_call_us(fn, rows, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(rows[i % len(rows)])
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def cold_import_seconds(statement):
+    """Wall time of a fresh interpreter running one import statement"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', statement], check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--batch', type=int, default=1000)
+    args = parser.parse_args()
+    
+    logging.getLogger('ml_service_real_data').setLevel(logging.WARNING)
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+    
+    predictor = ready_predictor()
+    engine = predictor.engine or InferenceEngine.from_sklearn(predictor.models, predictor.scaler)
+    feature_matrix, _ = predictor.encode_assessments(sample_assessments(predictor, args.rows))
+    single_rows = [feature_matrix[i:i + 1] for i in range(len(feature_matrix))]
+    batch = feature_matrix[:args.batch]
+    
+    print(f"{'model':>14}  {'identical':>9}  {'sklearn us/call':>15}  {'numpy us/call':>13}  "
+          f"{'speedup':>7}  {'sklearn batch ms':>16}  {'numpy batch ms':>14}")
+    for model_type in MODEL_TYPES:
+        identical = np.array_equal(
+            sklearn_scores(predictor, feature_matrix, model_type)[0],
+            engine.predict_proba(feature_matrix, model_type)[0]
+        ) and all(
+            np.array_equal(sklearn_scores(predictor, row, model_type)[0], engine.predict_proba(row, model_type)[0])
+            for row in single_rows[:200]
+        )
+        sklearn_us = per_call_us(lambda row: sklearn_scores(predictor, row, model_type), single_rows, args.calls)
+        numpy_us = per_call_us(lambda row: engine.predict_proba(row, model_type), single_rows, args.calls)
+        
+        start = time.perf_counter()
+        sklearn_scores(predictor, batch, model_type)
+        sklearn_batch_ms = (time.perf_counter() - start) * 1e3
+        start = time.perf_counter()
+        engine.predict_proba(batch, model_type)
+        numpy_batch_ms = (time.perf_counter() - start) * 1e3
+        
+        print(f"{model_type:>14}  {str(identical):>9}  {sklearn_us:>15.1f}  {numpy_us:>13.1f}  "
+              f"{sklearn_us / numpy_us:>6.1f}x  {sklearn_batch_ms:>16.2f}  {numpy_batch_ms:>14.2f}")
+    
+    print()
+    print(f"cold import numpy_inference:        {cold_import_seconds('import numpy_inference'):.3f}s")
+    print(f"cold import sklearn tree/neighbors: {cold_import_seconds('import sklearn.tree, sklearn.neighbors'):.3f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+KNN neighbor search benchmark for the real data ML service
+Compares query latency and agreement with exact brute-force search for each neighbor
+search backend at several training set sizes
+
+Usage: python benchmark_knn.py [--sizes 3500 100000 1000000] [--queries 300] [--ivf-probe 8]
+"""
+
+import argparse
+import logging
+import time
+
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+
+from benchmark_data import scaled_datasets
+from ml_service_real_data import RealDataMentalHealthPredictor
+from neighbor_search import build_knn_model, build_ivf_index
+from numpy_inference import InferenceEngine
+
+N_NEIGHBORS = 7
+
+
+def training_matrix(predictor, n_rows, seed=42):
+    """Encoded, scaled training rows resampled from the real datasets.
+
+    Resampling repeats the ~3.5k source rows, so a little noise is added to keep the
+    larger sizes from collapsing into exact duplicates.
+    """
+    combined_df = predictor.preprocess_data(*scaled_datasets(n_rows, seed))
+    encoded_df = predictor.encode_features(combined_df)
+    X = encoded_df[predictor.feature_names].fillna(0).to_numpy(dtype=np.float64)
+    scaler = StandardScaler().fit(X)
+    X = scaler.transform(X)
+    X += np.random.default_rng(seed).normal(0.0, 0.01, X.shape)
+    return np.ascontiguousarray(X), encoded_df['risk_level'].to_numpy(), scaler
+
+
+def latency_stats(query_fn, queries):
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        query_fn(query[np.newaxis, :])
+        timings.append(time.perf_counter() - start)
+    timings = np.array(timings) * 1e6
+    return float(np.percentile(timings, 50)), float(np.percentile(timings, 99))
+
+
+def agreement(reference, candidate):
+    """Neighbor recall, predicted-class agreement and mean |probability difference|"""
+    ref_ind, ref_proba = reference
+    ind, proba = candidate
+    recall = np.mean([len(np.intersect1d(a, b)) / len(a) for a, b in zip(ref_ind, ind)])
+    same_class = np.mean(np.argmax(ref_proba, axis=1) == np.argmax(proba, axis=1))
+    return recall, same_class, float(np.mean(np.abs(ref_proba - proba)))
+
+
+def benchmark_size(predictor, n_rows, n_queries, ivf_probe):
+    X, y, scaler = training_matrix(predictor, n_rows)
+    rng = np.random.default_rng(7)
+    queries = X[rng.choice(len(X), n_queries, replace=False)] + rng.normal(0.0, 0.05, (n_queries, X.shape[1]))
+    results = []
+    reference = None
+
+    for backend in ['brute', 'kd_tree', 'ball_tree']:
+        start = time.perf_counter()
+        model = build_knn_model(X, y, backend=backend, n_neighbors=N_NEIGHBORS)
+        build_seconds = time.perf_counter() - start
+        p50, p99 = latency_stats(model.predict_proba, queries)
+        start = time.perf_counter()
+        outputs = (model.kneighbors(queries, return_distance=False), model.predict_proba(queries))
+        batch_seconds = time.perf_counter() - start
+        if reference is None:
+            reference, brute_model = outputs, model
+        results.append((f"sklearn {backend} (leaf {model.leaf_size})" if backend != 'brute' else 'sklearn brute',
+                        build_seconds, p50, p99, batch_seconds, agreement(reference, outputs)))
+
+    # The NumPy engine scores already-scaled rows here, so give it an identity scaler
+    identity = {'scaler_mean': np.zeros(X.shape[1]), 'scaler_scale': np.ones(X.shape[1])}
+    for name, knn_index_fn in [('numpy brute', lambda: {}), (f'numpy ivf (probe {ivf_probe})',
+                                                             lambda: build_ivf_index(X, n_probe=ivf_probe))]:
+        start = time.perf_counter()
+        knn_index = knn_index_fn()
+        engine = InferenceEngine({**InferenceEngine.from_sklearn({'knn': brute_model}, scaler).arrays,
+                                  **identity, **knn_index})
+        build_seconds = time.perf_counter() - start
+        p50, p99 = latency_stats(engine.knn_proba, queries)
+        start = time.perf_counter()
+        outputs = (engine.kneighbors(queries)[1], engine.knn_proba(queries))
+        batch_seconds = time.perf_counter() - start
+        results.append((name, build_seconds, p50, p99, batch_seconds, agreement(reference, outputs)))
+
+    return len(X), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[3_500, 100_000, 1_000_000])
+    parser.add_argument('--queries', type=int, default=300)
+    parser.add_argument('--ivf-probe', type=int, default=8)
+    args = parser.parse_args()
+    
+    logging.getLogger('ml_service_real_data').setLevel(logging.WARNING)
+    predictor = RealDataMentalHealthPredictor()
+    
+    for n_rows in args.sizes:
+        n_train, results = benchmark_size(predictor, n_rows, args.queries, args.ivf_probe)
+        print(f"\n{n_train} training rows, {args.queries} queries, k={N_NEIGHBORS}")
+        print(f"{'backend':>28}  {'build s':>8}  {'p50 us':>9}  {'p99 us':>9}  {'batch ms':>9}  "
+              f"{'recall':>7}  {'same class':>10}  {'mean |dp|':>9}")
+        for name, build_seconds, p50, p99, batch_seconds, (recall, same_class, proba_diff) in results:
+            print(f"{name:>28}  {build_seconds:>8.2f}  {p50:>9.0f}  {p99:>9.0f}  {batch_seconds * 1e3:>9.1f}  "
+                  f"{recall:>7.3f}  {same_class:>10.3f}  {proba_diff:>9.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+KNN storage benchmark for the real data ML service
+Compares the NumPy engine's float64 KNN training matrix with the compact float32 and
+quantized storage at several training set sizes: bytes held, query latency, agreement
+with the float64 neighbors and accuracy on held-out rows
+
+Usage: python benchmark_knn_storage.py [--sizes 3500 100000 1000000] [--queries 500]
+"""
+
+import argparse
+import logging
+import time
+
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+
+from benchmark_data import scaled_datasets
+from benchmark_knn import latency_stats, agreement
+from ml_service_real_data import RealDataMentalHealthPredictor, CATEGORICAL_FEATURES
+from neighbor_search import build_knn_model
+from numpy_inference import InferenceEngine, KNN_STORAGES
+
+N_NEIGHBORS = 7
+
+
+def encoded_rows(predictor, n_rows, seed=42):
+    """Encoded (unscaled) rows resampled from the real datasets, with their labels.
+
+    Resampling repeats the ~3.5k source rows, so a little noise is added to the numeric
+    columns to keep the larger sizes from collapsing into exact duplicates; categorical
+    columns keep their integer codes.
+    """
+    combined_df = predictor.preprocess_data(*scaled_datasets(n_rows, seed))
+    encoded_df = predictor.encode_features(combined_df, {})
+    X = encoded_df[predictor.feature_names].fillna(0).to_numpy(dtype=np.float64)
+    numeric = [j for j, col in enumerate(predictor.feature_names) if col not in CATEGORICAL_FEATURES]
+    X[:, numeric] += np.random.default_rng(seed).normal(0.0, 0.01, (len(X), len(numeric))) * X[:, numeric].std(axis=0)
+    return X, encoded_df['risk_level'].to_numpy()
+
+
+def benchmark_size(predictor, n_rows, n_queries):
+    X, y = encoded_rows(predictor, n_rows + n_queries)
+    rng = np.random.default_rng(7)
+    held_out = rng.choice(len(X), n_queries, replace=False)
+    train = np.setdiff1d(np.arange(len(X)), held_out)
+    scaler = StandardScaler().fit(X[train])
+    model = build_knn_model(scaler.transform(X[train]), y[train], n_neighbors=N_NEIGHBORS)
+    queries, truth = X[held_out], y[held_out]
+    categorical = [j for j, col in enumerate(predictor.feature_names) if col in CATEGORICAL_FEATURES]
+
+    results = []
+    reference = None
+    for storage in KNN_STORAGES:
+        start = time.perf_counter()
+        engine = InferenceEngine.from_sklearn({'knn': model}, scaler, knn_storage=storage,
+                                              categorical_columns=categorical)
+        build_seconds = time.perf_counter() - start
+        p50, p99 = latency_stats(engine.knn_proba, queries[:200])
+        start = time.perf_counter()
+        scaled = engine.scale(queries)
+        outputs = (engine.kneighbors(scaled)[1], engine.knn_proba_scaled(scaled))
+        batch_seconds = time.perf_counter() - start
+        if reference is None:
+            reference = outputs
+        accuracy = float(np.mean(engine.knn_classes[np.argmax(outputs[1], axis=1)] == truth))
+        results.append((storage, engine.knn_nbytes(), build_seconds, p50, p99, batch_seconds,
+                        agreement(reference, outputs), accuracy))
+    return len(train), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[3_500, 100_000, 1_000_000])
+    parser.add_argument('--queries', type=int, default=500)
+    args = parser.parse_args()
+
+    logging.getLogger('ml_service_real_data').setLevel(logging.WARNING)
+    predictor = RealDataMentalHealthPredictor()
+
+    for n_rows in args.sizes:
+        n_train, results = benchmark_size(predictor, n_rows, args.queries)
+        float64_bytes = results[0][1]
+        print(f"\n{n_train} training rows, {args.queries} held-out queries, k={N_NEIGHBORS}")
+        print(f"{'storage':>10}  {'KNN MB':>8}  {'B/row':>6}  {'vs f64':>6}  {'build s':>7}  {'p50 us':>8}  "
+              f"{'p99 us':>8}  {'batch ms':>9}  {'recall':>7}  {'same class':>10}  {'mean |dp|':>9}  {'accuracy':>8}")
+        for (storage, nbytes, build_seconds, p50, p99, batch_seconds,
+             (recall, same_class, proba_diff), accuracy) in results:
+            print(f"{storage:>10}  {nbytes / 2**20:>8.1f}  {nbytes / n_train:>6.1f}  {nbytes / float64_bytes:>6.2f}  "
+                  f"{build_seconds:>7.2f}  {p50:>8.0f}  {p99:>8.0f}  {batch_seconds * 1e3:>9.1f}  "
+                  f"{recall:>7.3f}  {same_class:>10.3f}  {proba_diff:>9.4f}  {accuracy:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
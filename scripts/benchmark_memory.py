@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Per-worker memory benchmark for serving the real data ML service
+Compares N independent service processes that each train and hold their own models with
+the pre-forking server, whose workers share the master's models copy-on-write
+
+Reads /proc/<pid>/smaps_rollup, so it runs on Linux only. PSS (proportional set size)
+splits shared pages between the processes using them and is the fair per-worker number;
+RSS counts shared pages in full for every process.
+
+Usage: python benchmark_memory.py [--workers 4] [--requests 200]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+from benchmark_data import sample_assessments
+from ml_service_real_data import RealDataMentalHealthPredictor
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_PORT = 8310
+
+# Today's setup: every process trains its own models and runs the Flask server
+INDEPENDENT_SERVER = """
+import sys
+from ml_service_real_data import app, predictor
+predictor.train_models()
+app.run(host='127.0.0.1', port=int(sys.argv[1]), debug=False)
+"""
+
+
+def memory_kb(pid):
+    """Rss, Pss and private kB of one process"""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1])
+    private = fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    return fields['Rss'], fields['Pss'], private
+
+
+def children(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+
+def wait_ready(port, timeout=300):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f'http://127.0.0.1:{port}/ready', timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server on port {port} did not become ready")
+
+
+def warm_up(ports, assessments):
+    """Send prediction traffic so every worker has touched the models"""
+    for i, assessment in enumerate(assessments):
+        port = ports[i % len(ports)]
+        requests.post(f'http://127.0.0.1:{port}/predict', json={'answers': assessment}, timeout=30)
+
+
+def measure_independent(n_workers, assessments):
+    processes, ports = [], []
+    try:
+        for i in range(n_workers):
+            port = BASE_PORT + i
+            env = {**os.environ, 'MINDNEST_MODEL_DIR': tempfile.mkdtemp(prefix='mindnest-bench-')}
+            processes.append(subprocess.Popen(
+                [sys.executable, '-c', INDEPENDENT_SERVER, str(port)], cwd=SCRIPT_DIR, env=env,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            ))
+            ports.append(port)
+        for port in ports:
+            wait_ready(port)
+        warm_up(ports, assessments)
+        return [memory_kb(process.pid) for process in processes], []
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+
+def measure_prefork(n_workers, assessments):
+    port = BASE_PORT + 100
+    env = {**os.environ, 'MINDNEST_MODEL_DIR': tempfile.mkdtemp(prefix='mindnest-bench-')}
+    master = subprocess.Popen(
+        [sys.executable, os.path.join(SCRIPT_DIR, 'serve_production.py'),
+         '--workers', str(n_workers), '--bind', f'127.0.0.1:{port}'],
+        cwd=SCRIPT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_ready(port)
+        warm_up([port], assessments)
+        workers = children(master.pid)
+        return [memory_kb(pid) for pid in workers], [memory_kb(master.pid)]
+    finally:
+        master.terminate()
+        master.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    assessments = sample_assessments(RealDataMentalHealthPredictor(), args.requests)
+
+    print(f"{args.workers} workers, {args.requests} warm-up predictions; kB per process")
+    print(f"{'setup':>24}  {'worker RSS':>10}  {'worker PSS':>10}  {'private':>8}  "
+          f"{'master PSS':>10}  {'total PSS':>10}")
+    for name, measure in [('independent processes', measure_independent), ('pre-forked workers', measure_prefork)]:
+        workers, master = measure(args.workers, assessments)
+        mean = [sum(values) // len(values) for values in zip(*workers)]
+        master_pss = master[0][1] if master else 0
+        total_pss = sum(pss for _, pss, _ in workers) + master_pss
+        print(f"{name:>24}  {mean[0]:>10}  {mean[1]:>10}  {mean[2]:>8}  {master_pss:>10}  {total_pss:>10}")
+
+
+if __name__ == '__main__':
+    main()
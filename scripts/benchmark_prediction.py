@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Prediction throughput benchmark for the real data ML service
+Compares one predict() call per assessment with a single predict_many() call
+
+Usage: python benchmark_prediction.py [--sizes 1000 10000] [--model-types ensemble knn decision_tree]
+"""
+
+import argparse
+import logging
+import time
+import warnings
+
+from benchmark_data import sample_assessments
+from ml_service_real_data import RealDataMentalHealthPredictor
+
+
+def ready_predictor():
+    """Return a predictor with models loaded from the saved bundle, training if needed"""
+    predictor = RealDataMentalHealthPredictor()
+    if not predictor.load_models():
+        predictor.train_models()
+    return predictor
+
+
+def benchmark_prediction(predictor, sizes, model_types):
+    """Time the single-item and batch paths for each size and model type"""
+    results = []
+    for n_rows in sizes:
+        assessments = sample_assessments(predictor, n_rows)
+        for model_type in model_types:
+            start = time.perf_counter()
+            for assessment in assessments:
+                predictor.predict(assessment, model_type)
+            single_seconds = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            predictor.predict_many(assessments, model_type)
+            batch_seconds = time.perf_counter() - start
+            
+            results.append({
+                'rows': n_rows,
+                'model_type': model_type,
+                'single_rows_per_sec': n_rows / single_seconds,
+                'batch_rows_per_sec': n_rows / batch_seconds,
+                'speedup': single_seconds / batch_seconds
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000])
+    parser.add_argument('--model-types', nargs='+', default=['ensemble', 'decision_tree', 'knn'])
+    args = parser.parse_args()
+    
+    logging.getLogger('ml_service_real_data').setLevel(logging.WARNING)
+    # The models were fitted on a DataFrame; silence sklearn's feature-name warning per call
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+    
+    predictor = ready_predictor()
+    print(f"{'rows':>8}  {'model':>14}  {'single rows/s':>14}  {'batch rows/s':>14}  {'speedup':>8}")
+    for result in benchmark_prediction(predictor, args.sizes, args.model_types):
+        print(
+            f"{result['rows']:>8}  {result['model_type']:>14}  {result['single_rows_per_sec']:>14,.0f}  "
+            f"{result['batch_rows_per_sec']:>14,.0f}  {result['speedup']:>7.1f}x"
+        )
+
+
+if __name__ == '__main__':
+    main()
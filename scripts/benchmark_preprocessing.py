@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Preprocessing benchmark for the real data ML service
+Reports RealDataMentalHealthPredictor.preprocess_data throughput in rows/sec
+
+Usage: python benchmark_preprocessing.py [--sizes 10000 100000 1000000] [--repeat 3]
+"""
+
+import argparse
+import logging
+import time
+
+from benchmark_data import load_local_datasets, scale_datasets
+from ml_service_real_data import RealDataMentalHealthPredictor
+
+
+def benchmark_preprocessing(sizes, repeat=3):
+    """Time preprocess_data at each size and return the best run per size"""
+    predictor = RealDataMentalHealthPredictor()
+    df1, df2 = load_local_datasets()
+    results = []
+    
+    for n_rows in sizes:
+        scaled1, scaled2 = scale_datasets(df1, df2, n_rows)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            combined_df = predictor.preprocess_data(scaled1, scaled2)
+            timings.append(time.perf_counter() - start)
+        
+        best = min(timings)
+        results.append({
+            'rows': len(combined_df),
+            'seconds': best,
+            'rows_per_sec': len(combined_df) / best
+        })
+    
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    
+    # Keep per-call log lines out of the timings
+    logging.getLogger('ml_service_real_data').setLevel(logging.WARNING)
+    
+    print(f"{'rows':>10}  {'best (s)':>10}  {'rows/sec':>12}")
+    for result in benchmark_preprocessing(args.sizes, args.repeat):
+        print(f"{result['rows']:>10}  {result['seconds']:>10.4f}  {result['rows_per_sec']:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
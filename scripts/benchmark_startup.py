@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the real data ML service
+Times a cold `import ml_service_real_data` in fresh interpreters and checks that it stays
+within a budget without pulling in the training-only libraries. Then starts the service
+several times and measures, from process launch, how long it takes to answer /health and to
+serve the first /predict. The current entry point (bind first, load the model bundle in the
+background) is compared with loading the bundle before serving.
+
+Needs a saved model bundle in MINDNEST_MODEL_DIR (the service's default model directory).
+
+Usage: python benchmark_startup.py [--runs 3] [--import-runs 5]
+       python benchmark_startup.py --check [--budget-ms 750]   # import budget only; exits 1 when over
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import requests
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PORT = 8410
+IMPORT_BUDGET_MS = float(os.environ.get('MINDNEST_IMPORT_BUDGET_MS', '750'))
+# Imported only when training or loading models; importing the service must not load them
+HEAVY_MODULES = ('pandas', 'sklearn', 'scipy', 'joblib', 'requests')
+
+IMPORT_PROBE = """
+import sys, time
+start = time.perf_counter()
+import ml_service_real_data
+seconds = time.perf_counter() - start
+heavy = [name for name in sys.argv[1:] if name in sys.modules]
+print(seconds, ','.join(heavy))
+"""
+
+# Loads the bundle before serving, the way the entry point started before it bound first
+EAGER_SERVER = """
+import sys
+from ml_service_real_data import app, load_initial_models
+load_initial_models()
+app.run(host='127.0.0.1', port=int(sys.argv[1]), debug=False, threaded=True)
+"""
+
+SETUPS = {
+    'background load': [os.path.join(SCRIPT_DIR, 'ml_service_real_data.py')],
+    'load before serving': ['-c', EAGER_SERVER]
+}
+
+
+def import_time(runs):
+    """(median seconds, heavy modules imported) of a cold import, each run in a new interpreter"""
+    timings, heavy = [], set()
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', IMPORT_PROBE, *HEAVY_MODULES], cwd=SCRIPT_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.split()
+        timings.append(float(output[0]))
+        if len(output) > 1:
+            heavy.update(output[1].split(','))
+    return statistics.median(timings), sorted(heavy)
+
+
+def wait_for(request, timeout, interval=0.01):
+    """Seconds until request() answers 200, polling every interval seconds"""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            if request().status_code == 200:
+                return time.perf_counter() - start
+        except requests.RequestException:
+            pass
+        time.sleep(interval)
+    raise RuntimeError(f"No 200 response within {timeout}s")
+
+
+def measure_startup(args, port, assessment, timeout=300):
+    """(seconds to first healthy, seconds to first prediction, server-side milestones) of one start"""
+    env = {**os.environ, 'MINDNEST_HOST': '127.0.0.1', 'MINDNEST_PORT': str(port)}
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, *args, str(port)], cwd=SCRIPT_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        base = f'http://127.0.0.1:{port}'
+        wait_for(lambda: requests.get(f'{base}/health', timeout=1), timeout)
+        healthy = time.perf_counter() - start
+        # Polled less often than /health, so on a small machine the polling does not slow the load
+        predict = lambda: requests.post(f'{base}/predict', json={'answers': assessment}, timeout=5)
+        wait_for(predict, timeout, interval=0.1)
+        predicted = time.perf_counter() - start
+        milestones = requests.get(f'{base}/health', timeout=1).json().get('startup', {})
+        return healthy, predicted, milestones
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3, help='service starts per setup')
+    parser.add_argument('--import-runs', type=int, default=5, help='cold imports timed')
+    parser.add_argument('--budget-ms', type=float, default=IMPORT_BUDGET_MS,
+                        help='import time budget (default: MINDNEST_IMPORT_BUDGET_MS or 750)')
+    parser.add_argument('--check', action='store_true', help='only check the import budget')
+    args = parser.parse_args()
+
+    seconds, heavy = import_time(args.import_runs)
+    over_budget = seconds * 1000 > args.budget_ms
+    print(f"import ml_service_real_data: {seconds * 1000:.0f} ms median of {args.import_runs} "
+          f"(budget {args.budget_ms:.0f} ms){'  OVER BUDGET' if over_budget else ''}")
+    print(f"training-only modules imported: {', '.join(heavy) if heavy else 'none'}")
+    if args.check:
+        sys.exit(1 if over_budget or heavy else 0)
+
+    from ml_service_real_data import FEATURE_DEFAULTS
+    print(f"\nMedian of {args.runs} starts, seconds from process launch")
+    print(f"{'setup':>20}  {'first healthy':>13}  {'first prediction':>16}  {'server: listening':>17}  "
+          f"{'models ready':>12}")
+    for i, (name, command) in enumerate(SETUPS.items()):
+        runs = [measure_startup(command, PORT + i, FEATURE_DEFAULTS) for _ in range(args.runs)]
+        healthy = statistics.median(run[0] for run in runs)
+        predicted = statistics.median(run[1] for run in runs)
+        listening = [run[2]['listening'] for run in runs if 'listening' in run[2]]
+        ready = [run[2]['models_ready'] for run in runs if 'models_ready' in run[2]]
+        print(f"{name:>20}  {healthy:>13.3f}  {predicted:>16.3f}  "
+              f"{statistics.median(listening) if listening else float('nan'):>17.3f}  "
+              f"{statistics.median(ready) if ready else float('nan'):>12.3f}")
+
+
+if __name__ == '__main__':
+    main()
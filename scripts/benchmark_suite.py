@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for training and inference in the MindNest ML services
+Times dataset loading, preprocess_data, encode_features, train_models, single and batched
+predict for each model type, and MentalHealthPredictor.generate_synthetic_data at several
+data scales resampled from the real datasets, and writes the results as JSON so runs from
+different commits can be compared
+
+Each benchmark is run once to warm up and then sampled --repeat times; a sample repeats the
+call until it lasts at least --min-time seconds and records the mean per call.
+
+train_models fits the default parameters, as it did before model selection existed, unless
+--model-selection is given; then the cross-validated search is timed too and recorded as a
+separate benchmark.
+
+Usage: python benchmark_suite.py [--scales 1000 10000 100000] [--bench predict] [--model-selection] [--output run.json]
+       python benchmark_suite.py --compare base.json [head.json] [--threshold 1.2]
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from benchmark_data import load_local_datasets, scale_datasets
+from dataset_cache import DatasetCache
+import ml_service_real_data
+from ml_service import MentalHealthPredictor
+from ml_service_real_data import RealDataMentalHealthPredictor
+from prediction_cache import PredictionCache
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(SCRIPT_DIR, '.benchmarks')
+RESULTS_FORMAT_VERSION = 1
+MODEL_TYPES = ['decision_tree', 'knn', 'ensemble']
+# Assessments per predict benchmark: single calls cycle through them, batches score them all
+PREDICT_ROWS = 1000
+
+
+def measure(fn, repeat, min_time, setup=None):
+    """Seconds per call of fn: one warm-up call, then `repeat` samples.
+
+    With a setup function every sample is a single call preceded by an untimed setup();
+    otherwise a sample repeats fn until it has run for at least min_time seconds.
+    """
+    if setup is not None:
+        setup()
+    start = time.perf_counter()
+    fn()
+    first = time.perf_counter() - start
+    number = 1 if setup is not None else max(1, int(min_time / max(first, 1e-9)))
+
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return {
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        'samples': samples,
+        'number': number
+    }
+
+
+class Suite:
+    """Runs the benchmarks in a scratch directory and collects one record per measurement"""
+
+    def __init__(self, scales, repeat, min_time, selected=None, model_selection=False):
+        self.scales = scales
+        self.repeat = repeat
+        self.min_time = min_time
+        self.selected = selected or []
+        self.model_selection = model_selection
+        self.records = []
+        self.workdir = tempfile.mkdtemp(prefix='mindnest-bench-')
+
+    def wanted(self, name):
+        return not self.selected or any(name.startswith(prefix) for prefix in self.selected)
+
+    def wanted_group(self, group):
+        """True if any selected benchmark is named group or something under it"""
+        return self.wanted(group) or any(prefix.startswith(group) for prefix in self.selected)
+
+    def record(self, name, params, rows, fn, setup=None, repeat=None):
+        if not self.wanted(name):
+            return None
+        timing = measure(fn, repeat or self.repeat, self.min_time, setup)
+        result = {
+            'benchmark': name,
+            'params': params,
+            'rows': rows,
+            'unit': 'seconds',
+            **timing,
+            'rows_per_sec': rows / timing['median']
+        }
+        self.records.append(result)
+        print(f"{name:>28}  {format_params(params):>44}  {timing['median'] * 1e3:>12.3f}  "
+              f"{timing['stdev'] / timing['median'] * 100 if timing['median'] else 0:>6.1f}%  "
+              f"{result['rows_per_sec']:>14,.0f}", flush=True)
+        return result
+
+    def predictor(self):
+        """A real data predictor that writes only to the scratch directory and never caches"""
+        predictor = RealDataMentalHealthPredictor()
+        predictor.model_dir = os.path.join(self.workdir, 'models')
+        predictor.dataset_cache = DatasetCache(os.path.join(self.workdir, 'dataset_cache'))
+        predictor.prediction_cache = PredictionCache(max_bytes=0)
+        return predictor
+
+    def run(self):
+        cwd = os.getcwd()
+        settings = ml_service_real_data.MODEL_SELECTION, ml_service_real_data.SELECTION_CACHE_DIR
+        # train_models() writes processed_real_data.csv to the working directory, and the
+        # parameter search its fold caches to SELECTION_CACHE_DIR
+        os.chdir(self.workdir)
+        ml_service_real_data.MODEL_SELECTION = self.model_selection
+        ml_service_real_data.SELECTION_CACHE_DIR = os.path.join(self.workdir, 'folds')
+        try:
+            df1, df2 = load_local_datasets()
+            for n_rows in self.scales:
+                self.run_scale(*scale_datasets(df1, df2, n_rows), n_rows)
+            self.run_synthetic()
+        finally:
+            ml_service_real_data.MODEL_SELECTION, ml_service_real_data.SELECTION_CACHE_DIR = settings
+            os.chdir(cwd)
+            shutil.rmtree(self.workdir, ignore_errors=True)
+        return self.records
+
+    def run_scale(self, scaled1, scaled2, n_rows):
+        params = {'rows': n_rows}
+        predictor = self.predictor()
+
+        # Loading: CSVs of this size on local disk, parsed (cold) or from the dataset cache (warm)
+        scale_dir = os.path.join(self.workdir, f'rows-{n_rows}')
+        os.makedirs(scale_dir)
+        predictor.dataset_paths = {
+            'dataset1': os.path.join(scale_dir, 'dataset1.csv'),
+            'dataset2': os.path.join(scale_dir, 'dataset2.csv')
+        }
+        scaled1.to_csv(predictor.dataset_paths['dataset1'], index=False)
+        scaled2.to_csv(predictor.dataset_paths['dataset2'], index=False)
+
+        def cold_cache():
+            predictor.dataset_cache = DatasetCache(tempfile.mkdtemp(dir=scale_dir))
+
+        self.record('load_real_datasets.cold', params, n_rows, predictor.load_real_datasets, setup=cold_cache)
+        predictor.dataset_cache = DatasetCache(os.path.join(scale_dir, 'cache'))
+        self.record('load_real_datasets.warm', params, n_rows, predictor.load_real_datasets)
+
+        self.record('preprocess_data', params, n_rows, lambda: predictor.preprocess_data(scaled1, scaled2))
+        combined_df = predictor.preprocess_data(scaled1, scaled2)
+        label_encoders = {}
+        predictor.encode_features(combined_df, label_encoders)
+        self.record('encode_features.fit', params, len(combined_df),
+                    lambda: predictor.encode_features(combined_df, {}))
+        self.record('encode_features.transform', params, len(combined_df),
+                    lambda: predictor.encode_features(combined_df, label_encoders))
+
+        # Training reads the scaled CSVs through load_real_datasets, like the service does
+        # With the search on, a different key, so runs without it still compare with each other
+        train_params = {**params, 'model_selection': True} if self.model_selection else params
+        self.record('train_models', train_params, n_rows, predictor.train_models, repeat=min(self.repeat, 3))
+        if not self.wanted_group('predict'):
+            return
+        if not predictor.ready:
+            predictor.train_models()
+
+        # Predictions against the models trained at this scale; KNN cost grows with it
+        assessments = combined_df[predictor.feature_names].sample(
+            min(PREDICT_ROWS, len(combined_df)), random_state=42
+        ).to_dict('records')
+        for model_type in MODEL_TYPES:
+            calls = itertools.count()
+            self.record(
+                'predict.single', {**params, 'model_type': model_type}, 1,
+                lambda: predictor.predict(assessments[next(calls) % len(assessments)], model_type)
+            )
+            self.record(
+                'predict.batch', {**params, 'model_type': model_type, 'batch': len(assessments)},
+                len(assessments), lambda: predictor.predict_many(assessments, model_type)
+            )
+
+    def run_synthetic(self):
+        predictor = MentalHealthPredictor()
+        for n_rows in self.scales:
+            self.record('generate_synthetic_data', {'rows': n_rows}, n_rows,
+                        lambda: predictor.generate_synthetic_data(n_rows))
+
+
+def format_params(params):
+    return ' '.join(f'{key}={value}' for key, value in params.items())
+
+
+def record_key(record):
+    return record['benchmark'], format_params(record['params'])
+
+
+def git_commit():
+    """(commit, dirty) of the working tree, or (None, None) outside a git checkout"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=SCRIPT_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=SCRIPT_DIR,
+                                capture_output=True, text=True, check=True).stdout
+        return commit, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'scikit-learn': sklearn.__version__
+    }
+
+
+def save_results(records, args, path=None):
+    commit, dirty = git_commit()
+    created = datetime.now(timezone.utc)
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        name = f"{created:%Y%m%dT%H%M%SZ}-{(commit or 'nogit')[:10]}{'-dirty' if dirty else ''}.json"
+        path = os.path.join(RESULTS_DIR, name)
+    with open(path, 'w') as f:
+        json.dump({
+            'format_version': RESULTS_FORMAT_VERSION,
+            'created': created.isoformat(),
+            'commit': commit,
+            'dirty': dirty,
+            'environment': environment(),
+            'settings': {'scales': args.scales, 'repeat': args.repeat, 'min_time': args.min_time,
+                         'model_selection': args.model_selection},
+            'results': records
+        }, f, indent=2)
+    return path
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(base, head, threshold):
+    """Print median-time ratios head/base; returns the number of regressions over threshold"""
+    base_records = {record_key(record): record for record in base['results']}
+    print(f"base {base.get('commit') or '?'}  vs  head {head.get('commit') or '?'}  "
+          f"(ratio = head median / base median, flagged above {threshold:.2f})")
+    print(f"{'benchmark':>28}  {'params':>44}  {'base ms':>10}  {'head ms':>10}  {'ratio':>7}")
+    regressions = 0
+    for record in head['results']:
+        old = base_records.get(record_key(record))
+        if old is None:
+            continue
+        ratio = record['median'] / old['median']
+        flag = ''
+        if ratio > threshold:
+            flag = '  slower'
+            regressions += 1
+        elif ratio < 1 / threshold:
+            flag = '  faster'
+        print(f"{record['benchmark']:>28}  {format_params(record['params']):>44}  {old['median'] * 1e3:>10.3f}  "
+              f"{record['median'] * 1e3:>10.3f}  {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--bench', nargs='+', default=[],
+                        help='Only run benchmarks whose name starts with one of these prefixes')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.1)
+    parser.add_argument('--model-selection', action='store_true',
+                        help='include the cross-validated parameter search in train_models')
+    parser.add_argument('--output', help=f'Result file (default: a new file in {RESULTS_DIR})')
+    parser.add_argument('--compare', nargs='+', metavar='RESULTS',
+                        help='BASE [HEAD]: compare two result files, or BASE with a fresh run')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='Median ratio above which a benchmark counts as a regression')
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) > 2:
+        parser.error('--compare takes one or two result files')
+    if args.compare and len(args.compare) == 2:
+        regressions = compare(load_results(args.compare[0]), load_results(args.compare[1]), args.threshold)
+        sys.exit(1 if regressions else 0)
+
+    # Keep per-call log lines and sklearn's feature-name warning out of the timings
+    logging.getLogger('ml_service_real_data').setLevel(logging.WARNING)
+    logging.getLogger('ml_service').setLevel(logging.WARNING)
+    logging.getLogger('dataset_cache').setLevel(logging.WARNING)
+    logging.getLogger('model_bundle').setLevel(logging.WARNING)
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+
+    print(f"{'benchmark':>28}  {'params':>44}  {'median ms':>12}  {'stdev':>7}  {'rows/sec':>14}")
+    records = Suite(args.scales, args.repeat, args.min_time, args.bench, args.model_selection).run()
+    path = save_results(records, args, args.output)
+    print(f"Results written to {path}")
+
+    if args.compare:
+        print()
+        regressions = compare(load_results(args.compare[0]), load_results(path), args.threshold)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Training memory benchmark for the real data ML service
+Trains in memory and in streaming mode on CSVs resampled from the real datasets, each run in
+a fresh process, and reports its peak RSS, duration and test accuracy
+
+Usage: python benchmark_training_memory.py [--rows 200000 1000000 4000000] [--budget-mb 256]
+                                           [--max-memory-rows 1000000]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from benchmark_data import load_local_datasets, scale_datasets
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Rows resampled and written per step, so writing the CSVs stays small too
+WRITE_ROWS = 250_000
+
+TRAIN_RUN = """
+import json, logging, resource, sys, time
+logging.disable(logging.INFO)
+from ml_service_real_data import RealDataMentalHealthPredictor
+predictor = RealDataMentalHealthPredictor()
+predictor.dataset_paths = {'dataset1': sys.argv[1], 'dataset2': sys.argv[2]}
+start = time.perf_counter()
+results = predictor.train_models()
+results['seconds'] = time.perf_counter() - start
+results['peak_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps(results))
+"""
+
+
+def write_scaled_csvs(n_rows, directory):
+    """Write n_rows resampled from both datasets as two CSVs, a block at a time"""
+    df1, df2 = load_local_datasets()
+    paths = [os.path.join(directory, 'dataset1.csv'), os.path.join(directory, 'dataset2.csv')]
+    for i, start in enumerate(range(0, n_rows, WRITE_ROWS)):
+        scaled = scale_datasets(df1, df2, min(WRITE_ROWS, n_rows - start), seed=i)
+        for path, df in zip(paths, scaled):
+            df.to_csv(path, mode='a' if i else 'w', header=not i, index=False)
+    return paths
+
+
+def train_in_subprocess(paths, mode, budget_mb, workdir):
+    env = {
+        **os.environ,
+        'MINDNEST_TRAINING_MODE': mode,
+        'MINDNEST_TRAINING_MEMORY_MB': str(budget_mb),
+        'MINDNEST_MODEL_DIR': os.path.join(workdir, f'models-{mode}')
+    }
+    # The processed CSV lands in the working directory, so run from the scratch directory
+    output = subprocess.run(
+        [sys.executable, '-c', TRAIN_RUN, *paths], cwd=workdir, env={**env, 'PYTHONPATH': SCRIPT_DIR},
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[200_000, 1_000_000, 4_000_000])
+    parser.add_argument('--budget-mb', type=int, default=256)
+    parser.add_argument('--max-memory-rows', type=int, default=1_000_000,
+                        help='Skip in-memory training above this many rows')
+    args = parser.parse_args()
+
+    print(f"streaming budget {args.budget_mb} MB")
+    print(f"{'rows':>10}  {'CSV MB':>8}  {'mode':>10}  {'peak RSS MB':>12}  {'seconds':>8}  "
+          f"{'fitted on':>10}  {'DT acc':>7}  {'KNN acc':>7}")
+    for n_rows in args.rows:
+        workdir = tempfile.mkdtemp(prefix='mindnest-train-bench-')
+        try:
+            paths = write_scaled_csvs(n_rows, workdir)
+            csv_mb = sum(os.path.getsize(path) for path in paths) / 2**20
+            for mode in ('memory', 'streaming'):
+                if mode == 'memory' and n_rows > args.max_memory_rows:
+                    print(f"{n_rows:>10}  {csv_mb:>8.0f}  {mode:>10}  {'skipped':>12}")
+                    continue
+                result = train_in_subprocess(paths, mode, args.budget_mb, workdir)
+                print(f"{n_rows:>10}  {csv_mb:>8.0f}  {mode:>10}  {result['peak_rss_kb'] / 1024:>12.0f}  "
+                      f"{result['seconds']:>8.1f}  {result['training_samples']:>10}  "
+                      f"{result['decision_tree_accuracy']:>7.3f}  {result['knn_accuracy']:>7.3f}", flush=True)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+MindNest bulk scoring
+Re-scores a file of stored assessments with the real data service's trained models, without
+going through HTTP. The input is read in chunks and each chunk is scored with predict_many in
+a process pool. Every worker memory-maps the same saved model bundle. Results are written in
+input order as they complete, and only a few chunks are held at a time, so memory stays flat
+however large the file is.
+
+Input and output formats follow the file extension: .csv, .ndjson/.jsonl or .parquet
+(Parquet needs pyarrow). Each output row has the prediction, severity, confidence and risk
+factors, or the error that kept the assessment from being scored.
+
+Usage: python bulk_score.py assessments.csv scores.csv [--workers 4] [--chunk-size 5000] [--keep id]
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson', '.parquet': 'parquet', '.pq': 'parquet'}
+RESULT_COLUMNS = ('prediction', 'severity', 'confidence', 'risk_factors')
+# Chunks queued or being scored per worker; bounds memory while keeping every worker busy
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+_predictor = None
+
+
+def file_format(path, explicit=None):
+    """The format named explicitly or implied by the path's extension"""
+    if explicit:
+        return explicit
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Cannot tell the format of {path}; use one of {sorted(FORMATS)} or pass the format")
+    return FORMATS[extension]
+
+
+def _parquet():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet files need pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def _answered(record):
+    """Drop the fields a stored assessment left empty, so the model defaults apply to them"""
+    return {key: value for key, value in record.items() if value is not None and value == value and value != ''}
+
+
+def _records(columns):
+    """Assessment dicts from {column: [values]}, zipped row-wise instead of per-cell lookups"""
+    names = list(columns)
+    return [
+        {name: value for name, value in zip(names, values) if value is not None and value == value and value != ''}
+        for values in zip(*columns.values())
+    ]
+
+
+def read_chunks(path, fmt, chunk_size):
+    """Yield lists of assessment dicts of at most chunk_size rows"""
+    if fmt == 'csv':
+        # Strings throughout: categorical answers must match the encoders' labels exactly
+        for chunk in pd.read_csv(path, chunksize=chunk_size, dtype=object):
+            yield _records({column: chunk[column].tolist() for column in chunk.columns})
+    elif fmt == 'ndjson':
+        chunk = []
+        with open(path) as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Scored as an error row, so the output stays aligned with the input
+                    logger.warning(f"Line {line_number} of {path} is not valid JSON")
+                    record = None
+                chunk.append(_answered(record) if isinstance(record, dict) else record)
+                if len(chunk) == chunk_size:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+    elif fmt == 'parquet':
+        parquet_file = _parquet().parquet.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield _records(batch.to_pydict())
+    else:
+        raise ValueError(f"Unknown format {fmt!r}")
+
+
+class ResultWriter:
+    """Streams result rows to a CSV, NDJSON or Parquet file"""
+
+    def __init__(self, path, fmt, columns):
+        self.fmt = fmt
+        self.columns = list(columns)
+        self._header = True
+        self._parquet_writer = None
+        if fmt == 'parquet':
+            pyarrow = _parquet()
+            self._pyarrow = pyarrow
+            self._f = None
+            self._path = path
+        elif fmt in ('csv', 'ndjson'):
+            self._f = open(path, 'w', newline='')
+        else:
+            raise ValueError(f"Unknown format {fmt!r}")
+
+    def write(self, rows):
+        """Write a chunk of result dicts"""
+        if self.fmt == 'ndjson':
+            self._f.writelines(json.dumps(row) + '\n' for row in rows)
+            return
+        if self.fmt == 'csv':
+            frame = pd.DataFrame(rows, columns=self.columns)
+            # Lists go into one CSV cell as JSON
+            for column in ('risk_factors', 'recommendations'):
+                if column in frame:
+                    frame[column] = [None if value is None else json.dumps(value) for value in frame[column]]
+            frame.to_csv(self._f, header=self._header, index=False)
+            self._header = False
+            return
+        if self._parquet_writer is None:
+            self._parquet_writer = self._pyarrow.parquet.ParquetWriter(self._path, self._parquet_schema(rows))
+        self._parquet_writer.write_table(self._pyarrow.Table.from_pylist(rows, schema=self._parquet_writer.schema))
+
+    def _parquet_schema(self, rows):
+        """Fixed types for the result columns; kept input columns take the type of the first chunk"""
+        pa = self._pyarrow
+        types = {
+            'prediction': pa.string(), 'severity': pa.string(), 'confidence': pa.float64(),
+            'risk_factors': pa.list_(pa.string()), 'recommendations': pa.list_(pa.string()), 'error': pa.string()
+        }
+        inferred = pa.Table.from_pylist([{column: row.get(column) for column in self.columns} for row in rows]).schema
+        fields = []
+        for column in self.columns:
+            column_type = types.get(column) or inferred.field(column).type
+            fields.append((column, pa.string() if pa.types.is_null(column_type) else column_type))
+        return pa.schema(fields)
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+def _init_worker(version):
+    """Load the model bundle once per worker; its arrays are memory-mapped and shared"""
+    global _predictor
+    logging.getLogger('ml_service_real_data').setLevel(logging.WARNING)
+    from ml_service_real_data import RealDataMentalHealthPredictor
+    _predictor = RealDataMentalHealthPredictor()
+    if not _predictor.load_models(version):
+        raise RuntimeError(f"Model version {version} could not be loaded")
+
+
+def score_chunk(assessments, model_type, recommendations=False):
+    """Score one chunk in a worker; returns one small result dict per assessment"""
+    rows = []
+    for result in _predictor.predict_many(assessments, model_type):
+        if 'error' in result:
+            rows.append({column: None for column in RESULT_COLUMNS} | {'error': result['error']})
+            continue
+        row = {
+            'prediction': result['prediction'],
+            'severity': result['severity'],
+            'confidence': result['confidence'],
+            'risk_factors': result['riskFactors'],
+            'error': None
+        }
+        if recommendations:
+            row['recommendations'] = result['recommendations']
+        rows.append(row)
+    return rows
+
+
+def bulk_score(input_path, output_path, model_type='ensemble', n_workers=None, chunk_size=5000, keep=(),
+               recommendations=False, input_format=None, output_format=None, version=None,
+               start_method='spawn', progress_seconds=5.0):
+    """Score every assessment in input_path into output_path and return a summary.
+
+    The output is written next to output_path and moved into place once every row is scored,
+    so a failed run never leaves a partial file behind. With n_workers of 1 the chunks are
+    scored in this process instead of a pool.
+    """
+    from ml_service_real_data import MODEL_DIR
+    from model_bundle import latest_version
+
+    input_format = file_format(input_path, input_format)
+    output_format = file_format(output_path, output_format)
+    keep = list(keep)
+    columns = keep + list(RESULT_COLUMNS) + (['recommendations'] if recommendations else []) + ['error']
+    # Pinned up front, so a promotion during the run cannot mix two model versions
+    version = version or latest_version(MODEL_DIR)
+    if version is None:
+        raise RuntimeError(f"No trained model bundle in {MODEL_DIR}; train the models first")
+    n_workers = n_workers or os.cpu_count() or 1
+
+    if n_workers <= 1:
+        _init_worker(version)
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    writer = ResultWriter(tmp_path, output_format, columns)
+    executor = None
+    if n_workers > 1:
+        executor = ProcessPoolExecutor(
+            max_workers=n_workers, mp_context=multiprocessing.get_context(start_method),
+            initializer=_init_worker, initargs=(version,)
+        )
+    counts = {'rows': 0, 'errors': 0}
+    start = last_report = time.perf_counter()
+
+    def write(kept, rows):
+        nonlocal last_report
+        rows = [kept_values | row for kept_values, row in zip(kept, rows)]
+        writer.write(rows)
+        counts['rows'] += len(rows)
+        counts['errors'] += sum(1 for row in rows if row['error'] is not None)
+        now = time.perf_counter()
+        if progress_seconds and now - last_report >= progress_seconds:
+            last_report = now
+            print(f"{counts['rows']:,} rows scored ({counts['errors']:,} errors), "
+                  f"{counts['rows'] / (now - start):,.0f} rows/s", file=sys.stderr, flush=True)
+
+    in_flight = deque()
+    try:
+        for assessments in read_chunks(input_path, input_format, chunk_size):
+            kept = [{column: a.get(column) if isinstance(a, dict) else None for column in keep} for a in assessments]
+            if executor is None:
+                write(kept, score_chunk(assessments, model_type, recommendations))
+                continue
+            in_flight.append((kept, executor.submit(score_chunk, assessments, model_type, recommendations)))
+            if len(in_flight) >= n_workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+                kept, future = in_flight.popleft()
+                write(kept, future.result())
+        while in_flight:
+            kept, future = in_flight.popleft()
+            write(kept, future.result())
+        writer.close()
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    seconds = time.perf_counter() - start
+    return {
+        'rows': counts['rows'],
+        'errors': counts['errors'],
+        'model_version': version,
+        'model_type': model_type,
+        'n_workers': n_workers,
+        'seconds': round(seconds, 2),
+        'rows_per_second': round(counts['rows'] / seconds) if seconds else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('input', help='assessments file (.csv, .ndjson/.jsonl or .parquet)')
+    parser.add_argument('output', help='results file (.csv, .ndjson/.jsonl or .parquet)')
+    parser.add_argument('--model-type', default='ensemble', choices=['decision_tree', 'knn', 'ensemble'])
+    parser.add_argument('--workers', type=int, default=None, help='default: one per CPU')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='assessments scored per task')
+    parser.add_argument('--keep', nargs='+', default=[], help='input columns copied to the output, e.g. an id')
+    parser.add_argument('--recommendations', action='store_true', help='also write the recommendations')
+    parser.add_argument('--version', help='model bundle version to score with (default: the live one)')
+    parser.add_argument('--input-format', choices=sorted(set(FORMATS.values())))
+    parser.add_argument('--output-format', choices=sorted(set(FORMATS.values())))
+    parser.add_argument('--progress', type=float, default=5.0, help='seconds between progress lines; 0 for none')
+    parser.add_argument('--start-method', choices=multiprocessing.get_all_start_methods(),
+                        help='worker start method (default: MINDNEST_TRAINING_START_METHOD)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    logging.getLogger('ml_service_real_data').setLevel(logging.WARNING)
+    from ml_service_real_data import TRAINING_START_METHOD
+    summary = bulk_score(
+        args.input, args.output, args.model_type, n_workers=args.workers, chunk_size=args.chunk_size,
+        keep=args.keep, recommendations=args.recommendations, input_format=args.input_format,
+        output_format=args.output_format, version=args.version, start_method=args.start_method or TRAINING_START_METHOD,
+        progress_seconds=args.progress
+    )
+    print(f"Scored {summary['rows']:,} assessments ({summary['errors']:,} errors) with model "
+          f"{summary['model_version']} on {summary['n_workers']} workers in {summary['seconds']}s, "
+          f"{summary['rows_per_second']:,} rows/s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
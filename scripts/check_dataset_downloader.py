@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Dataset downloader check against a local HTTP stand-in
+Serves a dataset from a throwaway http.server that honours ETag, Last-Modified, Range and
+If-Range, and runs the downloader through fresh, conditional, resumed and broken downloads:
+a .part that is already complete (416), a resume answered from the wrong offset, a changed
+remote file, a 304 without a mirror and a transient 503. Exits 1 if any scenario fails.
+
+Usage: python check_dataset_downloader.py [--size 200000]
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from dataset_downloader import DatasetDownloader
+
+NAME = 'dataset'
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """Serves server.content; server.mode bends the answers for the failure scenarios"""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.requests += 1
+        content, etag = server.content, server.etag
+        if server.mode == '503' and server.requests == 1:
+            return self._send(503)
+        if server.mode == 'always_304':
+            return self._send(304)
+        if self.headers.get('If-None-Match') == etag:
+            return self._send(304, etag=etag)
+
+        range_header = self.headers.get('Range')
+        if range_header and self.headers.get('If-Range') in (etag, server.last_modified):
+            start = int(range_header.split('=', 1)[1].split('-', 1)[0])
+            if start >= len(content):
+                return self._send(416, headers={'Content-Range': f'bytes */{len(content)}'})
+            # A misbehaving server that ignores the requested offset
+            sent_from = 0 if server.mode == 'wrong_range' else start
+            return self._send(206, content[sent_from:], etag, {
+                'Content-Range': f'bytes {sent_from}-{len(content) - 1}/{len(content)}'
+            })
+        return self._send(200, content, etag)
+
+    def _send(self, status, body=b'', etag=None, headers=None):
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', self.server.last_modified)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_stand_in(content):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandIn)
+    server.content = content
+    server.etag = '"v1"'
+    server.last_modified = 'Sat, 17 Oct 2026 08:00:00 GMT'
+    server.mode = None
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def leave_partial(downloader, url, data, etag):
+    """The state a download interrupted after writing data leaves behind"""
+    if os.path.exists(downloader.mirror_path(NAME)):
+        os.remove(downloader.mirror_path(NAME))
+    with open(downloader._part_path(NAME), 'wb') as f:
+        f.write(data)
+    downloader._write_meta(NAME, {'url': url, 'partial_etag': etag, 'partial_last_modified': None})
+
+
+def run_checks(size):
+    content = os.urandom(size)
+    half = content[:size // 2]
+    server = start_stand_in(content)
+    url = f'http://127.0.0.1:{server.server_address[1]}/{NAME}.csv'
+    mirror_dir = tempfile.mkdtemp(prefix='mindnest-downloader-')
+    downloader = DatasetDownloader(mirror_dir, timeout=(2, 10), max_retries=3, backoff=0.01)
+
+    def fetch(mode=None):
+        server.mode = mode
+        server.requests = 0
+        return downloader.fetch(NAME, url)
+
+    def mirrored():
+        try:
+            with open(downloader.mirror_path(NAME), 'rb') as f:
+                return f.read() == server.content
+        except FileNotFoundError:
+            return False
+
+    def no_partial():
+        return not os.path.exists(downloader._part_path(NAME))
+
+    checks = []
+
+    def check(scenario, result, expected_status, *conditions):
+        passed = result.status == expected_status and all(conditions)
+        checks.append(passed)
+        print(f"{'ok  ' if passed else 'FAIL'}  {scenario}: {result.status}, {result.bytes_transferred} bytes, "
+              f"{result.attempts} attempt(s){'' if result.error is None else ', ' + result.error}")
+
+    try:
+        result = fetch()
+        check('fresh download', result, 'downloaded', mirrored(), result.bytes_transferred == size)
+
+        result = fetch()
+        check('unchanged remote', result, 'not_modified', result.bytes_transferred == 0, mirrored())
+
+        leave_partial(downloader, url, half, server.etag)
+        result = fetch()
+        check('resume after interruption', result, 'resumed', mirrored(),
+              result.bytes_transferred == size - len(half), no_partial())
+
+        leave_partial(downloader, url, content, server.etag)
+        result = fetch()
+        check('complete .part (416)', result, 'downloaded', mirrored(), no_partial(), server.requests == 2)
+
+        leave_partial(downloader, url, half, server.etag)
+        result = fetch('wrong_range')
+        check('206 from the wrong offset', result, 'downloaded', mirrored(), no_partial())
+
+        leave_partial(downloader, url, half, server.etag)
+        server.content, server.etag = os.urandom(size), '"v2"'
+        result = fetch()
+        check('changed remote during resume', result, 'downloaded', mirrored(), result.bytes_transferred == size)
+
+        result = fetch('503')
+        check('transient 503', result, 'not_modified', result.attempts == 2)
+
+        os.remove(downloader.mirror_path(NAME))
+        result = fetch('always_304')
+        check('304 without a mirror', result, 'failed', result.attempts == 1,
+              not os.path.exists(downloader.mirror_path(NAME)))
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(mirror_dir, ignore_errors=True)
+    return all(checks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=200_000, help='bytes in the served dataset')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    sys.exit(0 if run_checks(args.size) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+MindNest dataset cache
+Stores parsed dataset frames as NPZ column archives keyed by the source file's content hash
+"""
+
+import hashlib
+import json
+import logging
+import os
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 1
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Return the hex SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DatasetCache:
+    """Content-addressed cache of parsed CSV files"""
+    
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+    
+    def _cache_path(self, name, content_hash):
+        return os.path.join(self.cache_dir, f"{name}-{content_hash[:16]}.npz")
+    
+    def read_csv(self, path, name=None):
+        """Read a CSV through the cache, parsing it only when its contents have changed"""
+        name = name or os.path.splitext(os.path.basename(path))[0]
+        content_hash = file_sha256(path)
+        cache_path = self._cache_path(name, content_hash)
+        
+        if os.path.exists(cache_path):
+            try:
+                df = self.load_frame(cache_path)
+                logger.info(f"Loaded {name} from cache {os.path.basename(cache_path)}")
+                return df
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable cache file {cache_path}: {str(e)}")
+        
+        import pandas as pd
+        df = pd.read_csv(path)
+        try:
+            self._remove_stale(name, keep=cache_path)
+            self.save_frame(df, cache_path)
+        except OSError as e:
+            logger.warning(f"Could not write dataset cache {cache_path}: {str(e)}")
+        return df
+    
+    def _remove_stale(self, name, keep):
+        """Delete cache files left behind by earlier versions of the same source"""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for filename in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, filename)
+            if filename.startswith(f"{name}-") and filename.endswith('.npz') and path != keep:
+                os.remove(path)
+    
+    @staticmethod
+    def save_frame(df, path):
+        """Write a DataFrame as one NPZ array per column plus a JSON schema"""
+        arrays = {}
+        schema = {'version': CACHE_FORMAT_VERSION, 'columns': []}
+        
+        for i, column in enumerate(df.columns):
+            series = df[column]
+            key = f"c{i}"
+            if series.dtype.kind in 'biufcM':
+                arrays[key] = series.to_numpy()
+            else:
+                # Text columns are stored as fixed-width unicode plus a missing-value mask
+                mask = series.isna().to_numpy()
+                arrays[key] = series.fillna('').astype(str).to_numpy().astype('U')
+                arrays[f"{key}_mask"] = mask
+            schema['columns'].append({'name': column, 'key': key, 'dtype': str(series.dtype)})
+        
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, __schema__=np.array(json.dumps(schema)), **arrays)
+        os.replace(tmp_path, path)
+    
+    @staticmethod
+    def load_frame(path):
+        """Rebuild a DataFrame written by save_frame"""
+        import pandas as pd
+        with np.load(path, allow_pickle=False) as archive:
+            schema = json.loads(str(archive['__schema__']))
+            if schema.get('version') != CACHE_FORMAT_VERSION:
+                raise ValueError(f"unsupported cache format {schema.get('version')}")
+            
+            data = {}
+            for column in schema['columns']:
+                values = archive[column['key']]
+                mask_key = f"{column['key']}_mask"
+                if mask_key in archive:
+                    values = values.astype(object)
+                    values[archive[mask_key]] = np.nan
+                data[column['name']] = pd.Series(values, dtype=column['dtype'])
+        
+        return pd.DataFrame(data)
@@ -0,0 +1,212 @@
+"""
+MindNest dataset downloader
+Fetches remote datasets concurrently into a local mirror directory using conditional,
+resumable GET requests with timeouts and retries. check_dataset_downloader.py runs it
+against a local HTTP stand-in server.
+"""
+
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+def _range_start(response):
+    """First byte offset of a 206 response's Content-Range ("bytes 100-199/200"), or None"""
+    try:
+        unit, spec = response.headers['Content-Range'].split(None, 1)
+        return int(spec.split('-', 1)[0]) if unit == 'bytes' else None
+    except (KeyError, ValueError):
+        return None
+
+
+@dataclass
+class DownloadResult:
+    """Outcome of mirroring one remote source"""
+    name: str
+    url: str
+    path: str
+    status: str  # 'downloaded', 'resumed', 'not_modified' or 'failed'
+    bytes_transferred: int = 0
+    seconds: float = 0.0
+    attempts: int = 0
+    error: str = None
+
+    @property
+    def ok(self):
+        return self.status != 'failed'
+
+    def to_dict(self):
+        return asdict(self)
+
+
+class DatasetDownloader:
+    """Mirror remote dataset files, re-downloading only what changed"""
+
+    def __init__(self, mirror_dir, timeout=(5, 60), max_retries=3, backoff=0.5,
+                 max_workers=4, chunk_size=1 << 16, session_factory=requests.Session):
+        self.mirror_dir = mirror_dir
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.session_factory = session_factory
+
+    def mirror_path(self, name):
+        return os.path.join(self.mirror_dir, f"{name}.csv")
+
+    def _meta_path(self, name):
+        return os.path.join(self.mirror_dir, f"{name}.meta.json")
+
+    def _part_path(self, name):
+        return os.path.join(self.mirror_dir, f"{name}.csv.part")
+
+    def _read_meta(self, name):
+        try:
+            with open(self._meta_path(name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self, name, meta):
+        tmp_path = f"{self._meta_path(name)}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._meta_path(name))
+
+    def fetch_all(self, urls):
+        """Fetch every {name: url} concurrently and return {name: DownloadResult}"""
+        os.makedirs(self.mirror_dir, exist_ok=True)
+        if not urls:
+            return {}
+
+        workers = max(1, min(self.max_workers, len(urls)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='dataset-download') as pool:
+            futures = {name: pool.submit(self.fetch, name, url) for name, url in urls.items()}
+            results = {name: future.result() for name, future in futures.items()}
+
+        for result in results.values():
+            if result.ok:
+                logger.info(
+                    f"{result.name}: {result.status}, {result.bytes_transferred} bytes "
+                    f"in {result.seconds:.2f}s ({result.attempts} attempt(s))"
+                )
+            else:
+                logger.error(f"{result.name}: download failed after {result.attempts} attempt(s): {result.error}")
+        return results
+
+    def fetch(self, name, url):
+        """Mirror a single URL, retrying transient failures with exponential backoff"""
+        result = DownloadResult(name=name, url=url, path=self.mirror_path(name), status='failed')
+        start = time.perf_counter()
+
+        with self.session_factory() as session:
+            for attempt in range(1, self.max_retries + 1):
+                result.attempts = attempt
+                try:
+                    self._fetch_once(session, name, url, result)
+                    result.error = None
+                    break
+                except requests.RequestException as e:
+                    result.status = 'failed'
+                    result.error = str(e)
+                    response = getattr(e, 'response', None)
+                    if response is not None and response.status_code < 500 and response.status_code != 429:
+                        break  # Client errors will not succeed on retry
+                    if attempt < self.max_retries:
+                        time.sleep(self.backoff * (2 ** (attempt - 1)))
+
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def _discard_partial(self, name, meta):
+        """Delete the .part file and forget its validators, so the next request fetches from byte 0"""
+        try:
+            os.remove(self._part_path(name))
+        except FileNotFoundError:
+            pass
+        meta.pop('partial_etag', None)
+        meta.pop('partial_last_modified', None)
+        self._write_meta(name, meta)
+
+    def _fetch_once(self, session, name, url, result):
+        meta = self._read_meta(name)
+        if meta.get('url') != url:
+            meta = {}
+        mirror_path = self.mirror_path(name)
+        part_path = self._part_path(name)
+
+        headers = {}
+        has_mirror = os.path.exists(mirror_path) and meta.get('complete')
+        if has_mirror:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        # Resume a partial download only if we can tell the remote file is unchanged
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        validator = meta.get('partial_etag') or meta.get('partial_last_modified')
+        if offset and validator:
+            headers['Range'] = f"bytes={offset}-"
+            headers['If-Range'] = validator
+        else:
+            offset = 0
+
+        with session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            # The .part cannot be continued: already complete (416) or the server resumed elsewhere
+            if offset and (response.status_code == 416 or (
+                    response.status_code == 206 and _range_start(response) != offset)):
+                logger.warning(f"{name}: discarding partial download of {offset} bytes and starting over")
+                self._discard_partial(name, meta)
+                return self._fetch_once(session, name, url, result)
+            if response.status_code == 304:
+                if has_mirror:
+                    result.status = 'not_modified'
+                    return
+                # raise_for_status lets 3xx through, which would save the empty body as the mirror
+                raise requests.HTTPError(f"304 Not Modified for {url} without a local mirror", response=response)
+            response.raise_for_status()
+
+            resumed = response.status_code == 206
+            meta['partial_etag'] = response.headers.get('ETag')
+            meta['partial_last_modified'] = response.headers.get('Last-Modified')
+            meta['url'] = url
+            self._write_meta(name, meta)
+
+            received = 0
+            with open(part_path, 'ab' if resumed else 'wb') as f:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    f.write(chunk)
+                    received += len(chunk)
+                    result.bytes_transferred += len(chunk)
+
+            expected = response.headers.get('Content-Length')
+            if expected is not None and received < int(expected):
+                raise requests.ConnectionError(f"incomplete body: got {received} of {expected} bytes")
+
+        os.replace(part_path, mirror_path)
+        self._write_meta(name, {
+            'url': url,
+            'etag': meta['partial_etag'],
+            'last_modified': meta['partial_last_modified'],
+            'complete': True,
+            'size': os.path.getsize(mirror_path),
+            'fetched_at': time.time()
+        })
+        result.status = 'resumed' if resumed else 'downloaded'
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    from ml_service_real_data import RealDataMentalHealthPredictor, DATASET_MIRROR_DIR
+
+    downloader = DatasetDownloader(DATASET_MIRROR_DIR)
+    report = downloader.fetch_all(RealDataMentalHealthPredictor().dataset_urls)
+    print(json.dumps({name: result.to_dict() for name, result in report.items()}, indent=2))
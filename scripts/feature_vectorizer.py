@@ -0,0 +1,150 @@
+"""
+MindNest feature vectorizer
+Turns assessment dicts into model feature rows using lookup tables compiled once from
+the fitted label encoders, instead of calling LabelEncoder.transform per request
+"""
+
+import threading
+import numpy as np
+
+UNSEEN_POLICIES = ('zero', 'default', 'error')
+
+
+class FeatureVectorizer:
+    """Compiled assessment encoder for a fixed feature order"""
+
+    def __init__(self, feature_names, categories, defaults, unseen='zero'):
+        """
+        feature_names: model feature order
+        categories: {feature: [class, ...]} in label-encoder code order
+        defaults: {feature: value} used for unanswered fields
+        unseen: what to do with unknown categories - 'zero' encodes them as code 0 (the
+                historical behaviour), 'default' uses the field's default, 'error' raises
+        """
+        if unseen not in UNSEEN_POLICIES:
+            raise ValueError(f"unseen must be one of {UNSEEN_POLICIES}, got {unseen!r}")
+
+        self.feature_names = list(feature_names)
+        self.unseen = unseen
+        self.lookups = {
+            feature: {str(category): code for code, category in enumerate(classes)}
+            for feature, classes in categories.items()
+        }
+        # (column, feature, lookup or None) for every feature, in model order
+        self._columns = [(j, feature, self.lookups.get(feature)) for j, feature in enumerate(self.feature_names)]
+
+        self.default_row = np.empty(len(self.feature_names), dtype=np.float64)
+        self._unseen_codes = {}
+        for j, feature, lookup in self._columns:
+            default = defaults[feature]
+            if lookup is None:
+                self.default_row[j] = float(default)
+            else:
+                default_code = lookup.get(str(default), 0)
+                self.default_row[j] = default_code
+                self._unseen_codes[feature] = default_code if unseen == 'default' else 0
+        self._local = threading.local()
+
+    @classmethod
+    def from_label_encoders(cls, feature_names, label_encoders, defaults, unseen='zero'):
+        """Compile a vectorizer from fitted sklearn LabelEncoders"""
+        categories = {feature: list(encoder.classes_) for feature, encoder in label_encoders.items()}
+        return cls(feature_names, categories, defaults, unseen)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_local']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    def _encode_category(self, feature, lookup, value):
+        code = lookup.get(str(value))
+        if code is None:
+            if self.unseen == 'error':
+                raise ValueError(f"Unknown category for {feature}: {value!r}")
+            return self._unseen_codes[feature]
+        return code
+
+    def transform_one(self, assessment):
+        """Encode one assessment into a reusable (1, n_features) buffer.
+
+        The buffer belongs to the calling thread and is overwritten by its next call,
+        so copy it if the row must outlive the current prediction.
+        """
+        row = getattr(self._local, 'row', None)
+        if row is None:
+            row = self._local.row = np.empty((1, len(self.feature_names)), dtype=np.float64)
+        out = row[0]
+        out[:] = self.default_row
+
+        for j, feature, lookup in self._columns:
+            if feature not in assessment:
+                continue
+            value = assessment[feature]
+            if lookup is not None:
+                out[j] = self._encode_category(feature, lookup, value)
+            else:
+                try:
+                    number = float(value)
+                except (TypeError, ValueError):
+                    number = np.nan
+                if number != number:
+                    raise ValueError(f"Invalid value for {feature}: {value!r}")
+                out[j] = number
+        return row
+
+    def transform_many(self, assessments):
+        """Encode assessments into a new (N, n_features) matrix.
+
+        Returns the matrix and a {row: message} dict for rows that could not be encoded;
+        those rows are left as defaults.
+        """
+        n_rows = len(assessments)
+        matrix = np.empty((n_rows, len(self.feature_names)), dtype=np.float64)
+        matrix[:] = self.default_row
+        errors = {i: 'Assessment must be an object' for i, a in enumerate(assessments) if not isinstance(a, dict)}
+        rows = [a if isinstance(a, dict) else {} for a in assessments]
+        missing = object()
+
+        for j, feature, lookup in self._columns:
+            present = [(i, row[feature]) for i, row in enumerate(rows) if feature in row]
+            if not present:
+                continue
+            index = np.fromiter((i for i, _ in present), dtype=np.intp, count=len(present))
+
+            if lookup is not None:
+                codes = np.empty(len(present), dtype=np.float64)
+                for k, (i, value) in enumerate(present):
+                    code = lookup.get(str(value), missing)
+                    if code is missing:
+                        if self.unseen == 'error':
+                            errors.setdefault(i, f"Unknown category for {feature}: {value!r}")
+                            code = 0
+                        else:
+                            code = self._unseen_codes[feature]
+                    codes[k] = code
+                matrix[index, j] = codes
+                continue
+
+            values = [value for _, value in present]
+            try:
+                column = np.array(values, dtype=np.float64)
+            except (TypeError, ValueError):
+                column = np.array([_to_float(value) for value in values])
+            for k in np.flatnonzero(np.isnan(column)):
+                errors.setdefault(present[k][0], f"Invalid value for {feature}: {values[k]!r}")
+            matrix[index, j] = column
+
+        for i in errors:
+            matrix[i] = self.default_row
+        return matrix, errors
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
@@ -0,0 +1,77 @@
+"""
+MindNest labeled assessment store
+Append-only JSON-lines file of clinician-confirmed assessments. Every server process reads
+the same file, so rows appended by one worker reach all of them in the same order.
+"""
+
+import json
+import logging
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are single writes, just not cross-process locked
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class LabeledAssessmentStore:
+    """Rows are dicts with at least 'features' (list of numbers) and 'risk_level' (int)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        # (row, byte offset) where the last read stopped, so catching up does not rescan
+        self._cursor = (0, 0)
+
+    def size(self):
+        """Bytes in the store; a cheap way to notice appends from other processes"""
+        try:
+            return os.stat(self.path).st_size
+        except FileNotFoundError:
+            return 0
+
+    def append(self, rows):
+        """Append rows durably and return the total row count"""
+        data = ''.join(json.dumps(row, separators=(',', ':')) + '\n' for row in rows).encode()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._lock, open(self.path, 'ab') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+        return self.count()
+
+    def read(self, start=0, stop=None):
+        """Rows start..stop (all remaining by default); a partly written last line is skipped"""
+        with self._lock:
+            row, offset = self._cursor if self._cursor[0] <= start else (0, 0)
+            rows = []
+            try:
+                with open(self.path, 'rb') as f:
+                    f.seek(offset)
+                    for line in f:
+                        if not line.endswith(b'\n'):
+                            break
+                        if row >= start and (stop is None or row < stop):
+                            rows.append(json.loads(line))
+                        row += 1
+                        offset += len(line)
+                        if stop is not None and row >= stop:
+                            break
+            except FileNotFoundError:
+                return []
+            self._cursor = (row, offset)
+        return rows
+
+    def count(self):
+        """Number of complete rows"""
+        self.read(start=1 << 62)
+        return self._cursor[0]
@@ -10,19 +10,63 @@ import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.neighbors import KNeighborsClassifier
+from sklearn.naive_bayes import GaussianNB
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import accuracy_score, classification_report
 import joblib
 import os
+import copy
 import logging
+import threading
+import time
+from dataclasses import dataclass, field, replace
 from datetime import datetime
+from model_bundle import save_model_bundle, load_model_bundle
+from training_jobs import TrainingJobManager
+from labeled_store import LabeledAssessmentStore
+from request_profiler import RequestProfiler, install_profiler
+from numpy_inference import export_decision_tree
+from tree_explanations import LeafExplanations
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MODEL_DIR = os.environ.get(
+    'MINDNEST_QUESTIONNAIRE_MODEL_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'questionnaire')
+)
+# Background training: worker process start method, and the Retry-After sent while not ready
+TRAINING_START_METHOD = os.environ.get('MINDNEST_TRAINING_START_METHOD', 'spawn')
+TRAINING_RETRY_AFTER = int(os.environ.get('MINDNEST_TRAINING_RETRY_AFTER', '30'))
+# Rows per block when generating synthetic questionnaire data
+SYNTHETIC_CHUNK_SIZE = int(os.environ.get('MINDNEST_SYNTHETIC_CHUNK_SIZE', '100000'))
+# Overall score boundaries between the Low/Mild/Moderate/High risk levels
+RISK_THRESHOLDS = (0.25, 0.5, 0.75)
+RISK_LEVELS = ('Low', 'Mild', 'Moderate', 'High')
+# Clinician-confirmed assessments submitted to /training-data, shared by all server processes
+LABELED_DATA_PATH = os.environ.get('MINDNEST_LABELED_DATA_PATH', os.path.join(MODEL_DIR, 'labeled_assessments.jsonl'))
+# How often each process checks the store for rows appended by other processes
+LABELED_SYNC_INTERVAL = float(os.environ.get('MINDNEST_LABELED_SYNC_INTERVAL', '1.0'))
+# Labeled rows are learned incrementally (KNN and naive Bayes); the decision tree is only
+# rebuilt by a full training job after REBUILD_EVERY new rows, or when its accuracy on the
+# last DRIFT_WINDOW rows falls DRIFT_THRESHOLD below its held-out accuracy
+REBUILD_EVERY = int(os.environ.get('MINDNEST_REBUILD_EVERY', '1000'))
+DRIFT_WINDOW = int(os.environ.get('MINDNEST_DRIFT_WINDOW', '200'))
+DRIFT_MIN_ROWS = int(os.environ.get('MINDNEST_DRIFT_MIN_ROWS', '50'))
+DRIFT_THRESHOLD = float(os.environ.get('MINDNEST_DRIFT_THRESHOLD', '0.1'))
+# Opt-in request profiling, configured as in ml_service_real_data.py
+PROFILE_DIR = os.environ.get(
+    'MINDNEST_QUESTIONNAIRE_PROFILE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.profiles', 'questionnaire')
+)
+PROFILE_ENABLED = os.environ.get('MINDNEST_PROFILE_ENABLED', '0') == '1'
+PROFILE_SAMPLE_EVERY = int(os.environ.get('MINDNEST_PROFILE_SAMPLE_EVERY', '100'))
+PROFILE_TOKEN = os.environ.get('MINDNEST_PROFILE_TOKEN') or None
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
+profiler = install_profiler(app, RequestProfiler(PROFILE_DIR, PROFILE_SAMPLE_EVERY, PROFILE_ENABLED, PROFILE_TOKEN))
 
 # Global variables for models and scaler
 decision_tree_model = None
@@ -30,89 +74,127 @@ knn_model = None
 scaler = None
 feature_names = []
 
+@dataclass(frozen=True)
+class ModelSet:
+    """A trained set of models; the predictor publishes a new one with a single reference swap"""
+    models: dict = field(default_factory=dict)
+    scaler: object = field(default_factory=StandardScaler)
+    version: str = None
+    metadata: dict = field(default_factory=dict)
+    # Per-leaf decision tree explanations and importances, computed once per trained tree
+    explanations: object = None
+    # Rows of the labeled store learned so far, including incremental updates
+    labeled_rows: int = 0
+    # Rows of the labeled store the last full training saw; incremental updates leave it as is
+    trained_rows: int = 0
+
+
 class MentalHealthPredictor:
     def __init__(self):
-        self.models = {}
-        self.scaler = StandardScaler()
+        self.model_set = ModelSet()
         self.feature_names = [
             'anxiety_1', 'anxiety_2', 'anxiety_3', 'anxiety_4',
             'depression_1', 'depression_2', 'depression_3', 'depression_4',
             'stress_1', 'stress_2', 'stress_3',
             'general_1', 'general_2', 'general_3'
         ]
-        
-    def generate_synthetic_data(self, n_samples=1000):
+        self.model_dir = MODEL_DIR
+        self.labeled_store = LabeledAssessmentStore(LABELED_DATA_PATH)
+        self._learn_lock = threading.Lock()
+        self._labeled_checked = 0.0
+        self._labeled_size = None
+    
+    @property
+    def models(self):
+        return self.model_set.models
+    
+    @property
+    def scaler(self):
+        return self.model_set.scaler
+    
+    @property
+    def model_version(self):
+        return self.model_set.version
+    
+    @property
+    def ready(self):
+        """True once a trained model set is published"""
+        return bool(self.model_set.models)
+    
+    def generate_synthetic_data(self, n_samples=1000, seed=42, chunk_size=SYNTHETIC_CHUNK_SIZE):
         """Generate synthetic mental health assessment data for training"""
-        np.random.seed(42)
-        
-        data = []
-        labels = []
-        
-        for _ in range(n_samples):
-            # Generate correlated responses
-            base_anxiety = np.random.normal(1.5, 1.0)
-            base_depression = np.random.normal(1.2, 0.8)
-            base_stress = np.random.normal(2.0, 1.2)
-            base_general = np.random.normal(2.5, 0.8)
-            
-            # Add some correlation between categories
-            anxiety_responses = np.clip(
-                np.random.normal(base_anxiety, 0.5, 4), 0, 3
-            ).astype(int)
-            
-            depression_responses = np.clip(
-                np.random.normal(base_depression + base_anxiety * 0.3, 0.5, 4), 0, 3
-            ).astype(int)
-            
-            stress_responses = np.clip(
-                np.random.normal(base_stress, 0.6, 3), 0, 4
-            ).astype(int)
-            
-            general_responses = np.clip(
-                4 - np.random.normal(base_general - base_depression * 0.2, 0.5, 3), 0, 4
-            ).astype(int)
-            
-            # Combine all responses
-            sample = np.concatenate([
-                anxiety_responses, depression_responses, 
-                stress_responses, general_responses
-            ])
-            
-            # Calculate risk level based on responses
-            anxiety_score = np.mean(anxiety_responses) / 3.0
-            depression_score = np.mean(depression_responses) / 3.0
-            stress_score = np.mean(stress_responses) / 4.0
-            general_score = 1 - (np.mean(general_responses) / 4.0)
-            
-            overall_score = (anxiety_score + depression_score + stress_score + general_score) / 4
-            
-            if overall_score < 0.25:
-                risk_level = 0  # Low
-            elif overall_score < 0.5:
-                risk_level = 1  # Mild
-            elif overall_score < 0.75:
-                risk_level = 2  # Moderate
-            else:
-                risk_level = 3  # High
-            
-            data.append(sample)
-            labels.append(risk_level)
+        blocks = list(self.iter_synthetic_data(n_samples, seed, chunk_size))
+        if not blocks:
+            return np.empty((0, len(self.feature_names)), dtype=int), np.empty(0, dtype=int)
         
-        return np.array(data), np.array(labels)
+        return np.concatenate([X for X, _ in blocks]), np.concatenate([y for _, y in blocks])
+    
+    def iter_synthetic_data(self, n_samples, seed=42, chunk_size=SYNTHETIC_CHUNK_SIZE):
+        """Yield (responses, risk levels) blocks of at most chunk_size rows.
+        
+        Memory stays bounded by one block however many rows are requested. The rows depend on
+        seed and chunk_size, so keep both fixed when a run has to be reproducible.
+        """
+        rng = np.random.default_rng(seed)
+        for start in range(0, n_samples, chunk_size):
+            yield self._synthetic_block(rng, min(chunk_size, n_samples - start))
+    
+    @staticmethod
+    def _synthetic_block(rng, n):
+        # Per-respondent tendencies, correlated across the question categories
+        base_anxiety = rng.normal(1.5, 1.0, (n, 1))
+        base_depression = rng.normal(1.2, 0.8, (n, 1))
+        base_stress = rng.normal(2.0, 1.2, (n, 1))
+        base_general = rng.normal(2.5, 0.8, (n, 1))
+        
+        anxiety_responses = np.clip(rng.normal(base_anxiety, 0.5, (n, 4)), 0, 3).astype(int)
+        depression_responses = np.clip(
+            rng.normal(base_depression + base_anxiety * 0.3, 0.5, (n, 4)), 0, 3
+        ).astype(int)
+        stress_responses = np.clip(rng.normal(base_stress, 0.6, (n, 3)), 0, 4).astype(int)
+        general_responses = np.clip(
+            4 - rng.normal(base_general - base_depression * 0.2, 0.5, (n, 3)), 0, 4
+        ).astype(int)
+        
+        X = np.concatenate([
+            anxiety_responses, depression_responses,
+            stress_responses, general_responses
+        ], axis=1)
+        
+        # Calculate risk level based on responses
+        overall_score = (
+            anxiety_responses.mean(axis=1) / 3.0
+            + depression_responses.mean(axis=1) / 3.0
+            + stress_responses.mean(axis=1) / 4.0
+            + (1 - general_responses.mean(axis=1) / 4.0)
+        ) / 4
+        # Low below 0.25, Mild below 0.5, Moderate below 0.75, otherwise High
+        y = np.digitize(overall_score, RISK_THRESHOLDS)
+        
+        return X, y
     
     def train_models(self):
-        """Train Decision Tree and KNN models"""
+        """Train Decision Tree and KNN models, publishing them only once complete"""
         logger.info("Generating synthetic training data...")
         X, y = self.generate_synthetic_data(1000)
         
+        # Clinician-confirmed assessments submitted so far train alongside the synthetic rows
+        labeled = self.labeled_store.read()
+        if labeled:
+            logger.info(f"Adding {len(labeled)} labeled assessments")
+            X_labeled, y_labeled = self.labeled_arrays(labeled)
+            X = np.vstack([X, X_labeled])
+            y = np.concatenate([y, y_labeled])
+        
         # Split the data
         X_train, X_test, y_train, y_test = train_test_split(
             X, y, test_size=0.2, random_state=42, stratify=y
         )
         
         # Scale the features
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
+        scaler = StandardScaler()
+        X_train_scaled = scaler.fit_transform(X_train)
+        X_test_scaled = scaler.transform(X_test)
         
         # Train Decision Tree
         logger.info("Training Decision Tree model...")
@@ -132,54 +214,238 @@ class MentalHealthPredictor:
         )
         knn_model.fit(X_train_scaled, y_train)
         
+        # Train Naive Bayes, the member that learns new labeled rows without a rebuild
+        logger.info("Training Naive Bayes model...")
+        nb_model = GaussianNB()
+        nb_model.partial_fit(X_train_scaled, y_train, classes=np.arange(len(RISK_LEVELS)))
+        
         # Evaluate models
         dt_pred = dt_model.predict(X_test)
         knn_pred = knn_model.predict(X_test_scaled)
+        nb_pred = nb_model.predict(X_test_scaled)
         
         dt_accuracy = accuracy_score(y_test, dt_pred)
         knn_accuracy = accuracy_score(y_test, knn_pred)
+        nb_accuracy = accuracy_score(y_test, nb_pred)
         
         logger.info(f"Decision Tree Accuracy: {dt_accuracy:.3f}")
         logger.info(f"KNN Accuracy: {knn_accuracy:.3f}")
+        logger.info(f"Naive Bayes Accuracy: {nb_accuracy:.3f}")
+        
+        # Build the new model set off to the side
+        model_set = ModelSet(
+            models={'decision_tree': dt_model, 'knn': knn_model, 'naive_bayes': nb_model},
+            scaler=scaler,
+            explanations=self.compile_explanations(dt_model),
+            labeled_rows=len(labeled),
+            trained_rows=len(labeled)
+        )
+        
+        results = {
+            'decision_tree_accuracy': dt_accuracy,
+            'knn_accuracy': knn_accuracy,
+            'naive_bayes_accuracy': nb_accuracy,
+            'labeled_rows': len(labeled)
+        }
         
-        # Store models
-        self.models['decision_tree'] = dt_model
-        self.models['knn'] = knn_model
+        try:
+            model_set = self.save_models(model_set, results)
+            results['model_version'] = model_set.version
+        except Exception as e:
+            logger.warning(f"Could not save model bundle: {str(e)}")
         
+        # Under the learn lock, so an incremental update of the old set cannot replace it afterwards
+        with self._learn_lock:
+            self.publish(model_set)
+        return results
+    
+    def compile_explanations(self, dt_model):
+        """Precompute the decision path and contributions of every leaf of the decision tree"""
+        return LeafExplanations(
+            export_decision_tree(dt_model), self.feature_names, feature_importances=dt_model.feature_importances_
+        )
+    
+    def publish(self, model_set):
+        """Make model_set live with one reference swap; in-flight requests finish on the old set.
+        
+        Callers hold _learn_lock, which sync_labeled_data holds from reading the live set to
+        publishing what it learned, so a newer set is never overwritten by an update of an older one.
+        """
+        self.model_set = model_set
+    
+    def save_models(self, model_set, metrics=None):
+        """Persist a model set as a new bundle version and return it with its version filled in"""
+        payload = {
+            'models': model_set.models,
+            'scaler': model_set.scaler,
+            'feature_names': self.feature_names
+        }
+        metadata = {
+            'service': 'questionnaire',
+            'metrics': metrics or {},
+            'feature_names': self.feature_names,
+            'labeled_rows': model_set.labeled_rows
+        }
+        version = save_model_bundle(self.model_dir, payload, metadata)
+        return replace(model_set, version=version, metadata={**metadata, 'version': version})
+    
+    def load_models(self, version=None):
+        """Load a saved model bundle, memory-mapping its arrays; returns False if none is usable"""
+        try:
+            payload, metadata = load_model_bundle(self.model_dir, version)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"Could not load model bundle: {str(e)}")
+            return False
+        
+        if payload['feature_names'] != self.feature_names:
+            logger.warning(f"Ignoring model bundle {metadata['version']}: feature schema does not match")
+            return False
+        
+        model_set = ModelSet(
+            models=payload['models'],
+            scaler=payload['scaler'],
+            version=metadata['version'],
+            metadata=metadata,
+            explanations=self.compile_explanations(payload['models']['decision_tree']),
+            labeled_rows=metadata.get('labeled_rows', 0),
+            trained_rows=metadata.get('labeled_rows', 0)
+        )
+        with self._learn_lock:
+            self.publish(model_set)
+        logger.info(f"Loaded model bundle {self.model_version}")
+        # Replay labeled rows submitted after the bundle was trained
+        self.sync_labeled_data(force=True)
+        return True
+    
+    def labeled_arrays(self, rows):
+        """Feature matrix and risk levels of labeled store rows"""
+        X = np.array([row['features'] for row in rows], dtype=float).reshape(-1, len(self.feature_names))
+        y = np.array([row['risk_level'] for row in rows], dtype=int)
+        return X, y
+    
+    def learn(self, model_set, X, y):
+        """Return model_set updated with new labeled rows; the decision tree is left as is.
+        
+        KNN gets the rows appended to its index and naive Bayes a partial_fit on a copy, so
+        the live set is never modified in place.
+        """
+        models = dict(model_set.models)
+        scaled = model_set.scaler.transform(X)
+        
+        knn = models['knn']
+        updated_knn = KNeighborsClassifier(**knn.get_params())
+        updated_knn.fit(np.vstack([knn._fit_X, scaled]), np.concatenate([knn.classes_[knn._y], y]))
+        models['knn'] = updated_knn
+        
+        if 'naive_bayes' in models:
+            updated_nb = copy.deepcopy(models['naive_bayes'])
+            updated_nb.partial_fit(scaled, y)
+            models['naive_bayes'] = updated_nb
+        
+        return replace(model_set, models=models, labeled_rows=model_set.labeled_rows + len(y))
+    
+    def sync_labeled_data(self, force=False):
+        """Learn rows other processes appended to the labeled store; returns how many were new.
+        
+        Without force this checks the store at most every LABELED_SYNC_INTERVAL seconds, so
+        it is cheap enough to call on every request.
+        """
+        now = time.monotonic()
+        if not force and now - self._labeled_checked < LABELED_SYNC_INTERVAL:
+            return 0
+        self._labeled_checked = now
+        size = self.labeled_store.size()
+        if not force and size == self._labeled_size:
+            return 0
+        
+        with self._learn_lock:
+            model_set = self.model_set
+            if not model_set.models:
+                return 0
+            rows = self.labeled_store.read(model_set.labeled_rows)
+            self._labeled_size = size
+            if not rows:
+                return 0
+            X, y = self.labeled_arrays(rows)
+            self.publish(self.learn(model_set, X, y))
+        logger.info(f"Learned {len(rows)} labeled assessments incrementally")
+        return len(rows)
+    
+    def ingest(self, X, y, confirmed_by=None):
+        """Store clinician-confirmed assessments and learn them; returns the ingestion summary"""
+        model_set = self.model_set
+        submitted_at = datetime.now().isoformat()
+        rows = [{
+            'features': features,
+            'risk_level': int(label),
+            'submitted_at': submitted_at,
+            'confirmed_by': confirmed_by
+        } for features, label in zip(X.tolist(), y)]
+        
+        # Record what the live decision tree predicted before learning, for drift checks
+        if model_set.models:
+            tree_predictions, _, _ = self.score(X, 'decision_tree', model_set)
+            for row, predicted in zip(rows, tree_predictions.tolist()):
+                row['decision_tree_prediction'] = int(predicted)
+        
+        total_rows = self.labeled_store.append(rows)
+        learned = self.sync_labeled_data(force=True)
         return {
-            'decision_tree_accuracy': dt_accuracy,
-            'knn_accuracy': knn_accuracy
+            'stored': len(rows),
+            'labeled_rows': total_rows,
+            'learned': learned,
+            'model_version': self.model_version,
+            'rebuild_reason': self.rebuild_reason()
         }
     
+    def drift_status(self, model_set=None):
+        """Labeled rows since the last full training and the decision tree's accuracy on them"""
+        model_set = model_set or self.model_set
+        trained_rows = model_set.trained_rows
+        new_rows = model_set.labeled_rows - trained_rows
+        status = {
+            'rows_since_training': new_rows,
+            'rebuild_every': REBUILD_EVERY,
+            'baseline_accuracy': model_set.metadata.get('metrics', {}).get('decision_tree_accuracy'),
+            'recent_accuracy': None,
+            'recent_rows': 0
+        }
+        if new_rows <= 0:
+            return status
+        
+        recent = [
+            row for row in self.labeled_store.read(max(trained_rows, model_set.labeled_rows - DRIFT_WINDOW),
+                                                   model_set.labeled_rows)
+            if 'decision_tree_prediction' in row
+        ]
+        if recent:
+            correct = sum(row['decision_tree_prediction'] == row['risk_level'] for row in recent)
+            status['recent_accuracy'] = correct / len(recent)
+            status['recent_rows'] = len(recent)
+        return status
+    
+    def rebuild_reason(self, model_set=None):
+        """'periodic' or 'drift' when the decision tree should be retrained in full, else None"""
+        status = self.drift_status(model_set)
+        if status['rows_since_training'] >= REBUILD_EVERY:
+            return 'periodic'
+        if (status['baseline_accuracy'] is not None and status['recent_rows'] >= DRIFT_MIN_ROWS
+                and status['baseline_accuracy'] - status['recent_accuracy'] > DRIFT_THRESHOLD):
+            return 'drift'
+        return None
+    
     def predict(self, assessment_data, model_type='ensemble'):
         """Make prediction using specified model"""
         try:
             # Convert assessment data to feature vector
-            feature_vector = []
-            for feature in self.feature_names:
-                if feature in assessment_data:
-                    feature_vector.append(assessment_data[feature])
-                else:
-                    feature_vector.append(0)  # Default value for missing features
+            feature_vector = np.array(self.feature_vector(assessment_data)).reshape(1, -1)
             
-            feature_vector = np.array(feature_vector).reshape(1, -1)
-            
-            if model_type == 'decision_tree':
-                prediction = self.models['decision_tree'].predict(feature_vector)[0]
-                probabilities = self.models['decision_tree'].predict_proba(feature_vector)[0]
-            elif model_type == 'knn':
-                feature_vector_scaled = self.scaler.transform(feature_vector)
-                prediction = self.models['knn'].predict(feature_vector_scaled)[0]
-                probabilities = self.models['knn'].predict_proba(feature_vector_scaled)[0]
-            else:  # ensemble
-                # Use both models and average their probabilities
-                dt_proba = self.models['decision_tree'].predict_proba(feature_vector)[0]
-                
-                feature_vector_scaled = self.scaler.transform(feature_vector)
-                knn_proba = self.models['knn'].predict_proba(feature_vector_scaled)[0]
-                
-                probabilities = (dt_proba + knn_proba) / 2
-                prediction = np.argmax(probabilities)
+            # Read the live model set once so a concurrent swap cannot mix two sets
+            model_set = self.model_set
+            prediction, probabilities, leaves = self.score(feature_vector, model_type, model_set)
+            prediction, probabilities = prediction[0], probabilities[0]
             
             confidence = float(np.max(probabilities) * 100)
             
@@ -204,13 +470,46 @@ class MentalHealthPredictor:
                 'recommendations': recommendations,
                 'riskFactors': risk_factors,
                 'model_used': model_type,
-                'feature_importance': self._get_feature_importance(assessment_data)
+                'feature_importance': model_set.explanations.feature_importance,
+                # Why the decision tree leaned towards this risk level; None when it was not consulted
+                'explanation': model_set.explanations.explain(leaves[0], prediction) if leaves is not None else None
             }
             
         except Exception as e:
             logger.error(f"Prediction error: {str(e)}")
             raise
     
+    def feature_vector(self, assessment_data):
+        """Answers in feature order; missing answers count as 0"""
+        return [assessment_data.get(feature, 0) for feature in self.feature_names]
+    
+    def score(self, feature_matrix, model_type, model_set):
+        """(predictions, probabilities, decision tree leaves) for a feature matrix.
+        
+        Scores with one model or the ensemble; the leaves are None when the tree is not used.
+        """
+        models, scaler = model_set.models, model_set.scaler
+        
+        if model_type in ('knn', 'naive_bayes'):
+            probabilities = models[model_type].predict_proba(scaler.transform(feature_matrix))
+            return models[model_type].classes_[np.argmax(probabilities, axis=1)], probabilities, None
+        
+        # The leaf gives both the tree's probabilities and its explanation
+        leaves = models['decision_tree'].apply(feature_matrix)
+        dt_proba = model_set.explanations.leaf_proba(leaves)
+        if model_type == 'decision_tree':
+            return models['decision_tree'].classes_[np.argmax(dt_proba, axis=1)], dt_proba, leaves
+        
+        # Ensemble: average the probabilities of every member in the set
+        scaled = scaler.transform(feature_matrix)
+        probabilities = dt_proba + models['knn'].predict_proba(scaled)
+        members = 2
+        if 'naive_bayes' in models:
+            probabilities = probabilities + models['naive_bayes'].predict_proba(scaled)
+            members += 1
+        probabilities = probabilities / members
+        return np.argmax(probabilities, axis=1), probabilities, leaves
+    
     def _generate_recommendations(self, risk_level, assessment_data):
         """Generate personalized recommendations based on risk level and responses"""
         base_recommendations = {
@@ -294,21 +593,86 @@ class MentalHealthPredictor:
             risk_factors.append("Potential risk for self-harm or suicidal ideation")
         
         return risk_factors if risk_factors else ["No significant risk factors identified"]
-    
-    def _get_feature_importance(self, assessment_data):
-        """Get feature importance from decision tree model"""
-        if 'decision_tree' in self.models:
-            importance = self.models['decision_tree'].feature_importances_
-            feature_importance = {}
-            for i, feature in enumerate(self.feature_names):
-                if i < len(importance):
-                    feature_importance[feature] = float(importance[i])
-            return feature_importance
-        return {}
 
 # Initialize the predictor
 predictor = MentalHealthPredictor()
 
+
+def run_training_job():
+    """Train and save a model set inside a training worker process; returns the results"""
+    results = MentalHealthPredictor().train_models()
+    if not results.get('model_version'):
+        raise RuntimeError("Trained models could not be saved as a model bundle")
+    return results
+
+
+def publish_trained_version(version):
+    """Load a bundle saved by a training worker and swap it in as the live model set"""
+    if not predictor.load_models(version):
+        raise RuntimeError(f"Model bundle {version} could not be loaded")
+
+
+training_jobs = TrainingJobManager(
+    run_training_job, publish_trained_version, TRAINING_START_METHOD,
+    state_dir=os.path.join(MODEL_DIR, 'jobs')
+)
+
+
+def models_not_ready():
+    """Fast 503 while no model set is live, starting a training job if none is running"""
+    job = training_jobs.active_job()
+    if job is None and not predictor.load_models():
+        logger.info("Models not found, starting a background training job...")
+        job, _ = training_jobs.submit()
+    if predictor.ready:
+        return None
+    
+    response = jsonify({
+        'status': 'error',
+        'message': 'Models are not ready yet, training is in progress',
+        'training_job': job.to_dict()
+    })
+    response.headers['Retry-After'] = str(training_jobs.retry_after(TRAINING_RETRY_AFTER))
+    return response, 503
+
+
+def parse_labeled_assessments(items):
+    """Feature matrix and risk levels of [{'answers': {...}, 'risk_level': 'Moderate' or 2}, ...]"""
+    features, labels = [], []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get('answers'), dict):
+            raise ValueError(f"Assessment {i} has no answers")
+        
+        label = item.get('risk_level')
+        if label in RISK_LEVELS:
+            label = RISK_LEVELS.index(label)
+        if isinstance(label, bool) or not isinstance(label, int) or not 0 <= label < len(RISK_LEVELS):
+            raise ValueError(f"Assessment {i} needs a risk_level of 0-3 or one of {', '.join(RISK_LEVELS)}")
+        
+        vector = predictor.feature_vector(item['answers'])
+        if not all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in vector):
+            raise ValueError(f"Assessment {i} has non-numeric answers")
+        features.append(vector)
+        labels.append(label)
+    
+    return np.array(features, dtype=float).reshape(-1, len(predictor.feature_names)), np.array(labels, dtype=int)
+
+
+def start_training_job():
+    """Submit a training job and return the 202 response pointing at its status"""
+    job, started = training_jobs.submit()
+    if started:
+        logger.info(f"Started training job {job.job_id}")
+    
+    response = jsonify({
+        'status': 'accepted',
+        'message': 'Training started' if started else 'Training already in progress',
+        'job': job.to_dict(),
+        'timestamp': datetime.now().isoformat()
+    })
+    response.headers['Location'] = f'/train/jobs/{job.job_id}'
+    return response, 202
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -316,30 +680,52 @@ def health_check():
         'status': 'healthy',
         'service': 'MindNest ML Service',
         'version': '1.0.0',
-        'timestamp': datetime.now().isoformat()
+        'timestamp': datetime.now().isoformat(),
+        'ready': predictor.ready,
+        'model_version': predictor.model_version
+    })
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness check: 200 once a model set is live, 503 with Retry-After before that"""
+    if not predictor.ready:
+        not_ready = models_not_ready()
+        if not_ready is not None:
+            return not_ready
+    return jsonify({
+        'status': 'ready',
+        'model_version': predictor.model_version
     })
 
 @app.route('/train', methods=['POST'])
 def train_models():
-    """Train the ML models"""
+    """Start a background job that trains the ML models"""
     try:
-        logger.info("Starting model training...")
-        results = predictor.train_models()
-        
-        return jsonify({
-            'status': 'success',
-            'message': 'Models trained successfully',
-            'results': results,
-            'timestamp': datetime.now().isoformat()
-        })
+        return start_training_job()
     
     except Exception as e:
         logger.error(f"Training error: {str(e)}")
         return jsonify({
             'status': 'error',
-            'message': f'Training failed: {str(e)}'
+            'message': f'Could not start training: {str(e)}'
         }), 500
 
+@app.route('/train/jobs', methods=['GET'])
+def training_job_list():
+    """List recent training jobs, newest first"""
+    return jsonify({'jobs': training_jobs.jobs()})
+
+@app.route('/train/jobs/<job_id>', methods=['GET'])
+def training_job_status(job_id):
+    """Get the status of one training job"""
+    job = training_jobs.get(job_id)
+    if job is None:
+        return jsonify({
+            'status': 'error',
+            'message': f'Unknown training job {job_id}'
+        }), 404
+    return jsonify({'job': job.to_dict()})
+
 @app.route('/predict', methods=['POST'])
 def predict():
     """Make prediction based on assessment data"""
@@ -355,10 +741,14 @@ def predict():
         assessment_data = data['answers']
         model_type = data.get('model_type', 'ensemble')
         
-        # Check if models are trained
-        if not predictor.models:
-            logger.info("Models not found, training new models...")
-            predictor.train_models()
+        # Answer fast while models are still being trained
+        if not predictor.ready:
+            not_ready = models_not_ready()
+            if not_ready is not None:
+                return not_ready
+        
+        # Pick up labeled rows other workers have ingested
+        predictor.sync_labeled_data()
         
         # Make prediction
         result = predictor.predict(assessment_data, model_type)
@@ -379,46 +769,88 @@ def predict():
 @app.route('/models/info', methods=['GET'])
 def model_info():
     """Get information about available models"""
+    job = training_jobs.active_job()
+    model_set = predictor.model_set
     return jsonify({
-        'available_models': ['decision_tree', 'knn', 'ensemble'],
+        'available_models': [name for name in ('decision_tree', 'knn', 'naive_bayes') if name in model_set.models]
+                            + ['ensemble'],
         'default_model': 'ensemble',
         'features': predictor.feature_names,
-        'trained': bool(predictor.models),
-        'model_count': len(predictor.models)
+        'trained': bool(model_set.models),
+        'model_count': len(model_set.models),
+        'model_version': model_set.version,
+        'labeled_rows': model_set.labeled_rows,
+        'incremental_learning': predictor.drift_status(model_set),
+        'training_job': job.to_dict() if job else None
     })
 
-@app.route('/models/retrain', methods=['POST'])
-def retrain_models():
-    """Retrain models with new data"""
+@app.route('/training-data', methods=['POST'])
+def ingest_training_data():
+    """Store clinician-confirmed labeled assessments and learn them incrementally"""
     try:
-        # In a real application, you might accept new training data here
-        logger.info("Retraining models...")
-        results = predictor.train_models()
+        data = request.get_json(silent=True)
+        
+        if not isinstance(data, dict) or not isinstance(data.get('assessments'), list) or not data['assessments']:
+            return jsonify({
+                'status': 'error',
+                'message': 'Missing labeled assessments'
+            }), 400
+        
+        try:
+            X, y = parse_labeled_assessments(data['assessments'])
+        except ValueError as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 400
+        
+        summary = predictor.ingest(X, y, data.get('confirmed_by'))
+        
+        # The decision tree only changes with a full rebuild, run in the background
+        rebuild_job = None
+        if summary['rebuild_reason']:
+            job, started = training_jobs.submit()
+            if started:
+                logger.info(f"Started training job {job.job_id} to rebuild models ({summary['rebuild_reason']})")
+            rebuild_job = job.to_dict()
         
         return jsonify({
             'status': 'success',
-            'message': 'Models retrained successfully',
-            'results': results,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': datetime.now().isoformat(),
+            **summary,
+            'rebuild_job': rebuild_job
         })
     
+    except Exception as e:
+        logger.error(f"Training data error: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': f'Could not store training data: {str(e)}'
+        }), 500
+
+@app.route('/models/retrain', methods=['POST'])
+def retrain_models():
+    """Retrain models in a background job, including all labeled assessments submitted so far"""
+    try:
+        return start_training_job()
+    
     except Exception as e:
         logger.error(f"Retraining error: {str(e)}")
         return jsonify({
             'status': 'error',
-            'message': f'Retraining failed: {str(e)}'
+            'message': f'Could not start retraining: {str(e)}'
         }), 500
 
 if __name__ == '__main__':
     # Train models on startup
     logger.info("Starting MindNest ML Service...")
-    logger.info("Training initial models...")
     
-    try:
-        predictor.train_models()
-        logger.info("Models trained successfully!")
-    except Exception as e:
-        logger.error(f"Failed to train models on startup: {str(e)}")
+    if predictor.load_models():
+        logger.info(f"Using saved model bundle {predictor.model_version}")
+    else:
+        # Serve straight away; /predict answers 503 until the job publishes
+        job, _ = training_jobs.submit()
+        logger.info(f"Training initial models in job {job.job_id}...")
     
     # Start the Flask app
     app.run(host='0.0.0.0', port=8000, debug=True)
@@ -0,0 +1,151 @@
+"""
+MindNest ML Service - ASGI API for Mental Health Predictions
+Async variant of the real data service: /predict, /health, /ready, /models/info and
+/datasets/info with the same JSON contract, served by Starlette and uvicorn. The event
+loop only holds connections; scoring runs on a bounded thread pool.
+
+Usage: python ml_service_async.py  (or: uvicorn ml_service_async:app --port 8000)
+"""
+
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from ml_service_real_data import (
+    predictor, startup, models_not_ready_payload, health_payload, model_info_payload,
+    dataset_info_payload, prediction_payload, load_initial_models, HOST, PORT
+)
+
+logger = logging.getLogger(__name__)
+
+# Threads that run scoring, and how many requests may wait for one before new ones get a 503
+SCORING_THREADS = int(os.environ.get('MINDNEST_SCORING_THREADS', str(min(8, os.cpu_count() or 1))))
+SCORING_QUEUE = int(os.environ.get('MINDNEST_SCORING_QUEUE', '1024'))
+
+
+class ScoringPool:
+    """Thread pool with a bounded number of queued calls, awaited from the event loop"""
+
+    def __init__(self, threads, queue_size):
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='scoring')
+        self.threads = threads
+        self.queue_size = queue_size
+        self._slots = None
+
+    @property
+    def full(self):
+        return self._slots is not None and self._slots.locked()
+
+    async def run(self, fn, *args):
+        if self._slots is None:
+            # Created lazily so it binds to the running event loop
+            self._slots = asyncio.Semaphore(self.threads + self.queue_size)
+        async with self._slots:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, partial(fn, *args))
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+
+scoring_pool = ScoringPool(SCORING_THREADS, SCORING_QUEUE)
+
+
+def error_response(message, status_code, headers=None):
+    return JSONResponse({'status': 'error', 'message': message}, status_code=status_code, headers=headers)
+
+
+async def not_ready_response():
+    """503 with Retry-After while no model set is live, or None once ready"""
+    # Loading a bundle touches the disk, so keep it off the event loop
+    not_ready = await scoring_pool.run(models_not_ready_payload)
+    if not_ready is None:
+        return None
+    body, headers = not_ready
+    return JSONResponse(body, status_code=503, headers=headers)
+
+
+async def health_check(request):
+    """Health check endpoint"""
+    return JSONResponse(health_payload())
+
+
+async def readiness_check(request):
+    """Readiness check: 200 once a model set is live, 503 with Retry-After before that"""
+    if not predictor.ready:
+        not_ready = await not_ready_response()
+        if not_ready is not None:
+            return not_ready
+    return JSONResponse({'status': 'ready', 'model_version': predictor.model_version})
+
+
+async def predict(request):
+    """Make prediction based on assessment data using real data models"""
+    try:
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+
+        if not isinstance(data, dict) or 'answers' not in data:
+            return error_response('Missing assessment data', 400)
+
+        # Shed load instead of queueing without bound
+        if scoring_pool.full:
+            return error_response('Server busy, retry shortly', 503, {'Retry-After': '1'})
+
+        # Answer fast while models are still being trained
+        if not predictor.ready:
+            not_ready = await not_ready_response()
+            if not_ready is not None:
+                return not_ready
+
+        payload = await scoring_pool.run(prediction_payload, data['answers'], data.get('model_type', 'ensemble'))
+        return JSONResponse(payload)
+
+    except Exception as e:
+        logger.error(f"Prediction error: {str(e)}")
+        return error_response(f'Prediction failed: {str(e)}', 500)
+
+
+async def model_info(request):
+    """Get information about available models"""
+    return JSONResponse(model_info_payload())
+
+
+async def dataset_info(request):
+    """Get information about the datasets being used"""
+    return JSONResponse(dataset_info_payload())
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # uvicorn binds once startup returns, so the bundle is read in the background instead
+    startup.load_in_background(load_initial_models)
+    yield
+    scoring_pool.shutdown()
+
+
+app = Starlette(
+    routes=[
+        Route('/health', health_check, methods=['GET']),
+        Route('/ready', readiness_check, methods=['GET']),
+        Route('/predict', predict, methods=['POST']),
+        Route('/models/info', model_info, methods=['GET']),
+        Route('/datasets/info', dataset_info, methods=['GET'])
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],
+    lifespan=lifespan
+)
+
+if __name__ == '__main__':
+    import uvicorn
+
+    logger.info("Starting MindNest ML Service (ASGI) with Real Data...")
+    uvicorn.run(app, host=HOST, port=PORT, timeout_keep_alive=75)
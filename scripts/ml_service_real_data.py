@@ -1,36 +1,159 @@
 """
 MindNest ML Service - Flask API for Mental Health Predictions
 Updated to use real mental health datasets and new assessment form fields
+
+pandas, scikit-learn and the training helpers are imported by the methods that train, so
+importing this module (and answering /health) does not wait for them. create_app() builds
+the Flask app; the entry point binds the socket first and loads the models in the background.
 """
 
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, request, jsonify, g, Response
 from flask_cors import CORS
-import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.metrics import accuracy_score, classification_report
-import joblib
+import json
 import os
 import logging
-import requests
-from io import StringIO
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass, field, replace
 from datetime import datetime
+from dataset_cache import DatasetCache
+from model_bundle import save_model_bundle, load_model_bundle, artifact_path
+from model_registry import ModelRegistry
+from shadow_evaluation import ShadowEvaluator
+from feature_vectorizer import FeatureVectorizer
+from prediction_cache import PredictionCache
+from numpy_inference import InferenceEngine, export_decision_tree
+from neighbor_search import build_knn_model, build_ivf_index, TREE_BACKENDS
+from training_jobs import TrainingJobManager
+from service_metrics import MetricsRegistry, StageTimer, NO_STAGES
+from request_profiler import RequestProfiler, install_profiler
+from tree_explanations import LeafExplanations
+from rule_engine import RuleSet
+from service_startup import ServiceStartup
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_DIR = os.environ.get('MINDNEST_DATASET_DIR', os.path.join(SCRIPT_DIR, '..', 'datasets'))
+DATASET_CACHE_DIR = os.environ.get('MINDNEST_DATASET_CACHE_DIR', os.path.join(SCRIPT_DIR, '.dataset_cache'))
+DATASET_MIRROR_DIR = os.environ.get('MINDNEST_DATASET_MIRROR_DIR', os.path.join(SCRIPT_DIR, '.dataset_mirror'))
+MODEL_DIR = os.environ.get('MINDNEST_MODEL_DIR', os.path.join(SCRIPT_DIR, 'models', 'real_data'))
+MAX_BATCH_SIZE = int(os.environ.get('MINDNEST_MAX_BATCH_SIZE', '10000'))
+# Where `python ml_service_real_data.py` listens; MINDNEST_DEBUG=1 runs Flask's debug server instead
+HOST = os.environ.get('MINDNEST_HOST', '0.0.0.0')
+PORT = int(os.environ.get('MINDNEST_PORT', '8000'))
+DEBUG = os.environ.get('MINDNEST_DEBUG', '0') == '1'
+# How unknown categorical answers are encoded: 'zero', 'default' or 'error'
+UNSEEN_CATEGORY_POLICY = os.environ.get('MINDNEST_UNSEEN_CATEGORY_POLICY', 'zero')
+# Model-output cache for repeated assessments; 0 bytes disables it, 0 TTL never expires
+PREDICTION_CACHE_BYTES = int(os.environ.get('MINDNEST_PREDICTION_CACHE_BYTES', str(16 * 1024 * 1024)))
+PREDICTION_CACHE_TTL = float(os.environ.get('MINDNEST_PREDICTION_CACHE_TTL', '3600'))
+# 'numpy' scores with the exported InferenceEngine, 'sklearn' with the fitted estimators
+INFERENCE_BACKEND = os.environ.get('MINDNEST_INFERENCE_BACKEND', 'numpy')
+# KNN neighbor search: 'brute' (exact), 'kd_tree' / 'ball_tree' (exact, scikit-learn at request
+# time) or 'ivf' (approximate, NumPy engine); leaf size is an int or 'auto' to tune at train time
+KNN_BACKEND = os.environ.get('MINDNEST_KNN_BACKEND', 'brute')
+KNN_LEAF_SIZE = os.environ.get('MINDNEST_KNN_LEAF_SIZE', 'auto')
+IVF_PROBE = int(os.environ.get('MINDNEST_IVF_PROBE', '8'))
+# How the NumPy engine stores the KNN training matrix: 'float64' (matches scikit-learn exactly),
+# 'float32' or 'quantized' (uint8 numeric levels); categorical codes are small ints in both
+KNN_STORAGE = os.environ.get('MINDNEST_KNN_STORAGE', 'float64')
+# Background training: worker process start method, and the Retry-After sent while not ready
+TRAINING_START_METHOD = os.environ.get('MINDNEST_TRAINING_START_METHOD', 'spawn')
+TRAINING_RETRY_AFTER = int(os.environ.get('MINDNEST_TRAINING_RETRY_AFTER', '30'))
+# 'memory' trains on fully loaded datasets, 'streaming' reads them in chunks into an on-disk
+# feature matrix, 'auto' streams when the local CSVs would not fit in the memory budget.
+# The budget covers training data, on top of the interpreter and libraries (~170 MB)
+TRAINING_MODE = os.environ.get('MINDNEST_TRAINING_MODE', 'auto')
+TRAINING_MEMORY_BUDGET = int(os.environ.get('MINDNEST_TRAINING_MEMORY_MB', '1024')) * 1024 * 1024
+TRAINING_SCRATCH_DIR = os.environ.get('MINDNEST_TRAINING_SCRATCH_DIR', os.path.join(MODEL_DIR, '.scratch'))
+# Rough memory per CSV byte when loaded into pandas with preprocessing copies, and per row
+# of a streaming training sample (raw and scaled float64 rows, the tree's float32 copy and
+# its index buffers)
+IN_MEMORY_EXPANSION = 10
+TRAINING_ROW_BYTES = 600
+# Cross-validated hyperparameter search before each training run (0 fits DEFAULT_PARAMS):
+# folds, pool size (0 = one per CPU), rows sampled for the search, an optional JSON grid
+# overriding model_selection.DEFAULT_GRID per model, and where fold splits and matrices are cached
+MODEL_SELECTION = os.environ.get('MINDNEST_MODEL_SELECTION', '1') == '1'
+SELECTION_FOLDS = int(os.environ.get('MINDNEST_SELECTION_FOLDS', '5'))
+SELECTION_WORKERS = int(os.environ.get('MINDNEST_SELECTION_WORKERS', '0')) or None
+SELECTION_MAX_ROWS = int(os.environ.get('MINDNEST_SELECTION_MAX_ROWS', '50000'))
+SELECTION_GRID_PATH = os.environ.get('MINDNEST_SELECTION_GRID') or None
+SELECTION_CACHE_DIR = os.environ.get('MINDNEST_SELECTION_CACHE_DIR', os.path.join(MODEL_DIR, '.folds'))
+# Opt-in request profiling: 1 in SAMPLE_EVERY requests while enabled, or any request sending the
+# token in the X-MindNest-Profile header; without a token the /profiling endpoints refuse every request
+PROFILE_DIR = os.environ.get('MINDNEST_PROFILE_DIR', os.path.join(SCRIPT_DIR, '.profiles', 'real_data'))
+PROFILE_ENABLED = os.environ.get('MINDNEST_PROFILE_ENABLED', '0') == '1'
+PROFILE_SAMPLE_EVERY = int(os.environ.get('MINDNEST_PROFILE_SAMPLE_EVERY', '100'))
+PROFILE_TOKEN = os.environ.get('MINDNEST_PROFILE_TOKEN') or None
+
+# Shadow evaluation: share of /predict requests replayed against the candidate model set,
+# and how many replays may wait before new samples are dropped
+SHADOW_SAMPLE_RATE = float(os.environ.get('MINDNEST_SHADOW_SAMPLE_RATE', '0.1'))
+SHADOW_MAX_PENDING = int(os.environ.get('MINDNEST_SHADOW_MAX_PENDING', '100'))
+
+# Declarative recommendation and risk factor rules (see rule_engine.py)
+RULES_PATH = os.environ.get('MINDNEST_RULES_PATH', os.path.join(SCRIPT_DIR, 'recommendation_rules.json'))
+
+# Categorical columns, label-encoded before training
+CATEGORICAL_FEATURES = [
+    'gender', 'occupation', 'stress_level', 'diet_quality',
+    'smoking_habit', 'alcohol_consumption', 'mental_health_condition',
+    'consultation_history', 'medication_usage'
+]
+
+# Values used for assessment fields that are not answered
+FEATURE_DEFAULTS = {
+    'age': 30, 'gender': 'Other', 'occupation': 'Other',
+    'stress_level': 'Medium', 'sleep_hours': 7, 'work_hours': 40,
+    'physical_activity_hours': 2, 'social_media_usage': 3,
+    'diet_quality': 'Average', 'smoking_habit': 'Non-Smoker',
+    'alcohol_consumption': 'Light Drinker', 'symptom_severity': 5,
+    'mood_score': 5, 'sleep_quality': 5,
+    'mental_health_condition': 'No', 'consultation_history': 'No',
+    'medication_usage': 'No'
+}
+
+# Map prediction to severity and description
+SEVERITY_MAP = {
+    0: ("Low", "Low Risk - Good Mental Health Indicators"),
+    1: ("Mild", "Mild Mental Health Concerns - Monitor and Support"),
+    2: ("Moderate", "Moderate Mental Health Risk - Professional Support Recommended"),
+    3: ("High", "High Mental Health Risk - Immediate Professional Attention Needed")
+}
+
+# Every endpoint is registered on this blueprint; create_app() builds a Flask app around it
+routes = Blueprint('ml_service', __name__)
+profiler = RequestProfiler(PROFILE_DIR, PROFILE_SAMPLE_EVERY, PROFILE_ENABLED, PROFILE_TOKEN)
+# Startup milestones of this process, timed from process start
+startup = ServiceStartup()
+
+
+@dataclass(frozen=True)
+class ModelSet:
+    """A fully compiled set of models; the predictor publishes a new one with a single reference swap"""
+    models: dict = field(default_factory=dict)
+    scaler: object = None
+    label_encoders: dict = field(default_factory=dict)
+    vectorizer: object = None
+    engine: object = None
+    # Per-leaf decision tree explanations, computed once per model set
+    explanations: object = None
+    knn_backend: str = KNN_BACKEND
+    version: str = None
+    metadata: dict = field(default_factory=dict)
+
 
 class RealDataMentalHealthPredictor:
     def __init__(self):
-        self.models = {}
-        self.scaler = StandardScaler()
-        self.label_encoders = {}
+        # Everything a prediction reads lives in one ModelSet; requests read the reference once
+        self.model_set = ModelSet()
+        self.prediction_cache = PredictionCache(PREDICTION_CACHE_BYTES, PREDICTION_CACHE_TTL)
         self.feature_names = [
             'age', 'gender', 'occupation', 'stress_level', 'sleep_hours', 
             'work_hours', 'physical_activity_hours', 'social_media_usage',
@@ -42,20 +165,84 @@ class RealDataMentalHealthPredictor:
             'dataset1': "https://hebbkx1anhila5yf.public.blob.vercel-storage.com/mentalhealthdataset2-hA4Uuby0GR2Af4Mal0f2ZPhdNJmRqG.csv",
             'dataset2': "https://hebbkx1anhila5yf.public.blob.vercel-storage.com/mental_health_diagnosis_treatment_-uF7hPEA1DXEKsbyLjBsic2IUeg9rE6.csv"
         }
-        
+        # Local copies of the datasets, preferred over the remote URLs when present
+        self.dataset_paths = {
+            'dataset1': os.path.join(DATASET_DIR, 'mentalhealthdataset2.csv'),
+            'dataset2': os.path.join(DATASET_DIR, 'mental_health_diagnosis_treatment.csv')
+        }
+        self.dataset_cache = DatasetCache(DATASET_CACHE_DIR)
+        self.last_download_report = {}
+        self.model_dir = MODEL_DIR
+        self._registry = None
+        self._downloader = None
+        self.rules = RuleSet.from_file(RULES_PATH)
+        # Rule fields read from the encoded rows; categorical answers are read from the dicts
+        self._rule_fields = tuple(None if feature in CATEGORICAL_FEATURES else feature for feature in self.feature_names)
+    
+    @property
+    def models(self):
+        return self.model_set.models
+    
+    @property
+    def scaler(self):
+        return self.model_set.scaler
+    
+    @property
+    def label_encoders(self):
+        return self.model_set.label_encoders
+    
+    @property
+    def vectorizer(self):
+        return self.model_set.vectorizer
+    
+    @property
+    def engine(self):
+        return self.model_set.engine
+    
+    @property
+    def knn_backend(self):
+        return self.model_set.knn_backend
+    
+    @property
+    def model_version(self):
+        return self.model_set.version
+    
+    @property
+    def model_metadata(self):
+        return self.model_set.metadata
+    
+    @property
+    def registry(self):
+        """Promotion history and shadow candidate of the bundles in model_dir"""
+        if self._registry is None or self._registry.bundle_root != self.model_dir:
+            self._registry = ModelRegistry(self.model_dir)
+        return self._registry
+    
+    @property
+    def downloader(self):
+        """Dataset downloader, created (and requests imported) the first time it is needed"""
+        if self._downloader is None:
+            from dataset_downloader import DatasetDownloader
+            self._downloader = DatasetDownloader(DATASET_MIRROR_DIR)
+        return self._downloader
+    
+    @property
+    def ready(self):
+        """True once a trained model set is published"""
+        return bool(self.model_set.models)
+    
     def load_real_datasets(self):
         """Load and combine real mental health datasets"""
         try:
             logger.info("Loading real mental health datasets...")
+            paths = self.resolve_dataset_paths()
             
             # Load Dataset 1 (General Mental Health)
-            response1 = requests.get(self.dataset_urls['dataset1'])
-            df1 = pd.read_csv(StringIO(response1.text))
+            df1 = self.dataset_cache.read_csv(paths['dataset1'], 'dataset1')
             logger.info(f"Dataset 1 loaded: {df1.shape[0]} rows, {df1.shape[1]} columns")
             
             # Load Dataset 2 (Clinical Treatment Data)
-            response2 = requests.get(self.dataset_urls['dataset2'])
-            df2 = pd.read_csv(StringIO(response2.text))
+            df2 = self.dataset_cache.read_csv(paths['dataset2'], 'dataset2')
             logger.info(f"Dataset 2 loaded: {df2.shape[0]} rows, {df2.shape[1]} columns")
             
             return df1, df2
@@ -64,112 +251,37 @@ class RealDataMentalHealthPredictor:
             logger.error(f"Error loading datasets: {str(e)}")
             return None, None
     
+    def resolve_dataset_paths(self):
+        """Return a local file for every dataset, mirroring the ones without a local copy"""
+        paths = {}
+        missing = {}
+        for name, url in self.dataset_urls.items():
+            path = self.dataset_paths.get(name)
+            if path and os.path.exists(path):
+                paths[name] = path
+            else:
+                missing[name] = url
+        
+        if missing:
+            logger.info(f"No local copy of {', '.join(missing)}, fetching into {self.downloader.mirror_dir}")
+            self.last_download_report = self.downloader.fetch_all(missing)
+            for name, result in self.last_download_report.items():
+                # A failed refresh can still fall back to an earlier complete mirror
+                if not os.path.exists(result.path):
+                    raise Exception(f"Failed to download {name}: {result.error}")
+                paths[name] = result.path
+        
+        return paths
+    
     def preprocess_data(self, df1, df2):
         """Preprocess and combine datasets for ML training"""
+        import pandas as pd
         try:
-            # Process Dataset 1
-            processed_df1 = df1.copy()
-            
-            # Clean numeric columns
-            numeric_cols = ['Age', 'Sleep_Hours', 'Work_Hours', 'Physical_Activity_Hours', 'Social_Media_Usage']
-            for col in numeric_cols:
-                if col in processed_df1.columns:
-                    processed_df1[col] = pd.to_numeric(processed_df1[col], errors='coerce')
-            
-            # Create target variable based on Mental_Health_Condition and Severity
-            def create_risk_level(row):
-                if row.get('Mental_Health_Condition') == 'Yes':
-                    severity = row.get('Severity', 'None')
-                    if severity in ['Severe']:
-                        return 3  # High
-                    elif severity in ['Moderate']:
-                        return 2  # Moderate
-                    elif severity in ['Mild']:
-                        return 1  # Mild
-                    else:
-                        return 1  # Default to Mild if condition exists
-                else:
-                    return 0  # Low
-            
-            processed_df1['Risk_Level'] = processed_df1.apply(create_risk_level, axis=1)
-            
-            # Process Dataset 2 for additional features
-            processed_df2 = df2.copy()
-            
-            # Convert numeric columns
-            numeric_cols_2 = ['Age', 'Symptom Severity (1-10)', 'Mood Score (1-10)', 
-                             'Sleep Quality (1-10)', 'Physical Activity (hrs/week)', 'Stress Level (1-10)']
-            for col in numeric_cols_2:
-                if col in processed_df2.columns:
-                    processed_df2[col] = pd.to_numeric(processed_df2[col], errors='coerce')
-            
-            # Create risk level for dataset 2 based on outcome
-            def create_risk_level_2(row):
-                outcome = row.get('Outcome', '')
-                severity = row.get('Symptom Severity (1-10)', 5)
-                if outcome == 'Deteriorated' or severity >= 8:
-                    return 3  # High
-                elif outcome == 'No Change' or severity >= 6:
-                    return 2  # Moderate
-                elif severity >= 4:
-                    return 1  # Mild
-                else:
-                    return 0  # Low
-            
-            processed_df2['Risk_Level'] = processed_df2.apply(create_risk_level_2, axis=1)
-            
             # Combine datasets with common features
-            combined_features = []
-            
-            # From Dataset 1
-            for _, row in processed_df1.iterrows():
-                feature_dict = {
-                    'age': row.get('Age', 30),
-                    'gender': row.get('Gender', 'Other'),
-                    'occupation': row.get('Occupation', 'Other'),
-                    'stress_level': row.get('Stress_Level', 'Medium'),
-                    'sleep_hours': row.get('Sleep_Hours', 7),
-                    'work_hours': row.get('Work_Hours', 40),
-                    'physical_activity_hours': row.get('Physical_Activity_Hours', 2),
-                    'social_media_usage': row.get('Social_Media_Usage', 3),
-                    'diet_quality': row.get('Diet_Quality', 'Average'),
-                    'smoking_habit': row.get('Smoking_Habit', 'Non-Smoker'),
-                    'alcohol_consumption': row.get('Alcohol_Consumption', 'Light Drinker'),
-                    'symptom_severity': 5,  # Default value
-                    'mood_score': 5,  # Default value
-                    'sleep_quality': 5,  # Default value
-                    'mental_health_condition': row.get('Mental_Health_Condition', 'No'),
-                    'consultation_history': row.get('Consultation_History', 'No'),
-                    'medication_usage': row.get('Medication_Usage', 'No'),
-                    'risk_level': row.get('Risk_Level', 0)
-                }
-                combined_features.append(feature_dict)
-            
-            # From Dataset 2
-            for _, row in processed_df2.iterrows():
-                feature_dict = {
-                    'age': row.get('Age', 30),
-                    'gender': row.get('Gender', 'Other'),
-                    'occupation': 'Healthcare',  # Default for clinical data
-                    'stress_level': 'Medium' if row.get('Stress Level (1-10)', 5) <= 5 else 'High',
-                    'sleep_hours': 7,  # Default
-                    'work_hours': 40,  # Default
-                    'physical_activity_hours': row.get('Physical Activity (hrs/week)', 2),
-                    'social_media_usage': 3,  # Default
-                    'diet_quality': 'Average',  # Default
-                    'smoking_habit': 'Non-Smoker',  # Default
-                    'alcohol_consumption': 'Light Drinker',  # Default
-                    'symptom_severity': row.get('Symptom Severity (1-10)', 5),
-                    'mood_score': row.get('Mood Score (1-10)', 5),
-                    'sleep_quality': row.get('Sleep Quality (1-10)', 5),
-                    'mental_health_condition': 'Yes',  # Clinical data assumes condition
-                    'consultation_history': 'Yes',  # Clinical data assumes consultation
-                    'medication_usage': 'Yes' if pd.notna(row.get('Medication')) else 'No',
-                    'risk_level': row.get('Risk_Level', 1)
-                }
-                combined_features.append(feature_dict)
-            
-            combined_df = pd.DataFrame(combined_features)
+            combined_df = pd.concat([
+                self.preprocess_dataset1(df1),
+                self.preprocess_dataset2(df2)
+            ], ignore_index=True)
             logger.info(f"Combined dataset: {len(combined_df)} samples")
             logger.info(f"Risk level distribution: {combined_df['risk_level'].value_counts().to_dict()}")
             
@@ -179,44 +291,161 @@ class RealDataMentalHealthPredictor:
             logger.error(f"Error preprocessing data: {str(e)}")
             return None
     
-    def encode_features(self, df):
-        """Encode categorical features for ML training"""
-        df_encoded = df.copy()
+    def preprocess_dataset1(self, df, copy=True):
+        """Model features and risk level of Dataset 1 rows; copy=False may modify df"""
+        import pandas as pd
+        processed_df = df.copy() if copy else df
+        
+        # Clean numeric columns
+        numeric_cols = ['Age', 'Sleep_Hours', 'Work_Hours', 'Physical_Activity_Hours', 'Social_Media_Usage']
+        for col in numeric_cols:
+            if col in processed_df.columns:
+                processed_df[col] = pd.to_numeric(processed_df[col], errors='coerce')
         
-        # Categorical columns to encode
-        categorical_cols = ['gender', 'occupation', 'stress_level', 'diet_quality', 
-                           'smoking_habit', 'alcohol_consumption', 'mental_health_condition',
-                           'consultation_history', 'medication_usage']
+        processed_df['Risk_Level'] = self._risk_level_dataset1(processed_df)
+        return self._features_from_dataset1(processed_df)
+    
+    def preprocess_dataset2(self, df, copy=True):
+        """Model features and risk level of Dataset 2 rows; copy=False may modify df"""
+        import pandas as pd
+        processed_df = df.copy() if copy else df
+        
+        # Convert numeric columns
+        numeric_cols = ['Age', 'Symptom Severity (1-10)', 'Mood Score (1-10)', 
+                        'Sleep Quality (1-10)', 'Physical Activity (hrs/week)', 'Stress Level (1-10)']
+        for col in numeric_cols:
+            if col in processed_df.columns:
+                processed_df[col] = pd.to_numeric(processed_df[col], errors='coerce')
         
-        for col in categorical_cols:
+        processed_df['Risk_Level'] = self._risk_level_dataset2(processed_df)
+        return self._features_from_dataset2(processed_df)
+    
+    @staticmethod
+    def _column(df, column, default):
+        """Return a column as a positional Series, or a constant Series if it is missing"""
+        import pandas as pd
+        if column in df.columns:
+            return df[column].reset_index(drop=True)
+        return pd.Series([default] * len(df))
+    
+    def _risk_level_dataset1(self, df):
+        """Risk level from Mental_Health_Condition and Severity (Low=0 ... High=3)"""
+        import pandas as pd
+        has_condition = (self._column(df, 'Mental_Health_Condition', None) == 'Yes').to_numpy()
+        severity = self._column(df, 'Severity', 'None')
+        risk = np.select(
+            [
+                has_condition & (severity == 'Severe').to_numpy(),
+                has_condition & (severity == 'Moderate').to_numpy(),
+                has_condition  # Default to Mild if condition exists
+            ],
+            [3, 2, 1],
+            default=0
+        )
+        return pd.Series(risk, index=df.index, dtype='int64')
+    
+    def _risk_level_dataset2(self, df):
+        """Risk level from clinical Outcome and Symptom Severity (Low=0 ... High=3)"""
+        import pandas as pd
+        outcome = self._column(df, 'Outcome', '')
+        severity = self._column(df, 'Symptom Severity (1-10)', 5)
+        # NaN severities compare False, matching the scalar comparisons they replace
+        risk = np.select(
+            [
+                ((outcome == 'Deteriorated') | (severity >= 8)).to_numpy(),
+                ((outcome == 'No Change') | (severity >= 6)).to_numpy(),
+                (severity >= 4).to_numpy()
+            ],
+            [3, 2, 1],
+            default=0
+        )
+        return pd.Series(risk, index=df.index, dtype='int64')
+    
+    def _features_from_dataset1(self, df):
+        """Map Dataset 1 (general population) columns onto the model features"""
+        import pandas as pd
+        column = lambda name, default: self._column(df, name, default)
+        return pd.DataFrame({
+            'age': column('Age', 30),
+            'gender': column('Gender', 'Other'),
+            'occupation': column('Occupation', 'Other'),
+            'stress_level': column('Stress_Level', 'Medium'),
+            'sleep_hours': column('Sleep_Hours', 7),
+            'work_hours': column('Work_Hours', 40),
+            'physical_activity_hours': column('Physical_Activity_Hours', 2),
+            'social_media_usage': column('Social_Media_Usage', 3),
+            'diet_quality': column('Diet_Quality', 'Average'),
+            'smoking_habit': column('Smoking_Habit', 'Non-Smoker'),
+            'alcohol_consumption': column('Alcohol_Consumption', 'Light Drinker'),
+            'symptom_severity': 5,  # Default value
+            'mood_score': 5,  # Default value
+            'sleep_quality': 5,  # Default value
+            'mental_health_condition': column('Mental_Health_Condition', 'No'),
+            'consultation_history': column('Consultation_History', 'No'),
+            'medication_usage': column('Medication_Usage', 'No'),
+            'risk_level': column('Risk_Level', 0)
+        }, index=pd.RangeIndex(len(df)))
+    
+    def _features_from_dataset2(self, df):
+        """Map Dataset 2 (clinical) columns onto the model features"""
+        import pandas as pd
+        column = lambda name, default: self._column(df, name, default)
+        stress = column('Stress Level (1-10)', 5)
+        medication = column('Medication', None)
+        return pd.DataFrame({
+            'age': column('Age', 30),
+            'gender': column('Gender', 'Other'),
+            'occupation': 'Healthcare',  # Default for clinical data
+            'stress_level': np.where((stress <= 5).to_numpy(), 'Medium', 'High'),
+            'sleep_hours': 7,  # Default
+            'work_hours': 40,  # Default
+            'physical_activity_hours': column('Physical Activity (hrs/week)', 2),
+            'social_media_usage': 3,  # Default
+            'diet_quality': 'Average',  # Default
+            'smoking_habit': 'Non-Smoker',  # Default
+            'alcohol_consumption': 'Light Drinker',  # Default
+            'symptom_severity': column('Symptom Severity (1-10)', 5),
+            'mood_score': column('Mood Score (1-10)', 5),
+            'sleep_quality': column('Sleep Quality (1-10)', 5),
+            'mental_health_condition': 'Yes',  # Clinical data assumes condition
+            'consultation_history': 'Yes',  # Clinical data assumes consultation
+            'medication_usage': np.where(medication.notna().to_numpy(), 'Yes', 'No'),
+            'risk_level': column('Risk_Level', 1)
+        }, index=pd.RangeIndex(len(df)))
+    
+    def encode_features(self, df, label_encoders=None):
+        """Encode categorical features for ML training, fitting any encoders that are missing"""
+        from sklearn.preprocessing import LabelEncoder
+        if label_encoders is None:
+            label_encoders = self.label_encoders
+        df_encoded = df.copy()
+        
+        for col in CATEGORICAL_FEATURES:
             if col in df_encoded.columns:
-                if col not in self.label_encoders:
-                    self.label_encoders[col] = LabelEncoder()
-                    df_encoded[col] = self.label_encoders[col].fit_transform(df_encoded[col].astype(str))
+                if col not in label_encoders:
+                    label_encoders[col] = LabelEncoder()
+                    df_encoded[col] = label_encoders[col].fit_transform(df_encoded[col].astype(str))
                 else:
-                    df_encoded[col] = self.label_encoders[col].transform(df_encoded[col].astype(str))
+                    df_encoded[col] = label_encoders[col].transform(df_encoded[col].astype(str))
         
         return df_encoded
     
-    def train_models(self):
-        """Train Decision Tree and KNN models with real data"""
+    def train_models(self, name=None, promote=True):
+        """Train Decision Tree and KNN models with real data.
+        
+        The new models are fitted and compiled off to the side and only published once
+        complete, so predictions keep using the previous model set until the swap. With
+        promote=False they are only saved, under name, as a candidate for the registry.
+        """
+        from sklearn.metrics import accuracy_score
+        from sklearn.model_selection import train_test_split
+        from sklearn.preprocessing import StandardScaler
+        
+        if self.use_streaming_training():
+            return self.train_models_streaming(name=name, promote=promote)
+        
         try:
-            # Load real datasets
-            df1, df2 = self.load_real_datasets()
-            if df1 is None or df2 is None:
-                raise Exception("Failed to load datasets")
-            
-            # Preprocess and combine data
-            combined_df = self.preprocess_data(df1, df2)
-            if combined_df is None:
-                raise Exception("Failed to preprocess data")
-            
-            # Encode categorical features
-            encoded_df = self.encode_features(combined_df)
-            
-            # Prepare features and target
-            X = encoded_df[self.feature_names].fillna(0)
-            y = encoded_df['risk_level']
+            combined_df, X, y, label_encoders = self.training_data()
             
             logger.info(f"Training with {len(X)} samples and {len(self.feature_names)} features")
             
@@ -226,297 +455,875 @@ class RealDataMentalHealthPredictor:
             )
             
             # Scale the features
-            X_train_scaled = self.scaler.fit_transform(X_train)
-            X_test_scaled = self.scaler.transform(X_test)
-            
-            # Train Decision Tree
-            logger.info("Training Decision Tree model...")
-            dt_model = DecisionTreeClassifier(
-                max_depth=15,
-                min_samples_split=10,
-                min_samples_leaf=5,
-                random_state=42,
-                class_weight='balanced'
-            )
-            dt_model.fit(X_train, y_train)
+            scaler = StandardScaler()
+            X_train_scaled = scaler.fit_transform(X_train)
+            X_test_scaled = scaler.transform(X_test)
             
-            # Train KNN
-            logger.info("Training KNN model...")
-            knn_model = KNeighborsClassifier(
-                n_neighbors=7,
-                weights='distance'
-            )
-            knn_model.fit(X_train_scaled, y_train)
+            params, selection = self.select_params(X_train, y_train)
+            dt_model, knn_model = self.fit_models(X_train, X_train_scaled, y_train, params)
             
             # Evaluate models
-            dt_pred = dt_model.predict(X_test)
-            knn_pred = knn_model.predict(X_test_scaled)
-            
-            dt_accuracy = accuracy_score(y_test, dt_pred)
-            knn_accuracy = accuracy_score(y_test, knn_pred)
-            
-            logger.info(f"Decision Tree Accuracy: {dt_accuracy:.3f}")
-            logger.info(f"KNN Accuracy: {knn_accuracy:.3f}")
-            
-            # Store models
-            self.models['decision_tree'] = dt_model
-            self.models['knn'] = knn_model
+            dt_accuracy = accuracy_score(y_test, dt_model.predict(X_test))
+            knn_accuracy = accuracy_score(y_test, knn_model.predict(X_test_scaled))
             
             combined_df.to_csv('processed_real_data.csv', index=False)
             logger.info("Processed data saved to processed_real_data.csv")
             
-            return {
-                'decision_tree_accuracy': dt_accuracy,
-                'knn_accuracy': knn_accuracy,
-                'training_samples': len(X_train),
-                'test_samples': len(X_test),
-                'features_used': len(self.feature_names)
-            }
+            return self.finish_training(
+                {'decision_tree': dt_model, 'knn': knn_model}, scaler, label_encoders,
+                {
+                    'decision_tree_accuracy': dt_accuracy,
+                    'knn_accuracy': knn_accuracy,
+                    'training_samples': len(X_train),
+                    'test_samples': len(X_test),
+                    'features_used': len(self.feature_names),
+                    **self.selection_results(params, selection)
+                },
+                name, promote
+            )
             
         except Exception as e:
             logger.error(f"Training error: {str(e)}")
             raise
     
-    def predict(self, assessment_data, model_type='ensemble'):
-        """Make prediction using real data trained models"""
+    def use_streaming_training(self):
+        """True when TRAINING_MODE asks for streaming, or in 'auto' when the local CSVs are too big"""
+        from streaming_training import file_size
+        if TRAINING_MODE in ('memory', 'streaming'):
+            return TRAINING_MODE == 'streaming'
+        csv_bytes = sum(file_size(path) for path in self.dataset_paths.values())
+        return csv_bytes * IN_MEMORY_EXPANSION > TRAINING_MEMORY_BUDGET
+    
+    def train_models_streaming(self, memory_budget=None, name=None, promote=True):
+        """Train from datasets read in chunks, keeping peak memory near memory_budget bytes.
+        
+        Chunks are preprocessed and encoded into a memory-mapped feature matrix on disk. The
+        scaler sees every training row; the models are fitted on a random sample of the
+        training rows sized to the budget, which is all of them when they fit.
+        """
+        import pandas as pd
+        from sklearn.metrics import accuracy_score
+        from sklearn.preprocessing import StandardScaler
+        from streaming_training import row_blocks
+        
+        memory_budget = memory_budget or TRAINING_MEMORY_BUDGET
         try:
-            # Convert assessment data to feature vector
-            feature_vector = {}
-            
-            # Map assessment form fields to model features
-            field_mapping = {
-                'age': 'age',
-                'gender': 'gender',
-                'occupation': 'occupation',
-                'stress_level': 'stress_level',
-                'sleep_hours': 'sleep_hours',
-                'work_hours': 'work_hours',
-                'physical_activity_hours': 'physical_activity_hours',
-                'social_media_usage': 'social_media_usage',
-                'diet_quality': 'diet_quality',
-                'smoking_habit': 'smoking_habit',
-                'alcohol_consumption': 'alcohol_consumption',
-                'symptom_severity': 'symptom_severity',
-                'mood_score': 'mood_score',
-                'sleep_quality': 'sleep_quality',
-                'mental_health_condition': 'mental_health_condition',
-                'consultation_history': 'consultation_history',
-                'medication_usage': 'medication_usage'
-            }
-            
-            # Create feature vector with defaults
-            for model_feature, form_field in field_mapping.items():
-                if form_field in assessment_data:
-                    feature_vector[model_feature] = assessment_data[form_field]
-                else:
-                    # Set reasonable defaults
-                    defaults = {
-                        'age': 30, 'gender': 'Other', 'occupation': 'Other',
-                        'stress_level': 'Medium', 'sleep_hours': 7, 'work_hours': 40,
-                        'physical_activity_hours': 2, 'social_media_usage': 3,
-                        'diet_quality': 'Average', 'smoking_habit': 'Non-Smoker',
-                        'alcohol_consumption': 'Light Drinker', 'symptom_severity': 5,
-                        'mood_score': 5, 'sleep_quality': 5,
-                        'mental_health_condition': 'No', 'consultation_history': 'No',
-                        'medication_usage': 'No'
-                    }
-                    feature_vector[model_feature] = defaults[model_feature]
+            paths = self.resolve_dataset_paths()
+            os.makedirs(TRAINING_SCRATCH_DIR, exist_ok=True)
+            scratch_dir = tempfile.mkdtemp(prefix='train-', dir=TRAINING_SCRATCH_DIR)
+            try:
+                X, y, label_encoders = self.stream_features(paths, memory_budget // 8, scratch_dir)
+                logger.info(f"Streamed {len(y)} samples into {scratch_dir}")
+                block_rows = max(1000, memory_budget // 8 // (X.n_columns * X.dtype.itemsize))
+                
+                # Hold out ~20% of the rows; each block's mask is redrawn from its own seed on every pass
+                def blocks():
+                    for i, block in enumerate(row_blocks(len(y), block_rows)):
+                        is_test = np.random.default_rng([42, i]).random(block.stop - block.start) < 0.2
+                        yield block, is_test
+                
+                # The scaler is fitted exactly over every training row
+                scaler = StandardScaler()
+                n_test = 0
+                for block, is_test in blocks():
+                    scaler.partial_fit(pd.DataFrame(X.block(block)[~is_test], columns=self.feature_names))
+                    n_test += int(np.count_nonzero(is_test))
+                n_train = len(y) - n_test
+                
+                # Fit on all training rows if the budget allows, otherwise on a random sample
+                rng = np.random.default_rng(42)
+                max_rows = max(1000, memory_budget // 2 // TRAINING_ROW_BYTES)
+                X_train, y_train, X_test, y_test = self._sample_rows(
+                    X, y, blocks(), rng,
+                    min(1.0, max_rows / max(n_train, 1)), min(1.0, max_rows / 4 / max(n_test, 1))
+                )
+                logger.info(f"Training with {len(X_train)} of {n_train} training samples "
+                            f"and {len(self.feature_names)} features")
+                
+                X_train = pd.DataFrame(X_train, columns=self.feature_names)
+                X_test = pd.DataFrame(X_test, columns=self.feature_names)
+                X_test_scaled = scaler.transform(X_test)
+                params, selection = self.select_params(X_train, y_train)
+                dt_model, knn_model = self.fit_models(X_train, scaler.transform(X_train), y_train, params)
+                
+                dt_accuracy = accuracy_score(y_test, dt_model.predict(X_test))
+                knn_accuracy = accuracy_score(y_test, knn_model.predict(X_test_scaled))
+            finally:
+                shutil.rmtree(scratch_dir, ignore_errors=True)
             
-            # Encode categorical features
-            for col, encoder in self.label_encoders.items():
-                if col in feature_vector:
-                    try:
-                        feature_vector[col] = encoder.transform([str(feature_vector[col])])[0]
-                    except ValueError:
-                        # Handle unseen categories
-                        feature_vector[col] = 0
-            
-            # Convert to array
-            feature_array = np.array([feature_vector[feature] for feature in self.feature_names]).reshape(1, -1)
-            
-            if model_type == 'decision_tree':
-                prediction = self.models['decision_tree'].predict(feature_array)[0]
-                probabilities = self.models['decision_tree'].predict_proba(feature_array)[0]
-            elif model_type == 'knn':
-                feature_array_scaled = self.scaler.transform(feature_array)
-                prediction = self.models['knn'].predict(feature_array_scaled)[0]
-                probabilities = self.models['knn'].predict_proba(feature_array_scaled)[0]
-            else:  # ensemble
-                dt_proba = self.models['decision_tree'].predict_proba(feature_array)[0]
-                feature_array_scaled = self.scaler.transform(feature_array)
-                knn_proba = self.models['knn'].predict_proba(feature_array_scaled)[0]
-                probabilities = (dt_proba + knn_proba) / 2
-                prediction = np.argmax(probabilities)
-            
-            confidence = float(np.max(probabilities) * 100)
-            
-            # Map prediction to severity and description
-            severity_map = {
-                0: ("Low", "Low Risk - Good Mental Health Indicators"),
-                1: ("Mild", "Mild Mental Health Concerns - Monitor and Support"),
-                2: ("Moderate", "Moderate Mental Health Risk - Professional Support Recommended"),
-                3: ("High", "High Mental Health Risk - Immediate Professional Attention Needed")
-            }
-            
-            severity, description = severity_map[prediction]
-            
-            # Generate recommendations and risk factors
-            recommendations = self._generate_real_recommendations(prediction, assessment_data)
-            risk_factors = self._identify_real_risk_factors(prediction, assessment_data)
-            
-            return {
-                'prediction': description,
-                'severity': severity,
-                'confidence': round(confidence, 1),
-                'recommendations': recommendations,
-                'riskFactors': risk_factors,
-                'model_used': model_type,
-                'data_source': 'real_clinical_data'
-            }
+            return self.finish_training(
+                {'decision_tree': dt_model, 'knn': knn_model}, scaler, label_encoders,
+                {
+                    'decision_tree_accuracy': dt_accuracy,
+                    'knn_accuracy': knn_accuracy,
+                    'training_samples': len(X_train),
+                    'test_samples': len(X_test),
+                    'features_used': len(self.feature_names),
+                    'training_mode': 'streaming',
+                    'rows_streamed': n_train + n_test,
+                    **self.selection_results(params, selection)
+                },
+                name, promote
+            )
             
         except Exception as e:
-            logger.error(f"Prediction error: {str(e)}")
+            logger.error(f"Training error: {str(e)}")
             raise
     
-    def _generate_real_recommendations(self, risk_level, assessment_data):
-        """Generate recommendations based on real data patterns"""
-        base_recommendations = {
-            0: [
-                "Continue maintaining your current healthy lifestyle",
-                "Regular physical activity and social connections are beneficial",
-                "Keep up with good sleep hygiene (7-9 hours per night)",
-                "Practice stress management techniques preventively"
-            ],
-            1: [
-                "Monitor your mental health regularly with self-check-ins",
-                "Establish consistent daily routines for sleep and meals",
-                "Increase physical activity to at least 2.5 hours per week",
-                "Consider mindfulness or meditation practices",
-                "Maintain social connections and support networks"
-            ],
-            2: [
-                "Seek professional counseling or therapy services",
-                "Consider cognitive behavioral therapy (CBT) approaches",
-                "Implement stress reduction techniques daily",
-                "Maintain regular sleep schedule and limit screen time",
-                "Engage in regular physical exercise and outdoor activities",
-                "Limit alcohol consumption and avoid smoking"
-            ],
-            3: [
-                "Seek immediate professional mental health evaluation",
-                "Contact crisis support services if experiencing thoughts of self-harm",
-                "Develop a safety plan with mental health professionals",
-                "Consider medication evaluation with a psychiatrist",
-                "Establish daily check-ins with trusted support persons",
-                "Remove potential means of self-harm from environment"
-            ]
-        }
+    def stream_features(self, paths, chunk_budget, scratch_dir):
+        """Encode both datasets chunk by chunk into a memory-mapped (X, y, label_encoders)"""
+        import pandas as pd
+        from streaming_training import CategoryCoder, MatrixWriter, chunk_rows_for_budget, row_blocks
+        
+        coder = CategoryCoder(CATEGORICAL_FEATURES)
+        features = MatrixWriter(os.path.join(scratch_dir, 'features'), len(self.feature_names))
+        labels = MatrixWriter(os.path.join(scratch_dir, 'labels'), 1, np.int8)
+        processed_path = 'processed_real_data.csv'
+        first_chunk = True
+        
+        for name, preprocess in (('dataset1', self.preprocess_dataset1), ('dataset2', self.preprocess_dataset2)):
+            chunk_rows = chunk_rows_for_budget(paths[name], chunk_budget)
+            for chunk in pd.read_csv(paths[name], chunksize=chunk_rows):
+                processed = preprocess(chunk, copy=False)
+                processed.to_csv(processed_path, mode='w' if first_chunk else 'a', header=first_chunk, index=False)
+                first_chunk = False
+                
+                block = np.empty((len(processed), len(self.feature_names)))
+                for j, col in enumerate(self.feature_names):
+                    if col in CATEGORICAL_FEATURES:
+                        block[:, j] = coder.encode(col, processed[col])
+                    else:
+                        block[:, j] = pd.to_numeric(processed[col], errors='coerce').to_numpy(dtype=float)
+                block[np.isnan(block)] = 0
+                features.append(block)
+                labels.append(processed['risk_level'].to_numpy())
+        
+        X, y = features.close(), labels.close()
+        
+        # Swap the provisional category ids for the fitted encoders' codes, block by block
+        label_encoders, remaps = coder.label_encoders()
+        block_rows = max(1000, chunk_budget // (X.n_columns * X.dtype.itemsize))
+        for block in row_blocks(len(X), block_rows):
+            X_block = X.block(block, mode='r+')
+            for j, col in enumerate(self.feature_names):
+                if col in remaps:
+                    X_block[:, j] = remaps[col][X_block[:, j].astype(np.intp)]
+            X_block.flush()
+            del X_block
+        return X, y, label_encoders
+    
+    @staticmethod
+    def _sample_rows(X, y, blocks, rng, train_probability, test_probability):
+        """(X_train, y_train, X_test, y_test) sampled from on-disk X, y over (block, is_test) pairs"""
+        from streaming_training import bernoulli_rows
+        parts = {True: ([], []), False: ([], [])}
+        for block, is_test in blocks:
+            X_block, y_block = X.block(block), y.block(block)
+            for test in (False, True):
+                mask = is_test if test else ~is_test
+                positions = bernoulli_rows(rng, mask, test_probability if test else train_probability)
+                parts[test][0].append(np.array(X_block[positions]))
+                parts[test][1].append(np.array(y_block[positions], dtype=np.int64))
+            del X_block, y_block
+        (X_train, y_train), (X_test, y_test) = (
+            (np.concatenate(parts[test][0]), np.concatenate(parts[test][1])) for test in (False, True)
+        )
+        return X_train, y_train, X_test, y_test
+    
+    def training_data(self):
+        """(combined_df, X, y, label_encoders) for in-memory training, with freshly fitted encoders"""
+        # Load real datasets
+        df1, df2 = self.load_real_datasets()
+        if df1 is None or df2 is None:
+            raise Exception("Failed to load datasets")
         
-        recommendations = base_recommendations[risk_level].copy()
+        # Preprocess and combine data
+        combined_df = self.preprocess_data(df1, df2)
+        if combined_df is None:
+            raise Exception("Failed to preprocess data")
         
-        # Add personalized recommendations based on assessment
-        sleep_hours = assessment_data.get('sleep_hours', 7)
-        if sleep_hours < 6:
-            recommendations.append("Prioritize improving sleep quality - aim for 7-9 hours nightly")
+        # Encode categorical features with freshly fitted encoders
+        label_encoders = {}
+        encoded_df = self.encode_features(combined_df, label_encoders)
         
-        physical_activity = assessment_data.get('physical_activity_hours', 2)
-        if physical_activity < 2:
-            recommendations.append("Increase physical activity - even 30 minutes of walking daily helps")
+        # Prepare features and target
+        X = encoded_df[self.feature_names].fillna(0)
+        y = encoded_df['risk_level']
+        return combined_df, X, y, label_encoders
+    
+    def select_params(self, X_train, y_train):
+        """(fit_models params, search summary) from cross-validating the grid; defaults when off"""
+        from model_selection import select_models, DEFAULT_PARAMS
+        
+        if not MODEL_SELECTION:
+            return DEFAULT_PARAMS, None
         
-        social_media = assessment_data.get('social_media_usage', 3)
-        if social_media > 4:
-            recommendations.append("Consider reducing social media usage to improve mental wellbeing")
+        X_train = np.asarray(X_train, dtype=np.float64)
+        y_train = np.asarray(y_train, dtype=np.int64)
+        if len(y_train) > SELECTION_MAX_ROWS:
+            rows = np.random.default_rng(42).choice(len(y_train), SELECTION_MAX_ROWS, replace=False)
+            X_train, y_train = X_train[rows], y_train[rows]
+        grid = None
+        if SELECTION_GRID_PATH:
+            with open(SELECTION_GRID_PATH) as f:
+                grid = json.load(f)
         
-        if assessment_data.get('consultation_history') == 'No' and risk_level >= 1:
-            recommendations.append("Consider consulting with a mental health professional")
+        selection = select_models(
+            X_train, y_train, grid, n_folds=SELECTION_FOLDS, n_workers=SELECTION_WORKERS,
+            cache_dir=SELECTION_CACHE_DIR, start_method=TRAINING_START_METHOD
+        )
+        params = {model: selection[model]['best_params'] for model in ('decision_tree', 'knn')}
+        logger.info(f"Selected parameters: {params}")
+        return params, selection
+    
+    @staticmethod
+    def selection_results(params, selection):
+        """Training results entries describing the parameters used and the search that chose them"""
+        results = {'model_params': params}
+        if selection is not None:
+            results['model_selection'] = {
+                'decision_tree_cv_accuracy': selection['decision_tree']['best_accuracy'],
+                'knn_cv_accuracy': selection['knn']['best_accuracy'],
+                'parameter_sets': len(selection['decision_tree']['results']) + len(selection['knn']['results']),
+                'folds': selection['n_folds'],
+                'workers': selection['n_workers'],
+                'samples': selection['samples'],
+                'seconds': selection['seconds']
+            }
+        return results
+    
+    def fit_models(self, X_train, X_train_scaled, y_train, params=None):
+        """Fit the Decision Tree on raw features and KNN on scaled ones"""
+        from model_selection import decision_tree, DEFAULT_PARAMS
         
-        return recommendations[:6]
+        params = params or DEFAULT_PARAMS
+        logger.info("Training Decision Tree model...")
+        dt_model = decision_tree(params['decision_tree'])
+        dt_model.fit(X_train, y_train)
+        
+        logger.info("Training KNN model...")
+        knn_model = build_knn_model(
+            X_train_scaled, y_train,
+            backend=KNN_BACKEND,
+            leaf_size=KNN_LEAF_SIZE,
+            **params['knn']
+        )
+        return dt_model, knn_model
+    
+    def finish_training(self, models, scaler, label_encoders, results, name=None, promote=True):
+        """Compile, save and publish freshly fitted models; returns the results with the version"""
+        logger.info(f"Decision Tree Accuracy: {results['decision_tree_accuracy']:.3f}")
+        logger.info(f"KNN Accuracy: {results['knn_accuracy']:.3f}")
+        
+        # Compile the new model set
+        model_set = self.build_model_set(models, scaler, label_encoders, KNN_BACKEND)
+        
+        try:
+            model_set = self.save_models(model_set, results, name, promote)
+            results['model_version'] = model_set.version
+        except Exception as e:
+            logger.warning(f"Could not save model bundle: {str(e)}")
+        
+        if promote:
+            self.publish(model_set)
+        return results
+    
+    def build_model_set(self, models, scaler, label_encoders, knn_backend, engine_dir=None,
+                        version=None, metadata=None):
+        """Compile the vectorizer and inference engine for fitted models into a new ModelSet"""
+        return ModelSet(
+            models=models,
+            scaler=scaler,
+            label_encoders=label_encoders,
+            vectorizer=self.compile_vectorizer(label_encoders),
+            engine=self.compile_engine(models, scaler, knn_backend, engine_dir),
+            explanations=self.compile_explanations(models, label_encoders),
+            knn_backend=knn_backend,
+            version=version,
+            metadata=metadata or {}
+        )
+    
+    def compile_vectorizer(self, label_encoders):
+        """Build the lookup-table feature vectorizer from the fitted label encoders"""
+        return FeatureVectorizer.from_label_encoders(
+            self.feature_names, label_encoders, FEATURE_DEFAULTS, unseen=UNSEEN_CATEGORY_POLICY
+        )
     
-    def _identify_real_risk_factors(self, risk_level, assessment_data):
-        """Identify risk factors based on real data patterns"""
-        risk_factors = []
+    def compile_explanations(self, models, label_encoders):
+        """Precompute the decision tree's decision path and contributions for every leaf"""
+        model = models['decision_tree']
+        categories = {col: list(encoder.classes_) for col, encoder in label_encoders.items()}
+        return LeafExplanations(
+            export_decision_tree(model), self.feature_names, categories, model.feature_importances_
+        )
+    
+    def compile_engine(self, models, scaler, knn_backend, engine_dir=None):
+        """Load the exported NumPy inference engine from engine_dir, or export it from the models"""
+        # Tree-indexed KNN is served by scikit-learn so queries keep their sub-linear search
+        if INFERENCE_BACKEND != 'numpy' or knn_backend in TREE_BACKENDS:
+            return None
+        try:
+            if engine_dir and os.path.exists(os.path.join(engine_dir, 'engine.json')):
+                return InferenceEngine.load(engine_dir)
+            knn_index = None
+            if knn_backend == 'ivf':
+                knn_index = build_ivf_index(models['knn']._fit_X, n_probe=IVF_PROBE)
+            return InferenceEngine.from_sklearn(
+                models, scaler, self.feature_names, knn_index=knn_index, knn_storage=KNN_STORAGE,
+                categorical_columns=[j for j, col in enumerate(self.feature_names) if col in CATEGORICAL_FEATURES]
+            )
+        except Exception as e:
+            logger.warning(f"NumPy inference engine unavailable, using scikit-learn: {str(e)}")
+            return None
+    
+    def publish(self, model_set):
+        """Make model_set live with one reference swap; in-flight requests finish on the old set"""
+        self.model_set = model_set
+        self.prediction_cache.clear()
+        logger.info(f"Published model set {model_set.version or '(unsaved)'}")
+    
+    def save_models(self, model_set, metrics=None, name=None, promote=True):
+        """Persist a model set as a new bundle version and return it with its version filled in.
         
-        # Lifestyle risk factors
-        if assessment_data.get('sleep_hours', 7) < 6:
-            risk_factors.append("Insufficient sleep (less than 6 hours per night)")
+        Promoting it through the registry keeps the previous live version for rollback.
+        """
+        payload = {
+            'models': model_set.models,
+            'scaler': model_set.scaler,
+            'label_encoders': model_set.label_encoders,
+            'feature_names': self.feature_names
+        }
+        metadata = {
+            'service': 'real_data',
+            'name': name or 'default',
+            'metrics': metrics or {},
+            'knn_backend': model_set.knn_backend,
+            'feature_names': self.feature_names,
+            'categories': {
+                col: [str(c) for c in encoder.classes_] for col, encoder in model_set.label_encoders.items()
+            }
+        }
+        artifacts = {'inference': model_set.engine.save} if model_set.engine is not None else None
+        version = save_model_bundle(
+            self.model_dir, payload, metadata, artifacts=artifacts,
+            make_latest=False, protect=self.registry.protected_versions()
+        )
+        if promote:
+            self.registry.promote(version)
+        return replace(model_set, version=version, metadata={**metadata, 'version': version})
+    
+    def load_models(self, version=None):
+        """Load a saved model bundle, memory-mapping its arrays; returns False if none is usable"""
+        model_set = self.load_model_set(version)
+        if model_set is None:
+            return False
+        self.publish(model_set)
+        logger.info(f"Loaded model bundle {model_set.version}")
+        return True
+    
+    def load_model_set(self, version=None):
+        """Compile a saved model bundle (LATEST by default) without publishing it; None if unusable"""
+        try:
+            payload, metadata = load_model_bundle(self.model_dir, version)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Could not load model bundle: {str(e)}")
+            return None
         
-        if assessment_data.get('work_hours', 40) > 55:
-            risk_factors.append("Excessive work hours (over 55 hours per week)")
+        if payload['feature_names'] != self.feature_names:
+            logger.warning(f"Ignoring model bundle {metadata['version']}: feature schema does not match")
+            return None
         
-        if assessment_data.get('physical_activity_hours', 2) < 1:
-            risk_factors.append("Sedentary lifestyle with minimal physical activity")
+        return self.build_model_set(
+            payload['models'],
+            payload['scaler'],
+            payload['label_encoders'],
+            metadata.get('knn_backend', 'brute'),
+            engine_dir=artifact_path(self.model_dir, metadata['version'], 'inference'),
+            version=metadata['version'],
+            metadata=metadata
+        )
+    
+    def predict(self, assessment_data, model_type='ensemble', stages=NO_STAGES, model_set=None):
+        """Make prediction using real data trained models, timing each step into stages.
         
-        if assessment_data.get('social_media_usage', 3) > 5:
-            risk_factors.append("Excessive social media usage (over 5 hours daily)")
+        An explicit model_set (a shadow candidate) is scored without the prediction cache.
+        """
+        try:
+            use_cache = model_set is None
+            model_set = model_set or self.model_set
+            
+            # Encode the assessment into the vectorizer's reusable feature row
+            with stages('feature_encoding'):
+                feature_array = model_set.vectorizer.transform_one(assessment_data)
+            
+            # Model output depends only on the encoded row, so repeated answers skip scoring.
+            # Recommendations and risk factors read the raw answers and are always rebuilt.
+            cached = None
+            if use_cache:
+                with stages('cache_lookup'):
+                    cache_key = self.prediction_cache.make_key(model_set.version, model_type, feature_array)
+                    cached = self.prediction_cache.get(cache_key)
+            if cached is None:
+                probabilities, predictions, leaves = self._score_matrix(feature_array, model_type, model_set, stages)
+                cached = (probabilities[0], predictions[0], None if leaves is None else leaves[0])
+                if use_cache:
+                    self.prediction_cache.put(cache_key, *cached)
+            
+            probabilities, prediction, leaf = cached
+            with stages('rules'):
+                recommendations, risk_factors = self.apply_rules([assessment_data], [prediction], feature_array)
+            return self._build_result(
+                prediction, probabilities, model_type, recommendations[0], risk_factors[0],
+                model_set.explanations, leaf
+            )
+            
+        except Exception as e:
+            logger.error(f"Prediction error: {str(e)}")
+            raise
+    
+    def predict_many(self, assessments, model_type='ensemble', stages=NO_STAGES):
+        """Score a list of assessments with one predict_proba call per model.
         
-        # Health behavior risk factors
-        if assessment_data.get('smoking_habit') not in ['Non-Smoker', 'Former Smoker']:
-            risk_factors.append("Tobacco use affecting mental and physical health")
+        Returns one entry per assessment, in order: the same dict `predict` returns,
+        or {'error': message} for assessments that could not be encoded.
+        """
+        model_set = self.model_set
+        with stages('feature_encoding'):
+            feature_matrix, errors = self.encode_assessments(assessments, model_set)
+        results = [{'error': errors[i]} if i in errors else None for i in range(len(assessments))]
+        valid_rows = [i for i in range(len(assessments)) if i not in errors]
+        if not valid_rows:
+            return results
         
-        if assessment_data.get('alcohol_consumption') == 'Heavy Drinker':
-            risk_factors.append("Heavy alcohol consumption impacting mental health")
+        valid_matrix = feature_matrix[valid_rows]
+        probabilities, predictions, leaves = self._score_matrix(valid_matrix, model_type, model_set, stages)
+        with stages('rules'):
+            recommendations, risk_factors = self.apply_rules(
+                [assessments[i] for i in valid_rows], predictions, valid_matrix
+            )
+        for row, i in enumerate(valid_rows):
+            try:
+                results[i] = self._build_result(
+                    predictions[row], probabilities[row], model_type, recommendations[row], risk_factors[row],
+                    model_set.explanations, None if leaves is None else leaves[row]
+                )
+            except Exception as e:
+                results[i] = {'error': str(e)}
+        return results
+    
+    def encode_assessments(self, assessments, model_set=None):
+        """Encode assessments into an (N, n_features) float matrix.
         
-        if assessment_data.get('diet_quality') in ['Poor', 'Very Poor']:
-            risk_factors.append("Poor diet quality affecting overall wellbeing")
+        Returns the matrix and a {row: message} dict for rows that could not be encoded.
+        """
+        return (model_set or self.model_set).vectorizer.transform_many(assessments)
+    
+    def _score_matrix(self, feature_matrix, model_type, model_set=None, stages=NO_STAGES):
+        """Return (probabilities, predicted risk levels, decision tree leaves) for an encoded matrix.
         
-        # Clinical risk factors
-        if assessment_data.get('stress_level') == 'High':
-            risk_factors.append("High stress levels affecting daily functioning")
+        The leaves are None for KNN alone, which does not consult the tree.
+        """
+        model_set = model_set or self.model_set
+        engine, models = model_set.engine, model_set.models
+        leaves = None
         
-        if assessment_data.get('symptom_severity', 5) >= 7:
-            risk_factors.append("Severe mental health symptoms requiring attention")
+        if model_type != 'knn':
+            with stages('dt_proba'):
+                # The leaf gives both the tree's probabilities and its explanation
+                if engine is not None:
+                    leaves = engine.tree_leaves(feature_matrix)
+                else:
+                    leaves = models['decision_tree'].apply(feature_matrix)
+                dt_proba = model_set.explanations.leaf_proba(leaves)
+            if model_type == 'decision_tree':
+                return dt_proba, models['decision_tree'].classes_[np.argmax(dt_proba, axis=1)], leaves
         
-        if assessment_data.get('mood_score', 5) <= 3:
-            risk_factors.append("Persistently low mood affecting quality of life")
+        with stages('scaling'):
+            if engine is not None:
+                scaled_matrix = engine.scale(feature_matrix)
+            else:
+                scaled_matrix = model_set.scaler.transform(feature_matrix)
+        with stages('knn_proba'):
+            if engine is not None:
+                knn_proba = engine.knn_proba_scaled(scaled_matrix)
+            else:
+                knn_proba = models['knn'].predict_proba(scaled_matrix)
+        if model_type == 'knn':
+            return knn_proba, models['knn'].classes_[np.argmax(knn_proba, axis=1)], leaves
         
-        if assessment_data.get('sleep_quality', 5) <= 3:
-            risk_factors.append("Poor sleep quality impacting mental health recovery")
+        # ensemble
+        probabilities = (dt_proba + knn_proba) / 2
+        return probabilities, np.argmax(probabilities, axis=1), leaves
+    
+    def apply_rules(self, assessments, predictions, feature_matrix):
+        """(recommendations, risk factors) for each assessment, from one pass of the rule table"""
+        # Numeric answers are read from the encoded rows, where unanswered fields hold their defaults
+        advice = self.rules.evaluate(assessments, feature_matrix, self._rule_fields, {'risk_level': predictions})
+        return advice['recommendations'], advice['risk_factors']
+    
+    def _build_result(self, prediction, probabilities, model_type, recommendations, risk_factors,
+                      explanations=None, leaf=None):
+        """Turn one row of model output into the prediction response"""
+        prediction = int(prediction)
+        confidence = float(np.max(probabilities) * 100)
+        severity, description = SEVERITY_MAP[prediction]
         
-        return risk_factors if risk_factors else ["No significant risk factors identified based on current assessment"]
+        return {
+            'prediction': description,
+            'severity': severity,
+            'confidence': round(confidence, 1),
+            'recommendations': recommendations,
+            'riskFactors': risk_factors,
+            'model_used': model_type,
+            'data_source': 'real_clinical_data',
+            # Why the decision tree leaned towards this risk level; None when it was not consulted
+            'explanation': explanations.explain(leaf, prediction) if leaf is not None else None
+        }
 
 # Initialize the predictor
 predictor = RealDataMentalHealthPredictor()
 
 
-@app.route('/health', methods=['GET'])
-def health_check():
-    """Health check endpoint"""
-    return jsonify({
+def run_training_job(name=None, shadow=False):
+    """Train and save a model set inside a training worker process; returns the results.
+    
+    With shadow set the new version becomes the registry's shadow candidate instead of live.
+    """
+    trainer = RealDataMentalHealthPredictor()
+    results = trainer.train_models(name=name, promote=not shadow)
+    if not results.get('model_version'):
+        raise RuntimeError("Trained models could not be saved as a model bundle")
+    if shadow:
+        trainer.registry.set_shadow(results['model_version'])
+    return results
+
+
+def publish_trained_version(version):
+    """Swap in a bundle saved by a training worker as the live model set, or shadow it"""
+    if version == predictor.registry.shadow_version():
+        resume_shadow()
+        return
+    if not predictor.load_models(version):
+        raise RuntimeError(f"Model bundle {version} could not be loaded")
+    startup.mark('models_ready')
+
+
+def load_initial_models():
+    """Load the saved bundle and its shadow candidate, or start training when there is none"""
+    if predictor.load_models():
+        logger.info(f"Using saved model bundle {predictor.model_version}")
+        startup.mark('models_ready')
+        resume_shadow()
+    else:
+        # Serve straight away; prediction endpoints answer 503 until the job publishes
+        job, _ = training_jobs.submit()
+        logger.info(f"Training initial models with real clinical datasets in job {job.job_id}...")
+
+
+def shadow_score(model_set, assessment, model_type):
+    return predictor.predict(assessment, model_type, model_set=model_set)
+
+
+shadow = ShadowEvaluator(shadow_score, SHADOW_SAMPLE_RATE, SHADOW_MAX_PENDING)
+
+
+def resume_shadow():
+    """Shadow the registry's candidate at its stored sample rate, reloading it if either changed"""
+    version = predictor.registry.shadow_version()
+    if version is None:
+        if shadow.active:
+            shadow.stop()
+        return
+    sample_rate = predictor.registry.shadow_sample_rate() or SHADOW_SAMPLE_RATE
+    if version == shadow.version and sample_rate == shadow.sample_rate:
+        return
+    candidate = predictor.load_model_set(version)
+    if candidate is None:
+        raise RuntimeError(f"Model bundle {version} could not be loaded")
+    shadow.start(candidate, version, sample_rate)
+
+
+training_jobs = TrainingJobManager(
+    run_training_job, publish_trained_version, TRAINING_START_METHOD,
+    state_dir=os.path.join(MODEL_DIR, 'jobs')
+)
+
+
+def models_not_ready_payload():
+    """(body, headers) of the fast 503 sent while no model set is live, or None once ready.
+    
+    Loads a saved bundle, or starts a training job if none is running. While the startup
+    load is still reading the bundle in the background, it only asks the client to retry.
+    """
+    if startup.loading:
+        body = {'status': 'error', 'message': 'Models are loading', 'training_job': None}
+        return body, {'Retry-After': '1'}
+    job = training_jobs.active_job()
+    if job is None:
+        if predictor.load_models():
+            startup.mark('models_ready')
+        else:
+            logger.info("Models not found, starting a background training job with real data...")
+            job, _ = training_jobs.submit()
+    if predictor.ready:
+        return None
+    
+    body = {
+        'status': 'error',
+        'message': 'Models are not ready yet, training is in progress',
+        'training_job': job.to_dict()
+    }
+    return body, {'Retry-After': str(training_jobs.retry_after(TRAINING_RETRY_AFTER))}
+
+
+def models_not_ready():
+    """Fast 503 response while no model set is live, or None once ready"""
+    not_ready = models_not_ready_payload()
+    if not_ready is None:
+        return None
+    body, headers = not_ready
+    response = jsonify(body)
+    response.headers.update(headers)
+    return response, 503
+
+
+# Request metrics, exposed in the Prometheus text format on /metrics
+MODEL_TYPES = ('decision_tree', 'knn', 'ensemble')
+metrics = MetricsRegistry()
+request_latency = metrics.histogram(
+    'mindnest_request_duration_seconds', 'Request latency by endpoint and model type',
+    ('endpoint', 'method', 'model_type', 'model_version')
+)
+stage_latency = metrics.histogram(
+    'mindnest_prediction_stage_duration_seconds', 'Time spent in each stage of a prediction request',
+    ('endpoint', 'model_type', 'stage', 'model_version')
+)
+request_count = metrics.counter(
+    'mindnest_requests_total', 'Requests by endpoint, model type and status code',
+    ('endpoint', 'method', 'model_type', 'status', 'model_version')
+)
+request_error_count = metrics.counter(
+    'mindnest_request_errors_total', 'Requests answered with a 4xx or 5xx status',
+    ('endpoint', 'method', 'model_type', 'status', 'model_version')
+)
+model_info_gauge = metrics.gauge(
+    'mindnest_model_info', 'The live model set (always 1)', ('model_version', 'knn_backend', 'inference_backend')
+)
+cache_gauge = metrics.gauge('mindnest_prediction_cache', 'Prediction cache counters and size', ('field',))
+shadow_gauge = metrics.gauge(
+    'mindnest_shadow', 'Shadow evaluation counters and agreement rate', ('candidate_version', 'field')
+)
+startup_gauge = metrics.gauge(
+    'mindnest_startup_seconds', 'Seconds from process start to each startup milestone', ('milestone',)
+)
+
+
+def refresh_state_metrics():
+    model_info_gauge.clear()
+    if predictor.ready:
+        engine = 'numpy' if predictor.engine is not None else 'sklearn'
+        model_info_gauge.set(1, model_version=predictor.model_version, knn_backend=predictor.knn_backend,
+                             inference_backend=engine)
+    stats = predictor.prediction_cache.stats()
+    for field_name in ('entries', 'bytes', 'hits', 'misses', 'evictions', 'expirations', 'invalidations'):
+        cache_gauge.set(stats[field_name], field=field_name)
+    shadow_gauge.clear()
+    if shadow.active:
+        stats = shadow.stats()
+        for field_name in ('sampled', 'scored', 'dropped', 'errors', 'agreement_rate'):
+            if stats[field_name] is not None:
+                shadow_gauge.set(stats[field_name], candidate_version=stats['candidate_version'], field=field_name)
+    for milestone, seconds in startup.seconds().items():
+        startup_gauge.set(seconds, milestone=milestone)
+
+
+metrics.add_collector(refresh_state_metrics)
+
+
+def metric_model_type(model_type):
+    """The model_type metric label: unknown model types are recorded under 'other' to bound cardinality.
+
+    (They are still scored, as the ensemble.)
+    """
+    return model_type if model_type in MODEL_TYPES else 'other'
+
+
+@routes.before_app_request
+def start_request_metrics():
+    g.request_start = time.perf_counter()
+    g.stages = StageTimer()
+    g.model_type = ''
+
+
+@routes.after_app_request
+def record_request_metrics(response):
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    labels = {
+        'endpoint': endpoint,
+        'model_type': g.model_type,
+        'model_version': predictor.model_version or ''
+    }
+    request_latency.observe(time.perf_counter() - g.request_start, method=request.method, **labels)
+    request_count.inc(method=request.method, status=response.status_code, **labels)
+    if response.status_code >= 400:
+        request_error_count.inc(method=request.method, status=response.status_code, **labels)
+    g.stages.observe(stage_latency, **labels)
+    return response
+
+
+# Response bodies shared with the ASGI variant in ml_service_async.py
+
+def health_payload():
+    startup.mark('first_healthy')
+    return {
         'status': 'healthy',
         'service': 'MindNest ML Service (Real Data)',
         'version': '2.0.0',
         'timestamp': datetime.now().isoformat(),
-        'data_source': 'real_clinical_datasets'
+        'data_source': 'real_clinical_datasets',
+        'ready': predictor.ready,
+        'model_version': predictor.model_version,
+        # Seconds from process start to listening, first_healthy, models_ready and first_prediction
+        'startup': startup.seconds()
+    }
+
+
+def model_info_payload():
+    job = training_jobs.active_job()
+    return {
+        'available_models': ['decision_tree', 'knn', 'ensemble'],
+        'default_model': 'ensemble',
+        'features': predictor.feature_names,
+        'trained': predictor.ready,
+        'model_count': len(predictor.models),
+        'model_version': predictor.model_version,
+        'model_name': predictor.model_metadata.get('name'),
+        'shadow': shadow.stats() if shadow.active else None,
+        'knn_backend': predictor.knn_backend,
+        'knn_storage': predictor.engine.knn_storage if predictor.engine is not None else None,
+        'prediction_cache': predictor.prediction_cache.stats(),
+        'training_job': job.to_dict() if job else None,
+        'data_source': 'real_clinical_datasets',
+        'datasets_used': list(predictor.dataset_urls.keys())
+    }
+
+
+def dataset_info_payload():
+    return {
+        'datasets': {
+            'dataset1': {
+                'name': 'General Mental Health Dataset',
+                'url': predictor.dataset_urls['dataset1'],
+                'local_path': predictor.dataset_paths['dataset1'],
+                'description': 'Comprehensive mental health indicators and lifestyle factors'
+            },
+            'dataset2': {
+                'name': 'Clinical Treatment Dataset', 
+                'url': predictor.dataset_urls['dataset2'],
+                'local_path': predictor.dataset_paths['dataset2'],
+                'description': 'Clinical diagnosis and treatment outcome data'
+            }
+        },
+        'features_extracted': predictor.feature_names,
+        'last_updated': datetime.now().isoformat()
+    }
+
+
+def prediction_payload(assessment_data, model_type, stages=NO_STAGES):
+    """Success body of /predict for one assessment; a sample is also replayed in shadow"""
+    start = time.perf_counter()
+    result = predictor.predict(assessment_data, model_type, stages)
+    shadow.offer(assessment_data, model_type, result, time.perf_counter() - start)
+    startup.mark('first_prediction')
+    return {
+        'status': 'success',
+        'timestamp': datetime.now().isoformat(),
+        **result
+    }
+
+
+def _is_rate(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def registry_payload():
+    registry = predictor.registry
+    return {
+        'live_version': predictor.model_version,
+        'shadow_version': registry.shadow_version(),
+        'versions': registry.versions()
+    }
+
+
+@routes.route('/health', methods=['GET'])
+def health_check():
+    """Health check endpoint"""
+    return jsonify(health_payload())
+
+@routes.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness check: 200 once a model set is live, 503 with Retry-After before that"""
+    if not predictor.ready:
+        not_ready = models_not_ready()
+        if not_ready is not None:
+            return not_ready
+    return jsonify({
+        'status': 'ready',
+        'model_version': predictor.model_version
     })
 
-@app.route('/train', methods=['POST'])
+@routes.route('/train', methods=['POST'])
 def train_models():
-    """Train the ML models with real data"""
+    """Start a background job that trains the ML models with real data"""
     try:
-        logger.info("Starting model training with real datasets...")
-        results = predictor.train_models()
+        options = request.get_json(silent=True) or {}
+        job, started = training_jobs.submit(name=options.get('name'), shadow=bool(options.get('shadow')))
+        if started:
+            logger.info(f"Started training job {job.job_id} with real datasets")
         
-        return jsonify({
-            'status': 'success',
-            'message': 'Models trained successfully with real clinical data',
-            'results': results,
+        response = jsonify({
+            'status': 'accepted',
+            'message': 'Training started' if started else 'Training already in progress',
+            'job': job.to_dict(),
             'timestamp': datetime.now().isoformat()
         })
+        response.headers['Location'] = f'/train/jobs/{job.job_id}'
+        return response, 202
     
     except Exception as e:
         logger.error(f"Training error: {str(e)}")
         return jsonify({
             'status': 'error',
-            'message': f'Training failed: {str(e)}'
+            'message': f'Could not start training: {str(e)}'
         }), 500
 
-@app.route('/predict', methods=['POST'])
+@routes.route('/train/jobs', methods=['GET'])
+def training_job_list():
+    """List recent training jobs, newest first"""
+    return jsonify({'jobs': training_jobs.jobs()})
+
+@routes.route('/train/jobs/<job_id>', methods=['GET'])
+def training_job_status(job_id):
+    """Get the status of one training job"""
+    job = training_jobs.get(job_id)
+    if job is None:
+        return jsonify({
+            'status': 'error',
+            'message': f'Unknown training job {job_id}'
+        }), 404
+    return jsonify({'job': job.to_dict()})
+
+@routes.route('/predict', methods=['POST'])
 def predict():
     """Make prediction based on assessment data using real data models"""
     try:
-        data = request.get_json()
+        with g.stages('request_parse'):
+            # Malformed JSON is a client error like a missing field, as in the async service
+            data = request.get_json(silent=True)
         
-        if not data or 'answers' not in data:
+        if not isinstance(data, dict) or 'answers' not in data:
             return jsonify({
                 'status': 'error',
                 'message': 'Missing assessment data'
@@ -524,20 +1331,18 @@ def predict():
         
         assessment_data = data['answers']
         model_type = data.get('model_type', 'ensemble')
+        g.model_type = metric_model_type(model_type)
         
-        # Check if models are trained
-        if not predictor.models:
-            logger.info("Models not found, training new models with real data...")
-            predictor.train_models()
+        # Answer fast while models are still being trained
+        if not predictor.ready:
+            not_ready = models_not_ready()
+            if not_ready is not None:
+                return not_ready
         
         # Make prediction
-        result = predictor.predict(assessment_data, model_type)
-        
-        return jsonify({
-            'status': 'success',
-            'timestamp': datetime.now().isoformat(),
-            **result
-        })
+        payload = prediction_payload(assessment_data, model_type, g.stages)
+        with g.stages('json_serialization'):
+            return jsonify(payload)
     
     except Exception as e:
         logger.error(f"Prediction error: {str(e)}")
@@ -546,48 +1351,189 @@ def predict():
             'message': f'Prediction failed: {str(e)}'
         }), 500
 
-@app.route('/models/info', methods=['GET'])
+@routes.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """Score many assessments in one request using vectorized encoding and scoring"""
+    try:
+        with g.stages('request_parse'):
+            data = request.get_json(silent=True)
+        
+        if not isinstance(data, dict) or not isinstance(data.get('assessments'), list):
+            return jsonify({
+                'status': 'error',
+                'message': 'Missing assessments list'
+            }), 400
+        
+        assessments = data['assessments']
+        if len(assessments) > MAX_BATCH_SIZE:
+            return jsonify({
+                'status': 'error',
+                'message': f'Batch too large: {len(assessments)} assessments (max {MAX_BATCH_SIZE})'
+            }), 413
+        
+        model_type = data.get('model_type', 'ensemble')
+        g.model_type = metric_model_type(model_type)
+        
+        # Answer fast while models are still being trained
+        if not predictor.ready:
+            not_ready = models_not_ready()
+            if not_ready is not None:
+                return not_ready
+        
+        results = []
+        for i, result in enumerate(predictor.predict_many(assessments, model_type, g.stages)):
+            if 'error' in result:
+                results.append({'index': i, 'status': 'error', 'message': result['error']})
+            else:
+                results.append({'index': i, 'status': 'success', **result})
+        error_count = sum(1 for result in results if result['status'] == 'error')
+        if error_count < len(results):
+            startup.mark('first_prediction')
+        
+        with g.stages('json_serialization'):
+            return jsonify({
+                'status': 'success',
+                'timestamp': datetime.now().isoformat(),
+                'count': len(results),
+                'error_count': error_count,
+                'results': results
+            })
+    
+    except Exception as e:
+        logger.error(f"Batch prediction error: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': f'Batch prediction failed: {str(e)}'
+        }), 500
+
+@routes.route('/models/info', methods=['GET'])
 def model_info():
     """Get information about available models"""
+    return jsonify(model_info_payload())
+
+@routes.route('/models/registry', methods=['GET'])
+def model_registry():
+    """List saved model versions with their names, metrics and live/shadow/previous status"""
+    return jsonify(registry_payload())
+
+@routes.route('/models/promote', methods=['POST'])
+def promote_model():
+    """Make a saved version live (the shadow candidate by default), keeping the old one for rollback"""
+    data = request.get_json(silent=True) or {}
+    version = data.get('version') or predictor.registry.shadow_version()
+    if not version:
+        return jsonify({
+            'status': 'error',
+            'message': 'No version given and no shadow candidate to promote'
+        }), 400
+    
+    candidate = predictor.load_model_set(version)
+    if candidate is None:
+        return jsonify({
+            'status': 'error',
+            'message': f'Model version {version} could not be loaded'
+        }), 404
+    shadow_stats = shadow.stop() if shadow.version == version else None
+    previous = predictor.registry.promote(version)
+    predictor.publish(candidate)
     return jsonify({
-        'available_models': ['decision_tree', 'knn', 'ensemble'],
-        'default_model': 'ensemble',
-        'features': predictor.feature_names,
-        'trained': bool(predictor.models),
-        'model_count': len(predictor.models),
-        'data_source': 'real_clinical_datasets',
-        'datasets_used': list(predictor.dataset_urls.keys())
+        'status': 'success',
+        'model_version': version,
+        'previous_version': previous,
+        'shadow': shadow_stats
     })
 
-@app.route('/datasets/info', methods=['GET'])
-def dataset_info():
-    """Get information about the datasets being used"""
+@routes.route('/models/rollback', methods=['POST'])
+def rollback_model():
+    """Make the version that was live before the last promotion live again"""
+    try:
+        version = predictor.registry.rollback()
+    except LookupError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 409
+    if not predictor.load_models(version):
+        return jsonify({
+            'status': 'error',
+            'message': f'Model version {version} could not be loaded'
+        }), 500
+    return jsonify({'status': 'success', 'model_version': version})
+
+@routes.route('/models/shadow', methods=['GET', 'POST', 'DELETE'])
+def shadow_model():
+    """Shadow statistics; POST {"version", "sample_rate"} starts shadowing, DELETE stops it"""
+    if request.method == 'GET':
+        return jsonify(shadow.stats())
+    if request.method == 'DELETE':
+        stats = shadow.stop()
+        predictor.registry.set_shadow(None)
+        return jsonify(stats)
+    
+    data = request.get_json(silent=True) or {}
+    version = data.get('version')
+    sample_rate = data.get('sample_rate')
+    if not version:
+        return jsonify({'status': 'error', 'message': 'Missing version'}), 400
+    if version == predictor.model_version:
+        return jsonify({'status': 'error', 'message': f'Model version {version} is already live'}), 400
+    if sample_rate is not None and not (_is_rate(sample_rate) and 0 < sample_rate <= 1):
+        return jsonify({'status': 'error', 'message': 'sample_rate must be a number in (0, 1]'}), 400
+    try:
+        predictor.registry.set_shadow(version, sample_rate)
+        resume_shadow()
+    except LookupError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 404
+    except RuntimeError as e:
+        predictor.registry.set_shadow(None)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+    return jsonify(shadow.stats())
+
+@routes.route('/metrics', methods=['GET'])
+def service_metrics():
+    """Request counters and latency histograms in the Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@routes.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """Get prediction cache counters"""
     return jsonify({
-        'datasets': {
-            'dataset1': {
-                'name': 'General Mental Health Dataset',
-                'url': predictor.dataset_urls['dataset1'],
-                'description': 'Comprehensive mental health indicators and lifestyle factors'
-            },
-            'dataset2': {
-                'name': 'Clinical Treatment Dataset', 
-                'url': predictor.dataset_urls['dataset2'],
-                'description': 'Clinical diagnosis and treatment outcome data'
-            }
-        },
-        'features_extracted': predictor.feature_names,
-        'last_updated': datetime.now().isoformat()
+        'model_version': predictor.model_version,
+        **predictor.prediction_cache.stats()
     })
 
+@routes.route('/datasets/info', methods=['GET'])
+def dataset_info():
+    """Get information about the datasets being used"""
+    return jsonify(dataset_info_payload())
+
+def create_app(load_models=False):
+    """Build the Flask app serving the module's predictor.
+    
+    With load_models the saved model set is loaded on a background thread, so the app can
+    answer /health straight away; gunicorn can use this as an app factory, e.g.
+    gunicorn 'ml_service_real_data:create_app(load_models=True)'.
+    """
+    app = Flask(__name__)
+    CORS(app)  # Enable CORS for all routes
+    # Installed first so a profile covers the other request hooks too
+    install_profiler(app, profiler)
+    app.register_blueprint(routes)
+    if load_models:
+        startup.load_in_background(load_initial_models)
+    return app
+
+
+app = create_app()
+
 if __name__ == '__main__':
     logger.info("Starting MindNest ML Service with Real Data...")
-    logger.info("Training initial models with real clinical datasets...")
     
-    try:
-        predictor.train_models()
-        logger.info("Models trained successfully with real data!")
-    except Exception as e:
-        logger.error(f"Failed to train models on startup: {str(e)}")
-    
-    # Start the Flask app
-    app.run(host='0.0.0.0', port=8000, debug=True)
+    if DEBUG:
+        startup.load_in_background(load_initial_models)
+        app.run(host=HOST, port=PORT, debug=True)
+    else:
+        from werkzeug.serving import make_server
+        
+        # Bind before loading, so /health answers while the model bundle is read
+        server = make_server(HOST, PORT, app, threaded=True)
+        startup.mark('listening')
+        startup.load_in_background(load_initial_models)
+        server.serve_forever()
@@ -0,0 +1,141 @@
+"""
+MindNest model bundles
+Versioned on-disk snapshots of trained models, scalers, encoders and feature schema.
+Bundles are written uncompressed with joblib so large arrays can be memory-mapped on load.
+joblib and scikit-learn are imported only to save or load a payload, so reading versions and
+metadata stays cheap for processes that have not loaded any models yet.
+"""
+
+import json
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT_VERSION = 1
+LATEST_POINTER = 'LATEST'
+PAYLOAD_FILE = 'bundle.joblib'
+METADATA_FILE = 'metadata.json'
+
+
+def new_model_version():
+    """Return a sortable, unique model version id"""
+    return f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def latest_version(bundle_root):
+    """Return the version the LATEST pointer refers to, or None"""
+    try:
+        with open(os.path.join(bundle_root, LATEST_POINTER)) as f:
+            version = f.read().strip()
+    except OSError:
+        return None
+    return version or None
+
+
+def list_versions(bundle_root):
+    """Return the complete bundle versions under bundle_root, oldest first"""
+    if not os.path.isdir(bundle_root):
+        return []
+    return sorted(
+        name for name in os.listdir(bundle_root)
+        if os.path.exists(os.path.join(bundle_root, name, METADATA_FILE))
+    )
+
+
+def save_model_bundle(bundle_root, payload, metadata, version=None, keep=3, artifacts=None,
+                      make_latest=True, protect=()):
+    """Write payload and metadata as a new bundle version and, by default, point LATEST at it.
+
+    artifacts maps a subdirectory name to a callable that writes extra files into it,
+    so they are published atomically with the rest of the bundle. Versions in protect are
+    kept when older versions are pruned.
+    """
+    import joblib
+    import sklearn
+
+    version = version or new_model_version()
+    final_dir = os.path.join(bundle_root, version)
+    tmp_dir = os.path.join(bundle_root, f".{version}.tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    metadata = {
+        **metadata,
+        'version': version,
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'created_at': datetime.now().isoformat(),
+        'sklearn_version': sklearn.__version__,
+        'numpy_version': np.__version__
+    }
+
+    # No compression: compressed arrays cannot be memory-mapped back
+    joblib.dump(payload, os.path.join(tmp_dir, PAYLOAD_FILE))
+    for name, write in (artifacts or {}).items():
+        write(os.path.join(tmp_dir, name))
+    with open(os.path.join(tmp_dir, METADATA_FILE), 'w') as f:
+        json.dump(metadata, f, indent=2, default=str)
+    os.replace(tmp_dir, final_dir)
+    if make_latest:
+        set_latest_version(bundle_root, version)
+
+    _prune(bundle_root, keep, {version, *protect})
+    logger.info(f"Model bundle {version} saved to {final_dir}")
+    return version
+
+
+def set_latest_version(bundle_root, version):
+    """Atomically point LATEST at an existing version"""
+    pointer_tmp = os.path.join(bundle_root, f".{LATEST_POINTER}.{os.getpid()}.tmp")
+    with open(pointer_tmp, 'w') as f:
+        f.write(version)
+    os.replace(pointer_tmp, os.path.join(bundle_root, LATEST_POINTER))
+
+
+def read_bundle_metadata(bundle_root, version):
+    """Metadata of a bundle version without loading its payload"""
+    with open(os.path.join(bundle_root, version, METADATA_FILE)) as f:
+        return json.load(f)
+
+
+def load_model_bundle(bundle_root, version=None, mmap_mode='r'):
+    """Load a bundle version (LATEST by default) and return (payload, metadata)"""
+    version = version or latest_version(bundle_root)
+    if version is None:
+        raise FileNotFoundError(f"No model bundle found in {bundle_root}")
+
+    bundle_dir = os.path.join(bundle_root, version)
+    metadata = read_bundle_metadata(bundle_root, version)
+    import joblib
+    import sklearn
+
+    if metadata.get('format_version') != BUNDLE_FORMAT_VERSION:
+        raise ValueError(
+            f"Model bundle {version} has format {metadata.get('format_version')}, "
+            f"expected {BUNDLE_FORMAT_VERSION}"
+        )
+    if metadata.get('sklearn_version') != sklearn.__version__:
+        logger.warning(
+            f"Model bundle {version} was built with scikit-learn {metadata.get('sklearn_version')}, "
+            f"running {sklearn.__version__}"
+        )
+
+    payload = joblib.load(os.path.join(bundle_dir, PAYLOAD_FILE), mmap_mode=mmap_mode)
+    return payload, metadata
+
+
+def artifact_path(bundle_root, version, name):
+    """Path of a named artifact directory inside a bundle version"""
+    return os.path.join(bundle_root, version, name)
+
+
+def _prune(bundle_root, keep, protect=()):
+    """Remove all but the newest `keep` versions, never touching the LATEST or protected ones"""
+    current = latest_version(bundle_root)
+    versions = [v for v in list_versions(bundle_root) if v != current]
+    for version in versions[:max(0, len(versions) - (keep - 1))]:
+        if version not in protect:
+            shutil.rmtree(os.path.join(bundle_root, version), ignore_errors=True)
@@ -0,0 +1,167 @@
+"""
+MindNest model registry
+Named, versioned model sets on top of the model bundles in one bundle root. The LATEST
+pointer stays the live version that load_models and every server process follow; the
+registry adds the promotion history that rollback walks back through, and the shadow
+candidate scored alongside live traffic. Its state is a small JSON file next to the bundles,
+so every process sees the same registry.
+"""
+
+import json
+import logging
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: updates are atomic replaces, just not cross-process locked
+    fcntl = None
+
+from model_bundle import latest_version, list_versions, read_bundle_metadata, set_latest_version
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_FILE = 'registry.json'
+
+
+class ModelRegistry:
+    """Promotion history and shadow candidate for the bundles under bundle_root"""
+
+    def __init__(self, bundle_root, history=5):
+        self.bundle_root = bundle_root
+        self.history = history
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    @property
+    def path(self):
+        return os.path.join(self.bundle_root, REGISTRY_FILE)
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        return {
+            'history': state.get('history', []),
+            'shadow': state.get('shadow'),
+            'shadow_sample_rate': state.get('shadow_sample_rate')
+        }
+
+    def _update(self, change):
+        """Apply change(state) under a cross-process lock and write the state back atomically"""
+        os.makedirs(self.bundle_root, exist_ok=True)
+        with self._lock, open(os.path.join(self.bundle_root, '.registry.lock'), 'w') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                state = self._read()
+                result = change(state)
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(state, f, indent=2)
+                os.replace(tmp_path, self.path)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+        for listener in list(self._listeners):
+            try:
+                listener(self)
+            except Exception as e:
+                logger.error(f"Model registry listener failed: {str(e)}")
+        return result
+
+    def add_listener(self, listener):
+        """Call listener(registry) after every promotion, rollback or shadow change in this process"""
+        self._listeners.append(listener)
+
+    def live_version(self):
+        return latest_version(self.bundle_root)
+
+    def shadow_version(self):
+        return self._read()['shadow']
+
+    def shadow_sample_rate(self):
+        """Fraction of predictions the shadow candidate scores, or None for the service default"""
+        return self._read()['shadow_sample_rate']
+
+    def protected_versions(self):
+        """Versions bundle pruning must keep: live, shadow and every rollback target"""
+        state = self._read()
+        return {version for version in (self.live_version(), state['shadow'], *state['history']) if version}
+
+    def versions(self):
+        """Every saved version, newest first, with its name, creation time, metrics and status"""
+        state = self._read()
+        live = self.live_version()
+        statuses = {version: 'previous' for version in state['history']}
+        statuses[state['shadow']] = 'shadow'
+        statuses[live] = 'live'
+        entries = []
+        for version in reversed(list_versions(self.bundle_root)):
+            try:
+                metadata = read_bundle_metadata(self.bundle_root, version)
+            except (OSError, ValueError):
+                continue
+            entries.append({
+                'version': version,
+                'name': metadata.get('name'),
+                'created_at': metadata.get('created_at'),
+                'metrics': metadata.get('metrics', {}),
+                'status': statuses.get(version)
+            })
+        return entries
+
+    def _require(self, version):
+        if version not in list_versions(self.bundle_root):
+            raise LookupError(f"Unknown model version {version}")
+
+    def promote(self, version):
+        """Make version live, remembering the current live version for rollback; returns it"""
+        self._require(version)
+
+        def change(state):
+            previous = self.live_version()
+            if previous == version:
+                return previous
+            if previous:
+                state['history'] = (state['history'] + [previous])[-self.history:]
+            if state['shadow'] == version:
+                state['shadow'] = state['shadow_sample_rate'] = None
+            set_latest_version(self.bundle_root, version)
+            return previous
+
+        previous = self._update(change)
+        logger.info(f"Promoted model version {version} (was {previous})")
+        return previous
+
+    def rollback(self):
+        """Make the most recently replaced version live again and return it"""
+        available = set(list_versions(self.bundle_root))
+
+        def change(state):
+            while state['history']:
+                version = state['history'].pop()
+                if version in available and version != self.live_version():
+                    set_latest_version(self.bundle_root, version)
+                    return version
+            raise LookupError("No earlier model version to roll back to")
+
+        version = self._update(change)
+        logger.info(f"Rolled back to model version {version}")
+        return version
+
+    def set_shadow(self, version, sample_rate=None):
+        """Make version the shadow candidate, or clear the candidate with None.
+
+        sample_rate is stored with it, so every process shadows at the same rate.
+        """
+        if version is not None:
+            self._require(version)
+
+        def change(state):
+            state['shadow'] = version
+            state['shadow_sample_rate'] = sample_rate if version is not None else None
+
+        self._update(change)
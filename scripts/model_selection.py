@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+MindNest model selection
+K-fold cross-validation of the decision tree and KNN over a parameter grid, spread across a
+process pool. The fold splits and each fold's scaled matrices are written once to a cache
+directory keyed by the data, and the workers memory-map them instead of receiving copies.
+Within a fold the KNN neighbor graph is computed once at the largest k, and every smaller k
+and weighting is scored from its leading columns.
+
+Usage: python model_selection.py [--folds 5] [--workers 4] [--grid grid.json] [--top 5]
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import numpy as np
+from sklearn.model_selection import KFold, StratifiedKFold
+from sklearn.neighbors import NearestNeighbors
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+logger = logging.getLogger(__name__)
+
+# The parameters train_models used before model selection; also the fallback when it is off
+DEFAULT_PARAMS = {
+    'decision_tree': {'max_depth': 15, 'min_samples_split': 10, 'min_samples_leaf': 5},
+    'knn': {'n_neighbors': 7, 'weights': 'distance'}
+}
+DEFAULT_GRID = {
+    'decision_tree': {
+        'max_depth': [8, 12, 15, 20, None],
+        'min_samples_split': [2, 5, 10, 20],
+        'min_samples_leaf': [1, 5]
+    },
+    'knn': {
+        'n_neighbors': [3, 5, 7, 9, 11, 15, 21],
+        'weights': ['uniform', 'distance']
+    }
+}
+# Test rows voted on at once when scoring the neighbor graph
+VOTE_BLOCK_ROWS = 4096
+
+
+def decision_tree(params):
+    """DecisionTreeClassifier with the service's fixed settings and the given grid parameters"""
+    return DecisionTreeClassifier(random_state=42, class_weight='balanced', **params)
+
+
+def merged_grid(grid=None):
+    """The given grid with every model and parameter filled in.
+
+    A model the grid leaves out gets DEFAULT_GRID; a parameter it leaves out gets its
+    DEFAULT_PARAMS value. Raises ValueError for models or parameters the search cannot vary.
+    """
+    grid = grid or {}
+    unknown = set(grid) - set(DEFAULT_GRID)
+    if unknown:
+        raise ValueError(f"Unknown models in the selection grid: {sorted(unknown)}; expected {sorted(DEFAULT_GRID)}")
+    # decision_tree() fixes random_state and class_weight; the KNN search scores its points from
+    # one Euclidean neighbor graph, so only k and the weighting can vary
+    allowed = {
+        'decision_tree': set(decision_tree({}).get_params()) - {'random_state', 'class_weight'},
+        'knn': set(DEFAULT_PARAMS['knn'])
+    }
+    merged = {}
+    for model, default_grid in DEFAULT_GRID.items():
+        model_grid = grid.get(model)
+        if not model_grid:
+            merged[model] = default_grid
+            continue
+        unknown = set(model_grid) - allowed[model]
+        if unknown:
+            raise ValueError(f"Unsupported {model} parameters in the selection grid: {sorted(unknown)}")
+        for name, values in model_grid.items():
+            if not isinstance(values, list) or not values:
+                raise ValueError(f"Selection grid {model}.{name} must be a non-empty list of values")
+        merged[model] = {name: [value] for name, value in DEFAULT_PARAMS[model].items()} | model_grid
+    return merged
+
+
+def grid_points(grid):
+    """Every parameter combination of a {name: [values]} grid, as dicts"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+class FoldCache:
+    """On-disk fold splits and scaled fold matrices, one directory per (data, folds, seed).
+
+    Directories are named by a hash of the data, so searching the same data again reuses
+    them. Only the max_entries most recently used directories are kept.
+    """
+
+    def __init__(self, cache_dir, max_entries=4):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+
+    def prepare(self, X, y, n_folds=5, seed=42):
+        """Directory holding the folds of X, y, writing it first if it is not cached"""
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        y = np.ascontiguousarray(y, dtype=np.int64)
+        digest = hashlib.sha1()
+        for part in (X, y, np.array([n_folds, seed, X.shape[1]])):
+            digest.update(part.tobytes())
+        path = os.path.join(self.cache_dir, digest.hexdigest()[:16])
+        if os.path.exists(os.path.join(path, 'complete')):
+            os.utime(path)
+            return path
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        staging = path + f'.{os.getpid()}.tmp'
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        np.save(os.path.join(staging, 'X.npy'), X)
+        np.save(os.path.join(staging, 'y.npy'), y)
+        # Stratify when every class can appear in every fold
+        counts = np.bincount(y - y.min()) if len(y) else np.array([0])
+        splitter_class = StratifiedKFold if counts[counts > 0].min() >= n_folds else KFold
+        splitter = splitter_class(n_splits=n_folds, shuffle=True, random_state=seed)
+        for fold, (train, test) in enumerate(splitter.split(X, y)):
+            scaler = StandardScaler().fit(X[train])
+            np.save(os.path.join(staging, f'fold{fold}_train.npy'), train)
+            np.save(os.path.join(staging, f'fold{fold}_test.npy'), test)
+            np.save(os.path.join(staging, f'fold{fold}_train_scaled.npy'), scaler.transform(X[train]))
+            np.save(os.path.join(staging, f'fold{fold}_test_scaled.npy'), scaler.transform(X[test]))
+        open(os.path.join(staging, 'complete'), 'w').close()
+        try:
+            os.rename(staging, path)
+        except OSError:
+            # Another process cached the same data first
+            shutil.rmtree(staging, ignore_errors=True)
+        self._prune(keep=path)
+        return path
+
+    def _prune(self, keep):
+        entries = [
+            os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir) if not name.endswith('.tmp')
+        ]
+        entries.sort(key=os.path.getmtime, reverse=True)
+        for entry in entries[self.max_entries:]:
+            if entry != keep:
+                shutil.rmtree(entry, ignore_errors=True)
+
+
+@lru_cache(maxsize=16)
+def _fold(path, fold):
+    """(X_train, X_test, train_scaled, test_scaled, y_train, y_test) of a cached fold, read once per process.
+
+    Pool workers exit with the pool; select_models clears the cache after an inline search.
+    """
+    X = np.load(os.path.join(path, 'X.npy'), mmap_mode='r')
+    y = np.load(os.path.join(path, 'y.npy'), mmap_mode='r')
+    train = np.load(os.path.join(path, f'fold{fold}_train.npy'))
+    test = np.load(os.path.join(path, f'fold{fold}_test.npy'))
+    return (
+        X[train], X[test],
+        np.load(os.path.join(path, f'fold{fold}_train_scaled.npy'), mmap_mode='r'),
+        np.load(os.path.join(path, f'fold{fold}_test_scaled.npy'), mmap_mode='r'),
+        y[train], y[test]
+    )
+
+
+def score_tree(path, fold, params):
+    """Held-out accuracy of one decision tree parameter set on one fold"""
+    X_train, X_test, _, _, y_train, y_test = _fold(path, fold)
+    model = decision_tree(params).fit(X_train, y_train)
+    return float(np.mean(model.predict(X_test) == y_test))
+
+
+def score_knn(path, fold, points):
+    """Held-out accuracy of every KNN parameter set on one fold, from one neighbor graph.
+
+    Votes match KNeighborsClassifier's: uniform counts, or 1/distance weights where a
+    neighbor at distance zero takes all the weight. Neighbors tied at the same distance may
+    be ordered differently than a separate query at a smaller k would order them.
+    """
+    _, _, X_train, X_test, y_train, y_test = _fold(path, fold)
+    classes, y_codes = np.unique(y_train, return_inverse=True)
+    k_max = min(max(point['n_neighbors'] for point in points), len(X_train))
+    distances, neighbors = NearestNeighbors(n_neighbors=k_max, algorithm='brute').fit(X_train).kneighbors(X_test)
+
+    correct = np.zeros(len(points))
+    rows = np.arange(k_max)
+    for start in range(0, len(X_test), VOTE_BLOCK_ROWS):
+        block = slice(start, start + VOTE_BLOCK_ROWS)
+        labels = y_codes[neighbors[block]]
+        block_distances = distances[block]
+        n_rows = len(labels)
+        # Running vote totals per class after each neighbor: (rows, k_max, classes)
+        one_hot = np.zeros((n_rows, k_max, len(classes)))
+        one_hot[np.arange(n_rows)[:, None], rows, labels] = 1.0
+        counts = np.cumsum(one_hot, axis=1)
+        zero = block_distances == 0
+        with np.errstate(divide='ignore'):
+            inverse = np.where(zero, 0.0, 1.0 / block_distances)
+        weighted = np.cumsum(one_hot * inverse[:, :, None], axis=1)
+        exact = np.cumsum(one_hot * zero[:, :, None], axis=1)
+        any_exact = np.cumsum(zero, axis=1) > 0
+        truth = y_test[block]
+        for i, point in enumerate(points):
+            k = min(point['n_neighbors'], k_max) - 1
+            if point['weights'] == 'distance':
+                votes = np.where(any_exact[:, k, None], exact[:, k], weighted[:, k])
+            else:
+                votes = counts[:, k]
+            correct[i] += np.count_nonzero(classes[np.argmax(votes, axis=1)] == truth)
+    return (correct / len(X_test)).tolist()
+
+
+def _tree_task(task):
+    path, fold, index, params = task
+    return fold, index, score_tree(path, fold, params)
+
+
+def _knn_task(task):
+    path, fold, points = task
+    return fold, score_knn(path, fold, points)
+
+
+def _ranked(points, fold_scores):
+    results = []
+    for params, scores in zip(points, fold_scores):
+        results.append({
+            'params': params,
+            'mean_accuracy': round(float(np.mean(scores)), 4),
+            'std_accuracy': round(float(np.std(scores)), 4),
+            'fold_accuracies': [round(score, 4) for score in scores]
+        })
+    # Stable sort: among equal scores the grid's earlier, usually simpler, point wins
+    results.sort(key=lambda result: -result['mean_accuracy'])
+    return {'best_params': results[0]['params'], 'best_accuracy': results[0]['mean_accuracy'], 'results': results}
+
+
+def select_models(X, y, grid=None, n_folds=5, n_workers=None, cache_dir=None, start_method='spawn', seed=42):
+    """Cross-validate the grid on X, y and return the best parameters and every score.
+
+    Each decision tree parameter set is one task per fold; each fold's KNN grid is one task.
+    With n_workers of 1 the tasks run in this process instead of a pool.
+    """
+    grid = merged_grid(grid)
+    n_workers = n_workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    path = FoldCache(cache_dir or os.path.join(os.getcwd(), '.fold_cache')).prepare(X, y, n_folds, seed)
+
+    tree_points = grid_points(grid['decision_tree'])
+    knn_points = grid_points(grid['knn'])
+    # Fold-major order, so a worker's consecutive tasks mostly reuse the fold it has loaded
+    tree_tasks = [(path, fold, i, params) for fold in range(n_folds) for i, params in enumerate(tree_points)]
+    knn_tasks = [(path, fold, knn_points) for fold in range(n_folds)]
+
+    tree_scores = np.zeros((len(tree_points), n_folds))
+    knn_scores = np.zeros((len(knn_points), n_folds))
+    if n_workers <= 1:
+        tree_done, knn_done = map(_tree_task, tree_tasks), map(_knn_task, knn_tasks)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context(start_method))
+        knn_done = executor.map(_knn_task, knn_tasks)
+        chunksize = max(1, len(tree_tasks) // (n_workers * 4))
+        tree_done = executor.map(_tree_task, tree_tasks, chunksize=chunksize)
+    try:
+        for fold, index, score in tree_done:
+            tree_scores[index, fold] = score
+        for fold, scores in knn_done:
+            knn_scores[:, fold] = scores
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        # Inline runs cached fold copies in this process; they would outlive the search
+        _fold.cache_clear()
+
+    seconds = time.perf_counter() - start
+    logger.info(f"Cross-validated {len(tree_points)} tree and {len(knn_points)} KNN parameter sets "
+                f"over {n_folds} folds with {n_workers} workers in {seconds:.1f}s")
+    return {
+        'decision_tree': _ranked(tree_points, tree_scores.tolist()),
+        'knn': _ranked(knn_points, knn_scores.tolist()),
+        'n_folds': n_folds,
+        'n_workers': n_workers,
+        'samples': len(y),
+        'seconds': round(seconds, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=None, help='default: one per CPU')
+    parser.add_argument('--grid', help='JSON file with a {"decision_tree": {...}, "knn": {...}} grid; '
+                                       'a model left out keeps the default grid')
+    parser.add_argument('--top', type=int, default=5, help='parameter sets listed per model')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from ml_service_real_data import RealDataMentalHealthPredictor, SELECTION_CACHE_DIR, TRAINING_START_METHOD
+    predictor = RealDataMentalHealthPredictor()
+    _, X, y, _ = predictor.training_data()
+    grid = None
+    if args.grid:
+        with open(args.grid) as f:
+            grid = json.load(f)
+
+    selection = select_models(
+        X, y, grid, n_folds=args.folds, n_workers=args.workers,
+        cache_dir=SELECTION_CACHE_DIR, start_method=TRAINING_START_METHOD
+    )
+    print(f"{selection['samples']} samples, {selection['n_folds']} folds, "
+          f"{selection['n_workers']} workers, {selection['seconds']}s")
+    for model in ('decision_tree', 'knn'):
+        print(f"\n{model}")
+        for result in selection[model]['results'][:args.top]:
+            print(f"  {result['mean_accuracy']:.4f} +/- {result['std_accuracy']:.4f}  {result['params']}")
+
+
+if __name__ == '__main__':
+    main()
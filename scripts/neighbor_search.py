@@ -0,0 +1,111 @@
+"""
+MindNest neighbor search backends
+Builds the KNN model for a selectable search backend: scikit-learn brute force, KD-tree or
+ball tree with a tuned leaf size, or an approximate IVF (inverted file) index built with
+NumPy k-means that the NumPy inference engine can search.
+"""
+
+import logging
+import time
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('brute', 'kd_tree', 'ball_tree', 'ivf')
+TREE_BACKENDS = ('kd_tree', 'ball_tree')
+LEAF_SIZE_CANDIDATES = (10, 20, 30, 40, 60, 100)
+
+
+def build_knn_model(X, y, backend='brute', n_neighbors=7, weights='distance', leaf_size='auto'):
+    """Fit a KNeighborsClassifier for the backend; 'ivf' fits brute force and is indexed separately"""
+    from sklearn.neighbors import KNeighborsClassifier
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown KNN backend {backend!r}, expected one of {BACKENDS}")
+
+    algorithm = 'brute' if backend == 'ivf' else backend
+    if algorithm in TREE_BACKENDS and leaf_size == 'auto':
+        leaf_size = tune_leaf_size(X, algorithm, n_neighbors)
+    elif leaf_size == 'auto':
+        leaf_size = 30
+
+    model = KNeighborsClassifier(
+        n_neighbors=n_neighbors,
+        weights=weights,
+        algorithm=algorithm,
+        leaf_size=int(leaf_size)
+    )
+    model.fit(X, y)
+    return model
+
+
+def tune_leaf_size(X, algorithm, n_neighbors=7, candidates=LEAF_SIZE_CANDIDATES, n_queries=200, seed=42):
+    """Pick the leaf size with the lowest single-query latency on a sample of training rows"""
+    X = np.asarray(X, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    queries = X[rng.choice(len(X), size=min(n_queries, len(X)), replace=False)]
+    tree_class = _tree_class(algorithm)
+
+    best_leaf_size, best_seconds = None, np.inf
+    for leaf_size in candidates:
+        tree = tree_class(X, leaf_size=leaf_size)
+        start = time.perf_counter()
+        for query in queries:
+            tree.query(query[np.newaxis, :], k=n_neighbors)
+        seconds = time.perf_counter() - start
+        if seconds < best_seconds:
+            best_leaf_size, best_seconds = leaf_size, seconds
+
+    logger.info(f"Tuned {algorithm} leaf_size={best_leaf_size} "
+                f"({best_seconds / len(queries) * 1e6:.0f}us per query)")
+    return best_leaf_size
+
+
+def _tree_class(algorithm):
+    from sklearn.neighbors import KDTree, BallTree
+    return KDTree if algorithm == 'kd_tree' else BallTree
+
+
+def build_ivf_index(X, n_lists=None, n_probe=8, n_iter=10, sample_size=50_000, seed=42):
+    """Partition X into n_lists k-means cells and return the index as NumPy arrays.
+
+    Queries search only the n_probe cells with the nearest centroids, so the search is
+    approximate; raise n_probe to trade speed for agreement with exact search.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    n_rows = len(X)
+    n_lists = int(n_lists or max(1, round(np.sqrt(n_rows))))
+    n_lists = min(n_lists, n_rows)
+    rng = np.random.default_rng(seed)
+
+    # Fit centroids on a sample, then assign every row
+    sample = X[rng.choice(n_rows, size=min(sample_size, n_rows), replace=False)]
+    centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+    for _ in range(n_iter):
+        assignment = _nearest_centroid(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        counts = np.bincount(assignment, minlength=n_lists)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, np.newaxis]
+
+    assignment = _nearest_centroid(X, centroids)
+    order = np.argsort(assignment, kind='stable')
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=n_lists))])
+
+    return {
+        'ivf_centroids': centroids,
+        'ivf_order': order.astype(np.intp),
+        'ivf_offsets': offsets.astype(np.intp),
+        'ivf_params': np.array([n_lists, min(n_probe, n_lists)], dtype=np.intp)
+    }
+
+
+def _nearest_centroid(X, centroids, chunk_size=8192):
+    assignment = np.empty(len(X), dtype=np.intp)
+    centroid_norms = np.einsum('ij,ij->i', centroids, centroids)
+    for start in range(0, len(X), chunk_size):
+        chunk = X[start:start + chunk_size]
+        # ||x||^2 is constant per row, so it does not change the argmin
+        assignment[start:start + chunk_size] = np.argmin(centroid_norms - 2.0 * (chunk @ centroids.T), axis=1)
+    return assignment
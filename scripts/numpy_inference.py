@@ -0,0 +1,511 @@
+"""
+MindNest NumPy inference engine
+Scores the exported decision tree, scaler and KNN with plain NumPy so request-time
+prediction skips scikit-learn's validation and dispatch. This module imports only
+NumPy; fitted scikit-learn objects are read by attribute when exporting.
+
+The arithmetic mirrors scikit-learn's own so probabilities are bit-identical:
+the tree compares float32-cast features against float64 thresholds, and KNN uses the
+||x||^2 - 2 x.y + ||y||^2 form with BLAS dot/gemm that scikit-learn's brute-force
+euclidean search uses. The optional compact KNN storage (compact_knn) trades that
+exactness for a training matrix a fraction of the size.
+"""
+
+import json
+import os
+import sys
+import numpy as np
+
+ENGINE_FORMAT_VERSION = 1
+KNN_CHUNK_SIZE = 256
+KNN_STORAGES = ('float64', 'float32', 'quantized')
+# Training rows decoded at a time when searching compact KNN storage
+KNN_BLOCK_ROWS = 16384
+
+
+def _sklearn_normalizes_tree_proba():
+    """scikit-learn < 1.4 stored class counts in tree_.value and normalized in predict_proba"""
+    sklearn = sys.modules.get('sklearn')
+    if sklearn is None:
+        return False
+    major, minor = (int(part) for part in sklearn.__version__.split('.')[:2])
+    return (major, minor) < (1, 4)
+
+
+def export_decision_tree(model):
+    """Flatten a fitted DecisionTreeClassifier into node arrays with per-node class probabilities"""
+    tree = model.tree_
+    n_classes = len(model.classes_)
+    proba = np.array(tree.value[:, 0, :n_classes], dtype=np.float64)
+    if _sklearn_normalizes_tree_proba():
+        normalizer = proba.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        proba /= normalizer
+
+    missing_go_to_left = getattr(tree, 'missing_go_to_left', None)
+    if missing_go_to_left is None:
+        missing_go_to_left = np.zeros(tree.node_count, dtype=np.uint8)
+
+    return {
+        'tree_children_left': np.array(tree.children_left, dtype=np.intp),
+        'tree_children_right': np.array(tree.children_right, dtype=np.intp),
+        'tree_feature': np.array(tree.feature, dtype=np.intp),
+        'tree_threshold': np.array(tree.threshold, dtype=np.float64),
+        'tree_missing_go_to_left': np.array(missing_go_to_left, dtype=bool),
+        'tree_proba': proba,
+        'tree_classes': np.array(model.classes_)
+    }
+
+
+def export_scaler(scaler):
+    """Export a fitted StandardScaler's mean and scale (None when disabled)"""
+    n_features = scaler.n_features_in_
+    mean = scaler.mean_ if scaler.with_mean else np.zeros(n_features)
+    scale = scaler.scale_ if scaler.with_std else np.ones(n_features)
+    return {
+        'scaler_mean': np.array(mean, dtype=np.float64),
+        'scaler_scale': np.array(scale, dtype=np.float64)
+    }
+
+
+def export_knn(model):
+    """Export a fitted euclidean KNeighborsClassifier's training matrix, labels and row norms"""
+    if model.effective_metric_ != 'euclidean':
+        raise ValueError(f"Only euclidean KNN can be exported, got {model.effective_metric_}")
+    if model.weights not in ('uniform', 'distance'):
+        raise ValueError(f"Only uniform or distance weights can be exported, got {model.weights}")
+
+    fit_X = np.ascontiguousarray(model._fit_X, dtype=np.float64)
+    return {
+        'knn_fit_X': fit_X,
+        'knn_norms': _row_norms(fit_X),
+        'knn_labels': np.array(model._y, dtype=np.intp),
+        'knn_classes': np.array(model.classes_),
+        'knn_params': np.array([model.n_neighbors, model.weights == 'distance'], dtype=np.intp)
+    }
+
+
+def compact_knn(knn_arrays, scaler_arrays, categorical_columns=(), storage='float32'):
+    """Re-encode an exported KNN training matrix compactly, replacing knn_fit_X and knn_norms.
+
+    Each scaled column is kept as x = offset + step * u. Categorical columns store their label
+    codes as u (uint8, uint16 past 256 categories), so they are exact; labels become uint8. Numeric columns store
+    float32 values, or with storage='quantized' one of 256 evenly spaced levels between the
+    column's minimum and maximum. Squared distances are then sum(step^2 * (u_q - u)^2).
+    """
+    if storage not in ('float32', 'quantized'):
+        raise ValueError(f"Unknown compact KNN storage {storage!r}, expected 'float32' or 'quantized'")
+    fit_X = np.asarray(knn_arrays['knn_fit_X'], dtype=np.float64)
+    n_features = fit_X.shape[1]
+    categorical = sorted(set(categorical_columns))
+    numeric = [j for j in range(n_features) if j not in categorical]
+    offset = np.zeros(n_features)
+    step = np.ones(n_features)
+
+    if storage == 'quantized':
+        low, high = fit_X[:, numeric].min(axis=0, initial=np.inf), fit_X[:, numeric].max(axis=0, initial=-np.inf)
+        levels = np.where(high > low, (high - low) / 255, 1.0)
+        values = np.rint((fit_X[:, numeric] - low) / levels).astype(np.uint8)
+        offset[numeric], step[numeric] = low, levels
+    else:
+        values = fit_X[:, numeric].astype(np.float32)
+
+    # The scaler mapped each code to (code - mean) / scale; undo it and check the codes are whole
+    mean = scaler_arrays['scaler_mean'][categorical]
+    scale = scaler_arrays['scaler_scale'][categorical]
+    raw = fit_X[:, categorical] * scale + mean
+    codes = np.rint(raw)
+    if not np.allclose(raw, codes, atol=1e-6) or (codes.size and codes.min() < 0):
+        raise ValueError("Categorical KNN columns do not hold non-negative integer codes")
+    code_dtype = np.uint8 if codes.max(initial=0) < 256 else np.uint16
+    offset[categorical], step[categorical] = -mean / scale, 1.0 / scale
+
+    columns = np.array(numeric + categorical, dtype=np.intp)
+    step_sq = step[columns] ** 2
+    arrays = {name: array for name, array in knn_arrays.items() if name not in ('knn_fit_X', 'knn_norms')}
+    labels = arrays['knn_labels']
+    arrays.update({
+        'knn_labels': labels.astype(np.uint8 if labels.max(initial=0) < 256 else np.int32),
+        'knn_compact_numeric': np.ascontiguousarray(values),
+        'knn_compact_codes': np.ascontiguousarray(codes.astype(code_dtype)),
+        'knn_compact_columns': columns,
+        'knn_compact_offset': offset[columns],
+        'knn_compact_step': step[columns],
+        # sum(step^2 * u^2) per row, the ||y||^2 term of the expanded distance
+        'knn_compact_norms': (
+            (values.astype(np.float64) ** 2) @ step_sq[:len(numeric)]
+            + (codes ** 2) @ step_sq[len(numeric):]
+        ).astype(np.float32)
+    })
+    return arrays
+
+
+def _row_norms(X):
+    # BLAS ddot per row, as scikit-learn computes squared row norms
+    return np.array([np.dot(row, row) for row in X], dtype=np.float64)
+
+
+class InferenceEngine:
+    """Decision tree, scaler and KNN scoring over exported NumPy arrays"""
+
+    def __init__(self, arrays, feature_names=None):
+        # Plain ndarray views keep memory-mapped storage without np.memmap's per-operation overhead
+        arrays = {name: np.asarray(array) for name, array in arrays.items()}
+        self.arrays = arrays
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.has_tree = 'tree_proba' in arrays
+        self.knn_compact = 'knn_compact_step' in arrays
+        self.has_knn = 'knn_fit_X' in arrays or self.knn_compact
+
+        if self.has_tree:
+            self.tree_proba = arrays['tree_proba']
+            self.tree_classes = arrays['tree_classes']
+            # Python lists make the single-row walk much cheaper than ndarray indexing
+            self._left = arrays['tree_children_left'].tolist()
+            self._right = arrays['tree_children_right'].tolist()
+            self._feature = arrays['tree_feature'].tolist()
+            self._threshold = arrays['tree_threshold'].tolist()
+            self._missing_left = arrays['tree_missing_go_to_left'].tolist()
+        if 'scaler_mean' in arrays:
+            self.scaler_mean = arrays['scaler_mean']
+            self.scaler_scale = arrays['scaler_scale']
+        if self.knn_compact:
+            self.knn_numeric = arrays['knn_compact_numeric']
+            self.knn_codes = arrays['knn_compact_codes']
+            self.knn_columns = arrays['knn_compact_columns']
+            self.knn_offset = arrays['knn_compact_offset']
+            self.knn_step = arrays['knn_compact_step']
+            self.knn_compact_norms = arrays['knn_compact_norms']
+            self._numeric_width = self.knn_numeric.shape[1]
+        elif self.has_knn:
+            self.knn_fit_X = arrays['knn_fit_X']
+            self.knn_fit_X_T = self.knn_fit_X.T
+            self.knn_norms = arrays['knn_norms']
+        if self.has_knn:
+            self.knn_labels = arrays['knn_labels']
+            self.knn_classes = arrays['knn_classes']
+            self.n_neighbors = int(arrays['knn_params'][0])
+            self.distance_weighted = bool(arrays['knn_params'][1])
+        # Optional approximate IVF index over knn_fit_X (see neighbor_search.build_ivf_index)
+        self.has_ivf = 'ivf_centroids' in arrays
+        if self.has_ivf:
+            self.ivf_centroids = arrays['ivf_centroids']
+            self.ivf_centroid_norms = np.einsum('ij,ij->i', self.ivf_centroids, self.ivf_centroids)
+            self.ivf_order = arrays['ivf_order']
+            self.ivf_offsets = arrays['ivf_offsets']
+            self.ivf_probe = int(arrays['ivf_params'][1])
+
+    @classmethod
+    def from_sklearn(cls, models, scaler, feature_names=None, knn_index=None, knn_storage='float64',
+                     categorical_columns=()):
+        """Export the fitted decision_tree / knn models and scaler, plus an optional KNN index.
+
+        knn_storage 'float32' or 'quantized' stores the KNN training matrix compactly (see
+        compact_knn); categorical_columns are the feature positions holding label codes.
+        """
+        if knn_storage not in KNN_STORAGES:
+            raise ValueError(f"Unknown KNN storage {knn_storage!r}, expected one of {KNN_STORAGES}")
+        arrays = {}
+        if 'decision_tree' in models:
+            arrays.update(export_decision_tree(models['decision_tree']))
+        if 'knn' in models:
+            knn_arrays, scaler_arrays = export_knn(models['knn']), export_scaler(scaler)
+            if knn_storage != 'float64':
+                knn_arrays = compact_knn(knn_arrays, scaler_arrays, categorical_columns, knn_storage)
+            arrays.update(knn_arrays)
+            arrays.update(scaler_arrays)
+            arrays.update(knn_index or {})
+        return cls(arrays, feature_names)
+
+    @property
+    def knn_storage(self):
+        """'float64', 'float32' or 'quantized'; None without a KNN model"""
+        if not self.has_knn:
+            return None
+        if not self.knn_compact:
+            return 'float64'
+        return 'float32' if self.knn_numeric.dtype == np.float32 else 'quantized'
+
+    def knn_nbytes(self):
+        """Bytes held by the KNN training data: matrix, row norms and labels"""
+        names = ('knn_fit_X', 'knn_norms', 'knn_labels', 'knn_compact_numeric', 'knn_compact_codes',
+                 'knn_compact_norms')
+        return sum(self.arrays[name].nbytes for name in names if name in self.arrays)
+
+    def save(self, directory):
+        """Write one .npy file per array plus a small JSON manifest"""
+        os.makedirs(directory, exist_ok=True)
+        for name, array in self.arrays.items():
+            np.save(os.path.join(directory, f"{name}.npy"), np.asarray(array), allow_pickle=False)
+        with open(os.path.join(directory, 'engine.json'), 'w') as f:
+            json.dump({
+                'format_version': ENGINE_FORMAT_VERSION,
+                'arrays': sorted(self.arrays),
+                'feature_names': self.feature_names
+            }, f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """Load an engine written by save, memory-mapping the arrays"""
+        with open(os.path.join(directory, 'engine.json')) as f:
+            manifest = json.load(f)
+        if manifest.get('format_version') != ENGINE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported inference engine format {manifest.get('format_version')}")
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode, allow_pickle=False)
+            for name in manifest['arrays']
+        }
+        return cls(arrays, manifest.get('feature_names'))
+
+    # Decision tree
+
+    def tree_leaves(self, X):
+        """Return the leaf index each row of X lands in"""
+        X = np.asarray(X)
+        if X.shape[0] == 1:
+            return np.array([self._tree_leaf_one(X[0])], dtype=np.intp)
+
+        X32 = X.astype(np.float32)
+        left = self.arrays['tree_children_left']
+        right = self.arrays['tree_children_right']
+        feature = self.arrays['tree_feature']
+        threshold = self.arrays['tree_threshold']
+        missing_left = self.arrays['tree_missing_go_to_left']
+
+        rows = np.arange(X32.shape[0])
+        nodes = np.zeros(X32.shape[0], dtype=np.intp)
+        active = left[nodes] != -1
+        while active.any():
+            idx = rows[active]
+            current = nodes[idx]
+            values = X32[idx, feature[current]]
+            go_left = (values <= threshold[current]) | (np.isnan(values) & missing_left[current])
+            nodes[idx] = np.where(go_left, left[current], right[current])
+            active = left[nodes] != -1
+        return nodes
+
+    def _tree_leaf_one(self, row):
+        row32 = row.astype(np.float32).tolist()
+        left, right = self._left, self._right
+        feature, threshold = self._feature, self._threshold
+        node = 0
+        while left[node] != -1:
+            value = row32[feature[node]]
+            if value <= threshold[node] or (value != value and self._missing_left[node]):
+                node = left[node]
+            else:
+                node = right[node]
+        return node
+
+    def decision_tree_proba(self, X):
+        return self.tree_proba[self.tree_leaves(X)]
+
+    # Scaler and KNN
+
+    def scale(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.scaler_mean) / self.scaler_scale
+
+    def kneighbors(self, X_scaled):
+        """Return (distances, indices) of the n_neighbors nearest training rows, nearest first"""
+        X_scaled = np.ascontiguousarray(X_scaled, dtype=np.float64)
+        n_queries = X_scaled.shape[0]
+        k = self.n_neighbors
+
+        if self.has_ivf:
+            return self._kneighbors_ivf(X_scaled)
+        if self.knn_compact:
+            return self._kneighbors_compact(X_scaled)
+        if n_queries == 1:
+            return self._kneighbors_one(X_scaled)
+
+        distances = np.empty((n_queries, k), dtype=np.float64)
+        indices = np.empty((n_queries, k), dtype=np.intp)
+        for start in range(0, n_queries, KNN_CHUNK_SIZE):
+            chunk = X_scaled[start:start + KNN_CHUNK_SIZE]
+            n_chunk = chunk.shape[0]
+            # NumPy uses gemv for a single row; pad to two rows so the dot products go
+            # through gemm like scikit-learn's and round identically
+            padded = np.vstack([chunk, chunk]) if n_chunk == 1 else chunk
+            # In place, in scikit-learn's order: (||x||^2 + -2 x.y) + ||y||^2
+            squared = (padded @ self.knn_fit_X_T)[:n_chunk]
+            squared *= -2.0
+            squared += _row_norms(chunk)[:, np.newaxis]
+            squared += self.knn_norms
+            np.maximum(squared, 0.0, out=squared)
+
+            nearest, nearest_sq = self._k_smallest(squared, k)
+            indices[start:start + n_chunk] = nearest
+            distances[start:start + n_chunk] = np.sqrt(nearest_sq)
+        return distances, indices
+
+    def _kneighbors_one(self, x_scaled):
+        """Single-query kneighbors with the same arithmetic and tie-breaking as the batch path"""
+        k = self.n_neighbors
+        squared = (np.vstack([x_scaled, x_scaled]) @ self.knn_fit_X_T)[0]
+        squared *= -2.0
+        squared += np.dot(x_scaled[0], x_scaled[0])
+        squared += self.knn_norms
+        np.maximum(squared, 0.0, out=squared)
+
+        kth = np.partition(squared, k - 1)[k - 1]
+        candidates = np.flatnonzero(squared <= kth)
+        # Candidates are in index order, so a stable sort breaks ties towards the lower index
+        nearest = candidates[np.argsort(squared[candidates], kind='stable')[:k]]
+        return np.sqrt(squared[nearest])[np.newaxis, :], nearest[np.newaxis, :]
+
+    def _kneighbors_ivf(self, X_scaled):
+        """Approximate kneighbors that only scans the rows of the nearest IVF cells"""
+        k = self.n_neighbors
+        n_queries = X_scaled.shape[0]
+        distances = np.empty((n_queries, k), dtype=np.float64)
+        indices = np.empty((n_queries, k), dtype=np.intp)
+        cell_order = np.argsort(self.ivf_centroid_norms - 2.0 * (X_scaled @ self.ivf_centroids.T), axis=1)
+
+        for q in range(n_queries):
+            x = X_scaled[q]
+            # Probe the nearest cells, widening until there are at least k candidates
+            n_probe = self.ivf_probe
+            while True:
+                cells = cell_order[q, :n_probe]
+                candidates = np.concatenate([
+                    self.ivf_order[self.ivf_offsets[c]:self.ivf_offsets[c + 1]] for c in cells
+                ])
+                if len(candidates) >= k or n_probe >= cell_order.shape[1]:
+                    break
+                n_probe *= 2
+            candidates.sort()
+
+            if self.knn_compact:
+                squared = self._compact_squared(self._compact_queries(x[np.newaxis, :]), candidates)[0]
+            else:
+                squared = self.knn_fit_X[candidates] @ x
+                squared *= -2.0
+                squared += np.dot(x, x)
+                squared += self.knn_norms[candidates]
+                np.maximum(squared, 0.0, out=squared)
+            nearest = np.argsort(squared, kind='stable')[:k]
+            indices[q] = candidates[nearest]
+            distances[q] = np.sqrt(squared[nearest])
+        return distances, indices
+
+    def _compact_queries(self, X_scaled):
+        """Queries in the compact coordinates: (step^2-weighted numeric, weighted codes, norms)"""
+        u = (X_scaled[:, self.knn_columns] - self.knn_offset) / self.knn_step
+        weighted = (u * self.knn_step ** 2).astype(np.float32)
+        norms = np.einsum('ij,ij->i', weighted, u.astype(np.float32))
+        return weighted[:, :self._numeric_width], weighted[:, self._numeric_width:], norms
+
+    def _compact_squared(self, queries, rows):
+        """float32 squared distances from prepared queries to the training rows (slice or indices)"""
+        weighted_numeric, weighted_codes, norms = queries
+        # Only this block of rows is ever decoded to float32
+        squared = weighted_numeric @ self.knn_numeric[rows].astype(np.float32, copy=False).T
+        if weighted_codes.shape[1]:
+            squared += weighted_codes @ self.knn_codes[rows].astype(np.float32).T
+        squared *= -2.0
+        bound = norms[:, np.newaxis] + self.knn_compact_norms[rows]
+        squared += bound
+        # Anything within float32 rounding of the expanded form is an exact match, so
+        # distance weighting gives duplicates all the weight as the float64 path does
+        bound *= 8 * np.finfo(np.float32).eps
+        squared[squared <= bound] = 0.0
+        return squared
+
+    def _kneighbors_compact(self, X_scaled):
+        """Exact search over compact storage, a block of training rows at a time"""
+        n_queries, n_train = X_scaled.shape[0], len(self.knn_labels)
+        k = min(self.n_neighbors, n_train)
+        if n_queries == 1:
+            return self._kneighbors_compact_one(X_scaled, k)
+        distances = np.empty((n_queries, k), dtype=np.float64)
+        indices = np.empty((n_queries, k), dtype=np.intp)
+
+        for start in range(0, n_queries, KNN_CHUNK_SIZE):
+            queries = self._compact_queries(X_scaled[start:start + KNN_CHUNK_SIZE])
+            # Each block's k nearest are candidates; one merge at the end picks the overall k
+            candidate_sq, candidates = [], []
+            for block_start in range(0, n_train, KNN_BLOCK_ROWS):
+                squared = self._compact_squared(queries, slice(block_start, block_start + KNN_BLOCK_ROWS))
+                if squared.shape[1] > k:
+                    nearest = np.argpartition(squared, k - 1, axis=1)[:, :k]
+                    squared = np.take_along_axis(squared, nearest, axis=1)
+                else:
+                    nearest = np.broadcast_to(np.arange(squared.shape[1]), squared.shape)
+                candidate_sq.append(squared)
+                candidates.append(nearest + block_start)
+            candidate_sq, candidates = np.hstack(candidate_sq), np.hstack(candidates)
+            # Nearest first, ties to the lower training row
+            order = np.lexsort((candidates, candidate_sq), axis=1)[:, :k]
+            indices[start:start + len(order)] = np.take_along_axis(candidates, order, axis=1)
+            distances[start:start + len(order)] = np.sqrt(np.take_along_axis(candidate_sq, order, axis=1))
+        return distances, indices
+
+    def _kneighbors_compact_one(self, x_scaled, k):
+        """Single-query compact search: one row of distances, then the same selection as _kneighbors_one"""
+        queries = self._compact_queries(x_scaled)
+        n_train = len(self.knn_labels)
+        squared = np.concatenate([
+            self._compact_squared(queries, slice(start, start + KNN_BLOCK_ROWS))[0]
+            for start in range(0, n_train, KNN_BLOCK_ROWS)
+        ])
+        kth = np.partition(squared, k - 1)[k - 1]
+        candidates = np.flatnonzero(squared <= kth)
+        nearest = candidates[np.argsort(squared[candidates], kind='stable')[:k]]
+        return np.sqrt(squared[nearest], dtype=np.float64)[np.newaxis, :], nearest[np.newaxis, :]
+
+    @staticmethod
+    def _k_smallest(squared, k):
+        """Indices and values of the k smallest entries per row, ascending, ties to the lower index.
+
+        scikit-learn's neighbor heaps only replace an entry on a strictly smaller
+        distance, so among equal distances the first training row wins; argmin returns
+        the first minimum, which gives the same choice. Overwrites `squared`.
+        """
+        rows = np.arange(squared.shape[0])
+        indices = np.empty((squared.shape[0], k), dtype=np.intp)
+        values = np.empty((squared.shape[0], k), dtype=np.float64)
+        for i in range(k):
+            nearest = np.argmin(squared, axis=1)
+            indices[:, i] = nearest
+            values[:, i] = squared[rows, nearest]
+            squared[rows, nearest] = np.inf
+        return indices, values
+
+    def knn_proba(self, X):
+        return self.knn_proba_scaled(self.scale(X))
+
+    def knn_proba_scaled(self, X_scaled):
+        distances, indices = self.kneighbors(X_scaled)
+        n_queries = distances.shape[0]
+
+        if self.distance_weighted:
+            with np.errstate(divide='ignore'):
+                weights = 1.0 / distances
+            # Exact matches get all the weight, as in scikit-learn
+            inf_mask = np.isinf(weights)
+            inf_row = np.any(inf_mask, axis=1)
+            weights[inf_row] = inf_mask[inf_row]
+        else:
+            weights = np.ones_like(distances)
+
+        # bincount adds each row's votes in neighbor order, like scikit-learn's per-neighbor loop
+        n_classes = len(self.knn_classes)
+        offsets = (np.arange(n_queries) * n_classes)[:, np.newaxis]
+        proba = np.bincount(
+            (self.knn_labels[indices] + offsets).ravel(), weights=weights.ravel(), minlength=n_queries * n_classes
+        ).reshape(n_queries, n_classes)
+        proba /= proba.sum(axis=1)[:, np.newaxis]
+        return proba
+
+    # Ensemble
+
+    def predict_proba(self, X, model_type='ensemble'):
+        """Return (probabilities, predicted classes) like the predictors' _score_matrix"""
+        if model_type == 'decision_tree':
+            probabilities = self.decision_tree_proba(X)
+            return probabilities, self.tree_classes[np.argmax(probabilities, axis=1)]
+        if model_type == 'knn':
+            probabilities = self.knn_proba(X)
+            return probabilities, self.knn_classes[np.argmax(probabilities, axis=1)]
+        probabilities = (self.decision_tree_proba(X) + self.knn_proba(X)) / 2
+        return probabilities, np.argmax(probabilities, axis=1)
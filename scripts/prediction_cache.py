@@ -0,0 +1,108 @@
+"""
+MindNest prediction cache
+Thread-safe LRU/TTL cache of model outputs keyed on the encoded feature vector
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+# Rough per-entry cost of the OrderedDict slot, key tuple and value tuple
+ENTRY_OVERHEAD_BYTES = 240
+
+
+class PredictionCache:
+    """Bounded LRU cache with optional time-to-live and hit/miss/eviction counters"""
+
+    def __init__(self, max_bytes=16 * 1024 * 1024, ttl_seconds=3600, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    @staticmethod
+    def make_key(model_version, model_type, feature_row):
+        """Canonical key: model version, model type and the raw bytes of the encoded row"""
+        # Adding 0.0 folds -0.0 into 0.0 so equal vectors always share a key
+        return (model_version, model_type, (feature_row + 0.0).tobytes())
+
+    @staticmethod
+    def _entry_size(key, probabilities):
+        return ENTRY_OVERHEAD_BYTES + len(key[2]) + probabilities.nbytes
+
+    def get(self, key):
+        """Return the cached (probabilities, prediction, leaf) for key, or None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, size = entry
+            if expires_at is not None and self.clock() >= expires_at:
+                del self._entries[key]
+                self._bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, probabilities, prediction, leaf=None):
+        """Store a model output and its decision tree leaf, evicting least recently used entries"""
+        if not self.enabled:
+            return
+        probabilities = probabilities.copy()
+        probabilities.flags.writeable = False
+        size = self._entry_size(key, probabilities)
+        if size > self.max_bytes:
+            return
+        expires_at = self.clock() + self.ttl_seconds if self.ttl_seconds else None
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._entries[key] = ((probabilities, prediction, leaf), expires_at, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry, e.g. after the models are retrained"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
@@ -0,0 +1,279 @@
+"""
+MindNest request profiler
+Opt-in cProfile of 1-in-N requests (or of requests carrying the profiling header), aggregated
+per process into pstats files and served over HTTP as a text report, a pstats download or
+collapsed stacks for a flame graph. When profiling is off, a request costs one clock read.
+"""
+
+import cProfile
+import io
+import json
+import logging
+import marshal
+import os
+import pstats
+import threading
+import time
+from collections import Counter
+from flask import Blueprint, Response, g, jsonify, request
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-MindNest-Profile'
+CONTROL_FILE = 'control.json'
+# How often each process re-reads the shared control file
+CONTROL_REFRESH_SECONDS = 1.0
+
+
+def _label(func):
+    filename, lineno, name = func
+    if filename == '~':
+        return name
+    return f"{name} ({os.path.basename(filename)}:{lineno})"
+
+
+def collapsed_stacks(stats, min_microseconds=1):
+    """Collapsed stacks ("a;b;c microseconds" lines) for flamegraph.pl or speedscope.
+
+    cProfile records caller -> callee edges rather than whole stacks, so each caller's share
+    of a callee's time is followed down the call graph, the usual approximation for turning a
+    profile into a flame graph. Branches under min_microseconds are dropped.
+    """
+    children = {}
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller in callers:
+            children.setdefault(caller, []).append(func)
+    counts = Counter()
+
+    def walk(func, path, seconds):
+        _, _, own_seconds, cumulative, _ = stats.stats[func]
+        scale = seconds / cumulative if cumulative else 0.0
+        path = path + (func,)
+        own = round(own_seconds * scale * 1e6)
+        if own >= min_microseconds:
+            counts[';'.join(_label(frame) for frame in path)] += own
+        for child in children.get(func, ()):
+            # Recursion is already inside the outer call's cumulative time
+            if child in path:
+                continue
+            child_seconds = stats.stats[child][4][func][3] * scale
+            if child_seconds * 1e6 >= min_microseconds:
+                walk(child, path, child_seconds)
+
+    for func, (_, _, _, cumulative, callers) in stats.stats.items():
+        if not callers:
+            walk(func, (), cumulative)
+    return counts
+
+
+class RequestProfiler:
+    """Profiles sampled requests and keeps this process's aggregate on disk.
+
+    The on/off switch, sample rate and resets live in a control file in output_dir so that
+    every worker of a pre-forked server follows the same settings.
+    """
+
+    def __init__(self, output_dir, sample_every=100, enabled=False, token=None):
+        self.output_dir = output_dir
+        self.token = token
+        self.enabled = enabled
+        self.sample_every = max(1, int(sample_every))
+        self.profiled_requests = 0
+        self._reset_at = 0.0
+        self._request_count = 0
+        self._stats = None
+        self._busy = threading.Lock()
+        self._lock = threading.Lock()
+        self._control_checked = 0.0
+        self._control_mtime = None
+
+    # Control
+
+    def _refresh_control(self):
+        now = time.monotonic()
+        if now - self._control_checked < CONTROL_REFRESH_SECONDS:
+            return
+        self._control_checked = now
+        path = os.path.join(self.output_dir, CONTROL_FILE)
+        try:
+            mtime = os.stat(path).st_mtime
+            if mtime == self._control_mtime:
+                return
+            with open(path) as f:
+                control = json.load(f)
+        except (OSError, ValueError):
+            return
+        self._control_mtime = mtime
+        self.enabled = bool(control.get('enabled', self.enabled))
+        self.sample_every = max(1, int(control.get('sample_every', self.sample_every)))
+        if control.get('reset_at', 0) > self._reset_at:
+            self._clear(control['reset_at'])
+
+    def configure(self, enabled=None, sample_every=None, reset=False):
+        """Update the shared control file; every process picks it up within a second"""
+        control = {'enabled': self.enabled, 'sample_every': self.sample_every, 'reset_at': self._reset_at}
+        if enabled is not None:
+            control['enabled'] = bool(enabled)
+        if sample_every is not None:
+            control['sample_every'] = max(1, int(sample_every))
+        if reset:
+            control['reset_at'] = time.time()
+            for name in self._output_files():
+                os.remove(os.path.join(self.output_dir, name))
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, CONTROL_FILE)
+        with open(f"{path}.{os.getpid()}.tmp", 'w') as f:
+            json.dump(control, f)
+        os.replace(f"{path}.{os.getpid()}.tmp", path)
+        self._control_checked = 0.0
+        self._refresh_control()
+        return self.status()
+
+    def authorized(self, supplied_token):
+        # Without a configured token the admin endpoints are closed to everyone
+        return self.token is not None and supplied_token == self.token
+
+    def should_profile(self, header_value):
+        self._refresh_control()
+        if header_value is not None:
+            # The header only works when a token is configured and matches
+            return self.token is not None and header_value == self.token
+        if not self.enabled:
+            return False
+        with self._lock:
+            self._request_count += 1
+            return self._request_count % self.sample_every == 0
+
+    # Profiling
+
+    def start(self):
+        """Begin profiling the current request; returns None if another request holds the profiler"""
+        if not self._busy.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def stop(self, profile):
+        try:
+            profile.disable()
+            with self._lock:
+                if self._stats is None:
+                    self._stats = pstats.Stats(profile)
+                else:
+                    self._stats.add(profile)
+                self.profiled_requests += 1
+                self._write()
+        except Exception as e:
+            logger.warning(f"Could not record request profile: {str(e)}")
+        finally:
+            self._busy.release()
+
+    # Output
+
+    def _clear(self, reset_at):
+        with self._lock:
+            self._stats = None
+            self.profiled_requests = 0
+            self._reset_at = reset_at
+
+    def _write(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        pid = os.getpid()
+        stats_path = os.path.join(self.output_dir, f'requests-{pid}.pstats')
+        self._stats.dump_stats(f'{stats_path}.tmp')
+        os.replace(f'{stats_path}.tmp', stats_path)
+
+    def _output_files(self):
+        if not os.path.isdir(self.output_dir):
+            return []
+        return sorted(name for name in os.listdir(self.output_dir) if name.endswith('.pstats'))
+
+    def merged_stats(self):
+        """pstats.Stats over every process's file, or None if nothing was profiled"""
+        paths = [os.path.join(self.output_dir, name) for name in self._output_files()]
+        return pstats.Stats(*paths, stream=io.StringIO()) if paths else None
+
+    def status(self):
+        return {
+            'enabled': self.enabled,
+            'sample_every': self.sample_every,
+            'header': PROFILE_HEADER if self.token is not None else None,
+            'profiled_requests': self.profiled_requests,
+            'output_dir': self.output_dir,
+            'files': self._output_files()
+        }
+
+
+def install_profiler(app, profiler):
+    """Wrap app's requests with the profiler and add the /profiling endpoints"""
+
+    @app.before_request
+    def start_request_profile():
+        # The profiling endpoints themselves are never profiled, so a reset stays empty
+        if request.blueprint != 'profiling' and profiler.should_profile(request.headers.get(PROFILE_HEADER)):
+            g.profile = profiler.start()
+
+    @app.teardown_request
+    def stop_request_profile(exc):
+        profile = g.pop('profile', None)
+        if profile is not None:
+            profiler.stop(profile)
+
+    blueprint = Blueprint('profiling', __name__)
+
+    @blueprint.before_request
+    def check_profiling_token():
+        if profiler.token is None:
+            return jsonify({
+                'status': 'error',
+                'message': 'Profiling endpoints are disabled until a profiling token is configured'
+            }), 403
+        if not profiler.authorized(request.headers.get(PROFILE_HEADER)):
+            return jsonify({
+                'status': 'error',
+                'message': f'Profiling endpoints need the {PROFILE_HEADER} token'
+            }), 403
+
+    @blueprint.route('/profiling', methods=['GET'])
+    def profiling_status():
+        """Profiler settings and output files"""
+        return jsonify(profiler.status())
+
+    @blueprint.route('/profiling', methods=['POST'])
+    def profiling_configure():
+        """Turn sampling on or off and set its rate: {"enabled": true, "sample_every": 50}"""
+        data = request.get_json(silent=True) or {}
+        try:
+            return jsonify(profiler.configure(data.get('enabled'), data.get('sample_every')))
+        except (TypeError, ValueError) as e:
+            return jsonify({'status': 'error', 'message': f'Invalid profiling settings: {str(e)}'}), 400
+
+    @blueprint.route('/profiling/stats', methods=['GET'])
+    def profiling_stats():
+        """Download the aggregate: ?format=text (default), pstats or collapsed"""
+        output_format = request.args.get('format', 'text')
+        try:
+            limit = int(request.args.get('limit', 60))
+        except ValueError:
+            return jsonify({'status': 'error', 'message': 'limit must be an integer'}), 400
+        stats = profiler.merged_stats()
+        if stats is None:
+            return jsonify({'status': 'error', 'message': 'No profiled requests yet'}), 404
+        if output_format == 'collapsed':
+            stacks = collapsed_stacks(stats)
+            return Response(''.join(f'{stack} {count}\n' for stack, count in stacks.most_common()),
+                            mimetype='text/plain')
+        if output_format == 'pstats':
+            return Response(marshal.dumps(stats.stats), mimetype='application/octet-stream',
+                            headers={'Content-Disposition': 'attachment; filename=requests.pstats'})
+        stats.sort_stats('cumulative').print_stats(limit)
+        return Response(stats.stream.getvalue(), mimetype='text/plain')
+
+    @blueprint.route('/profiling/stats', methods=['DELETE'])
+    def profiling_reset():
+        """Discard every process's profiles"""
+        return jsonify(profiler.configure(reset=True))
+
+    app.register_blueprint(blueprint)
+    return profiler
@@ -0,0 +1,248 @@
+"""
+MindNest rule engine
+Recommendations and risk factors declared as a table of rules (conditions, message,
+priority) and compiled once into NumPy comparisons, so a batch of assessments is checked
+against every rule with one array operation per condition. This module imports only NumPy.
+
+A rule file is JSON with one section per output list:
+
+    {
+      "defaults": {"sleep_hours": 7},
+      "recommendations": {
+        "limit": 6,
+        "rules": [
+          {"when": [["risk_level", "==", 0]], "message": "...", "priority": 2},
+          {"when": [["sleep_hours", "<", 6]], "message": "...", "priority": 1}
+        ]
+      },
+      "risk_factors": {"fallback": "...", "rules": [...]}
+    }
+
+A rule fires when all of its conditions hold. Fired messages are listed by descending
+priority, in table order within a priority, and cut to the section's limit; a section with
+a fallback returns it when no rule fires. Conditions compare a field with a number
+(<, <=, >, >=, ==, !=), a string (==, !=) or a list of strings (in, not_in). Missing
+numeric fields take their value from "defaults"; a missing categorical field equals nothing.
+"""
+
+import json
+import operator
+import numpy as np
+
+# Operator -> (NumPy comparison for batches, scalar comparison for single rows)
+NUMERIC_OPERATORS = {
+    '<': (np.less, operator.lt), '<=': (np.less_equal, operator.le),
+    '>': (np.greater, operator.gt), '>=': (np.greater_equal, operator.ge),
+    '==': (np.equal, operator.eq), '!=': (np.not_equal, operator.ne)
+}
+CATEGORY_OPERATORS = {
+    '==': operator.eq, '!=': operator.ne,
+    'in': lambda value, values: value in values, 'not_in': lambda value, values: value not in values
+}
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _hashable(value):
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+class Condition:
+    """field <operator> threshold, with the threshold checked against the operator"""
+
+    def __init__(self, field, op, threshold):
+        self.field = field
+        self.op = op
+        self.numeric = _is_number(threshold)
+        if self.numeric:
+            if op not in NUMERIC_OPERATORS:
+                raise ValueError(f"Operator {op!r} cannot compare {field} with a number")
+            self.threshold = float(threshold)
+            self.test = NUMERIC_OPERATORS[op][1]
+        else:
+            if op not in CATEGORY_OPERATORS:
+                raise ValueError(f"Operator {op!r} cannot compare {field} with {threshold!r}")
+            if op in ('in', 'not_in') and not isinstance(threshold, list):
+                raise ValueError(f"{field} {op} needs a list of values")
+            self.threshold = frozenset(threshold) if op in ('in', 'not_in') else threshold
+            self.test = CATEGORY_OPERATORS[op]
+
+    @property
+    def key(self):
+        return self.field, self.op, self.threshold
+
+
+class RuleSection:
+    """One output list: its rules ordered by priority, as sets of condition ids"""
+
+    def __init__(self, name, section, condition_id):
+        self.name = name
+        self.limit = section.get('limit')
+        self.fallback = section.get('fallback')
+        rules = [rule for _, rule in sorted(
+            enumerate(section['rules']), key=lambda item: (-item[1].get('priority', 0), item[0])
+        )]
+        for rule in rules:
+            if not rule.get('when'):
+                raise ValueError(f"{name} rule {rule['message']!r} has no conditions")
+        self.messages = np.array([rule['message'] for rule in rules], dtype=object)
+        self.rule_conditions = [[condition_id(Condition(*condition)) for condition in rule['when']] for rule in rules]
+        # Single rows: a rule fires when its ids are a subset of the passed ids
+        self._single = list(zip(self.messages.tolist(), map(frozenset, self.rule_conditions)))
+        # Batches: the rules' condition columns side by side, and-reduced from each rule's start
+        self._columns = np.array([i for ids in self.rule_conditions for i in ids], dtype=np.intp)
+        self._starts = np.cumsum([0] + [len(ids) for ids in self.rule_conditions[:-1]])
+
+    def _finish(self, messages):
+        messages = messages[:self.limit]
+        return messages if messages or self.fallback is None else [self.fallback]
+
+    def evaluate_one(self, passed):
+        """Fired messages given the set of condition ids one row passes"""
+        return self._finish([message for message, ids in self._single if ids <= passed])
+
+    def evaluate(self, passed):
+        """Fired messages for every row of an (n_rows, n_conditions) pass matrix, as lists"""
+        if len(passed) == 0:
+            return []
+        fired = np.logical_and.reduceat(passed[:, self._columns], self._starts, axis=1)
+        # Rows firing the same rules share one message list, so lists are built per pattern
+        packed = np.packbits(fired, axis=1)
+        if packed.shape[1] <= 8:
+            keys = np.zeros((len(packed), 8), dtype=np.uint8)
+            keys[:, :packed.shape[1]] = packed
+            keys = keys.view(np.uint64).ravel()
+        else:
+            keys = np.ascontiguousarray(packed).view(np.dtype((np.void, packed.shape[1]))).ravel()
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        lists = [self._finish(self.messages[fired[row]].tolist()) for row in first.tolist()]
+        return [list(lists[k]) for k in inverse.reshape(-1).tolist()]
+
+
+class RuleSet:
+    """Compiled rule table; evaluate() returns every section's messages for a batch"""
+
+    def __init__(self, table):
+        self.defaults = dict(table.get('defaults', {}))
+        # Distinct conditions across all sections, each tested once per row
+        self.conditions = []
+        ids = {}
+
+        def condition_id(condition):
+            if condition.key not in ids:
+                ids[condition.key] = len(self.conditions)
+                self.conditions.append(condition)
+            return ids[condition.key]
+
+        self.sections = {
+            name: RuleSection(name, section, condition_id) for name, section in table.items() if name != 'defaults'
+        }
+        numeric = [i for i, c in enumerate(self.conditions) if c.numeric]
+        self.numeric_fields = list(dict.fromkeys(self.conditions[i].field for i in numeric))
+        # Numeric conditions sharing an operator are compared in one operation per batch:
+        # (comparison, condition ids, their field columns, thresholds)
+        self.operator_groups = []
+        for op in sorted({self.conditions[i].op for i in numeric}):
+            group = [i for i in numeric if self.conditions[i].op == op]
+            self.operator_groups.append((
+                NUMERIC_OPERATORS[op][0],
+                np.array(group, dtype=np.intp),
+                np.array([self.numeric_fields.index(self.conditions[i].field) for i in group], dtype=np.intp),
+                np.array([self.conditions[i].threshold for i in group])
+            ))
+        # Categorical conditions grouped by field, so each field is factorized once per batch
+        self.category_groups = {}
+        for i, condition in enumerate(self.conditions):
+            if not condition.numeric:
+                self.category_groups.setdefault(condition.field, []).append(i)
+        self._tests = [(c.field, c.test, c.threshold) for c in self.conditions]
+        self._positions = {}
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def evaluate(self, assessments, matrix=None, matrix_fields=(), extra=None):
+        """{section: [messages for each assessment]} for a list of assessment dicts.
+
+        Numeric fields are read, in order of preference, from extra ({field: array of N
+        values}), from the column of matrix named in matrix_fields (an already parsed
+        (N, len(matrix_fields)) float array such as the encoded features), or from the dicts.
+        """
+        matrix_fields = tuple(matrix_fields)
+        positions = self._positions.get(matrix_fields)
+        if positions is None:
+            positions = self._positions[matrix_fields] = {field: j for j, field in enumerate(matrix_fields)}
+        extra = extra or {}
+        if len(assessments) == 1:
+            passed = self._passed_one(assessments[0], matrix, matrix_fields, extra)
+            return {name: [section.evaluate_one(passed)] for name, section in self.sections.items()}
+        passed = self._passed(assessments, matrix, positions, extra)
+        return {name: section.evaluate(passed) for name, section in self.sections.items()}
+
+    def _number(self, field, assessments, matrix, positions, extra):
+        if field in extra:
+            return np.asarray(extra[field], dtype=np.float64)
+        if field in positions:
+            return matrix[:, positions[field]]
+        default = self.defaults.get(field, np.nan)
+        return np.array([_to_float(a.get(field, default)) for a in assessments], dtype=np.float64)
+
+    def _passed(self, assessments, matrix, positions, extra):
+        """(n_rows, n_conditions) boolean matrix of the conditions each row passes"""
+        n_rows = len(assessments)
+        passed = np.empty((n_rows, len(self.conditions)), dtype=bool)
+        if self.numeric_fields:
+            values = np.empty((n_rows, len(self.numeric_fields)))
+            for j, field in enumerate(self.numeric_fields):
+                values[:, j] = self._number(field, assessments, matrix, positions, extra)
+            for compare, ids, columns, thresholds in self.operator_groups:
+                passed[:, ids] = compare(values[:, columns], thresholds)
+        for field, ids in self.category_groups.items():
+            # Decide each distinct value once, then broadcast the answers through the codes
+            values = [a.get(field) for a in assessments]
+            try:
+                uniques = dict.fromkeys(values)
+            except TypeError:
+                values = [_hashable(value) for value in values]
+                uniques = dict.fromkeys(values)
+            codes = dict(zip(uniques, range(len(uniques))))
+            rows = np.fromiter(map(codes.__getitem__, values), dtype=np.intp, count=n_rows)
+            decided = np.array(
+                [[self.conditions[i].test(value, self.conditions[i].threshold) for i in ids] for value in uniques],
+                dtype=bool
+            )
+            passed[:, ids] = decided[rows]
+        return passed
+
+    def _passed_one(self, assessment, matrix, matrix_fields, extra):
+        # A single row is cheaper to check in plain Python than through array operations
+        values = dict(zip(matrix_fields, matrix[0].tolist())) if matrix is not None else {}
+        for field in self.numeric_fields:
+            if field in extra:
+                values[field] = float(extra[field][0])
+            elif field not in values:
+                values[field] = _to_float(assessment.get(field, self.defaults.get(field, np.nan)))
+        for field in self.category_groups:
+            values[field] = assessment.get(field)
+        try:
+            return {i for i, (field, test, threshold) in enumerate(self._tests) if test(values[field], threshold)}
+        except TypeError:
+            # An unhashable answer in a value list test; compare its repr like batches do
+            for field in self.category_groups:
+                values[field] = _hashable(values[field])
+            return {i for i, (field, test, threshold) in enumerate(self._tests) if test(values[field], threshold)}
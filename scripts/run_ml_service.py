@@ -1,26 +1,16 @@
 """
 Production runner for MindNest ML Service
-Uses Gunicorn for production deployment
+Runs the questionnaire service under the pre-forking Gunicorn server in serve_production.py,
+which loads (or trains) the models once in the master and shares them with the workers.
+Equivalent to: python serve_production.py --service questionnaire --bind 0.0.0.0:5000
 """
 
 import os
 import sys
-from ml_service import app, predictor, logger
-
-def setup_production():
-    """Setup production environment"""
-    # Train models on startup
-    logger.info("Production startup: Training ML models...")
-    try:
-        predictor.train_models()
-        logger.info("Models trained successfully for production!")
-    except Exception as e:
-        logger.error(f"Failed to train models: {e}")
-        sys.exit(1)
 
 if __name__ == "__main__":
-    setup_production()
-    
-    # Run with Gunicorn in production
-    # Command: gunicorn -w 4 -b 0.0.0.0:5000 run_ml_service:app
-    app.run(host='0.0.0.0', port=5000, debug=False)
+    # Pre-forking Gunicorn server: models are loaded once in the master and shared
+    # copy-on-write by the workers (see serve_production.py for the options)
+    from serve_production import main
+    sys.argv[1:1] = ['--service', 'questionnaire', '--bind', os.environ.get('MINDNEST_BIND', '0.0.0.0:5000')]
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+MindNest production server
+Loads or trains the model set once in a Gunicorn master process, then forks workers that
+share it copy-on-write instead of each worker loading or training its own copy
+
+Usage: python serve_production.py [--service real_data|questionnaire] [--workers 4] [--bind 0.0.0.0:8000]
+
+Send SIGHUP to the master for a graceful restart: it reloads the latest model bundle,
+starts fresh workers from it and lets the old workers finish their requests first.
+A training job that completes in any worker, or a promotion, rollback or shadow change made
+through the model registry, triggers the same restart, so every worker moves to the new
+model version and shadow candidate.
+"""
+
+import argparse
+import gc
+import importlib
+import logging
+import os
+import signal
+from gunicorn.app.base import BaseApplication
+from model_bundle import latest_version
+
+logger = logging.getLogger(__name__)
+
+SERVICES = {
+    'real_data': 'ml_service_real_data',
+    'questionnaire': 'ml_service'
+}
+DEFAULT_WORKERS = int(os.environ.get('MINDNEST_WORKERS', str(min(4, os.cpu_count() or 1))))
+DEFAULT_BIND = os.environ.get('MINDNEST_BIND', '0.0.0.0:8000')
+GRACEFUL_TIMEOUT = int(os.environ.get('MINDNEST_GRACEFUL_TIMEOUT', '30'))
+
+
+def prepare_models(service):
+    """Load the latest bundle in the master, training one first if there is none"""
+    predictor = service.predictor
+    if not predictor.load_models():
+        logger.info("No model bundle found, training models in the master process...")
+        predictor.train_models()
+        # Reload the saved bundle so the arrays are file-backed memory maps, shared through
+        # the page cache rather than private heap copies
+        predictor.load_models()
+    if not predictor.ready:
+        raise RuntimeError("No trained models available")
+    logger.info(f"Master serving model bundle {predictor.model_version}")
+    if hasattr(service, 'startup'):
+        service.startup.mark('models_ready')
+    freeze_heap()
+
+
+def freeze_heap():
+    """Move every object loaded so far out of the garbage collector's reach.
+
+    Collections in the workers would otherwise write to the headers of the inherited
+    objects and copy the pages they live on.
+    """
+    gc.collect()
+    gc.freeze()
+
+
+class PreforkServer(BaseApplication):
+    """Gunicorn application that preloads one ML service in the master"""
+
+    def __init__(self, service_name, options):
+        self.service = importlib.import_module(SERVICES[service_name])
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+        self.cfg.set('preload_app', True)
+        self.cfg.set('on_reload', self.on_reload)
+        self.cfg.set('post_fork', self.post_fork)
+
+    def load(self):
+        prepare_models(self.service)
+        return self.service.app
+
+    def on_reload(self, server):
+        """SIGHUP: pick up the latest bundle in the master before new workers are forked"""
+        predictor = self.service.predictor
+        if latest_version(predictor.model_dir) != predictor.model_version and predictor.load_models():
+            logger.info(f"Master reloaded model bundle {predictor.model_version}")
+            freeze_heap()
+
+    def post_fork(self, server, worker):
+        """Catch up with a bundle published after the master last loaded one"""
+        predictor = self.service.predictor
+        if latest_version(predictor.model_dir) != predictor.model_version:
+            predictor.load_models()
+        # Training in this worker rolls every worker onto the new version
+        self.service.training_jobs.add_listener(restart_workers_on_success)
+        # So do promotions, rollbacks and shadow changes made through the model registry
+        if hasattr(self.service, 'resume_shadow'):
+            self.service.resume_shadow()
+            predictor.registry.add_listener(restart_workers_on_registry_change)
+
+
+def restart_workers_on_success(job):
+    """Ask the master for a graceful restart once a training job has published"""
+    if job.status == 'succeeded':
+        logger.info(f"Model bundle {job.model_version} published, restarting workers")
+        os.kill(os.getppid(), signal.SIGHUP)
+
+
+def restart_workers_on_registry_change(registry):
+    """Ask the master for a graceful restart so every worker follows the registry"""
+    logger.info(f"Model registry changed (live {registry.live_version()}), restarting workers")
+    os.kill(os.getppid(), signal.SIGHUP)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--service', choices=sorted(SERVICES), default='real_data')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--bind', default=DEFAULT_BIND)
+    parser.add_argument('--timeout', type=int, default=60)
+    parser.add_argument('--keepalive', type=int, default=5,
+                        help='Seconds to hold an idle keep-alive connection (needs --threads > 1)')
+    parser.add_argument('--max-requests', type=int, default=0,
+                        help='Recycle a worker after this many requests (0 disables)')
+    args = parser.parse_args()
+
+    options = {
+        'bind': args.bind,
+        'workers': args.workers,
+        'threads': args.threads,
+        'timeout': args.timeout,
+        'keepalive': args.keepalive,
+        'graceful_timeout': GRACEFUL_TIMEOUT,
+        'max_requests': args.max_requests,
+        'max_requests_jitter': args.max_requests // 10
+    }
+    PreforkServer(args.service, options).run()
+
+
+if __name__ == '__main__':
+    main()
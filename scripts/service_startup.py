@@ -0,0 +1,78 @@
+"""
+MindNest service startup
+Loads the model set on a background thread once the server is listening, so /health can
+answer while the bundle is still being read, and records how long after the process started
+the service reached each startup milestone: listening, first healthy answer, models ready and
+first prediction.
+"""
+
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def process_age():
+    """Seconds since this process started, or None where /proc is not available"""
+    try:
+        with open('/proc/self/stat') as f:
+            # Fields after the parenthesised command name; starttime is field 22 of the line
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return max(0.0, uptime - start_ticks / os.sysconf('SC_CLK_TCK'))
+
+
+class ServiceStartup:
+    """Startup milestones of one process and the background model load"""
+
+    def __init__(self):
+        # Without /proc the clock starts when this module is imported
+        self.origin = time.monotonic() - (process_age() or 0.0)
+        self.milestones = {}
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def mark(self, milestone):
+        """Record the first time a milestone is reached; later calls are a dict lookup"""
+        if milestone in self.milestones:
+            return
+        with self._lock:
+            if milestone in self.milestones:
+                return
+            self.milestones[milestone] = round(time.monotonic() - self.origin, 3)
+        logger.info(f"Startup: {milestone} after {self.milestones[milestone]:.3f}s")
+
+    def seconds(self):
+        """{milestone: seconds since process start} for the milestones reached so far"""
+        return dict(self.milestones)
+
+    @property
+    def loading(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def load_in_background(self, load_fn):
+        """Run load_fn once on a daemon thread; later calls while it runs do nothing"""
+        with self._lock:
+            if self.loading:
+                return False
+            self._thread = threading.Thread(target=self._load, args=(load_fn,), name='model-loader', daemon=True)
+            self._thread.start()
+        return True
+
+    def _load(self, load_fn):
+        try:
+            load_fn()
+        except Exception as e:
+            logger.error(f"Background model loading failed: {str(e)}")
+
+    def wait(self, timeout=None):
+        """Block until the background load has finished; returns False on timeout"""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return not self.loading
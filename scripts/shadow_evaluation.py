@@ -0,0 +1,153 @@
+"""
+MindNest shadow evaluation
+Replays a sample of live predictions against a candidate model set on a background
+executor and records how often the candidate agrees with the live model and how long it
+takes, so a new model can be trialled on real traffic before it is promoted.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _percentiles(seconds):
+    if not seconds:
+        return None
+    p50, p95, p99 = np.percentile(np.fromiter(seconds, dtype=float), [50, 95, 99]) * 1000
+    return {'p50': round(p50, 3), 'p95': round(p95, 3), 'p99': round(p99, 3)}
+
+
+class ShadowEvaluator:
+    """Scores sampled requests with a candidate model set off the request path.
+
+    offer() only draws the sample and queues the work; scoring and bookkeeping run on one
+    background thread. While max_pending samples are waiting, new ones are dropped and
+    counted rather than queued, so a slow candidate never builds up a backlog.
+    score_fn(candidate, assessment, model_type) returns a result with 'severity' and
+    'confidence', like the live prediction it is compared with.
+    """
+
+    def __init__(self, score_fn, sample_rate=0.1, max_pending=100, latency_window=1000):
+        self.score_fn = score_fn
+        self.sample_rate = sample_rate
+        self.max_pending = max_pending
+        self.latency_window = latency_window
+        self._executor = None
+        self._candidate = None
+        self._lock = threading.Lock()
+        self._reset(None)
+
+    def _reset(self, version):
+        self.version = version
+        self.started_at = datetime.now().isoformat() if version else None
+        self._pending = 0
+        self._counts = {'sampled': 0, 'scored': 0, 'dropped': 0, 'errors': 0, 'agreed': 0}
+        self._by_model_type = {}
+        self._confusion = {}
+        self._confidence_delta = 0.0
+        self._live_seconds = deque(maxlen=self.latency_window)
+        self._shadow_seconds = deque(maxlen=self.latency_window)
+
+    @property
+    def active(self):
+        return self._candidate is not None
+
+    def start(self, candidate, version, sample_rate=None):
+        """Start (or restart) shadowing with a candidate model set; statistics start over"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='shadow')
+            if sample_rate is not None:
+                self.sample_rate = sample_rate
+            self._reset(version)
+            self._candidate = candidate
+        logger.info(f"Shadowing model version {version} on {self.sample_rate:.0%} of predictions")
+
+    def stop(self):
+        """Stop shadowing; returns the final statistics"""
+        with self._lock:
+            stats = self._stats()
+            self._candidate = None
+            self._reset(None)
+        return stats
+
+    def offer(self, assessment, model_type, live_result, live_seconds):
+        """Queue a live prediction for the candidate if it is sampled; never blocks on scoring"""
+        candidate = self._candidate
+        if candidate is None or random.random() >= self.sample_rate:
+            return False
+        with self._lock:
+            if candidate is not self._candidate:
+                return False
+            self._counts['sampled'] += 1
+            if self._pending >= self.max_pending:
+                self._counts['dropped'] += 1
+                return False
+            self._pending += 1
+        self._executor.submit(self._score, candidate, assessment, model_type, live_result, live_seconds)
+        return True
+
+    def _score(self, candidate, assessment, model_type, live_result, live_seconds):
+        start = time.perf_counter()
+        try:
+            result = self.score_fn(candidate, assessment, model_type)
+            error = None
+        except Exception as e:
+            result, error = None, e
+        shadow_seconds = time.perf_counter() - start
+
+        with self._lock:
+            if candidate is not self._candidate:
+                # Shadowing stopped or moved to another candidate while this was queued
+                return
+            self._pending -= 1
+            if error is not None:
+                self._counts['errors'] += 1
+                logger.warning(f"Shadow prediction with {self.version} failed: {str(error)}")
+                return
+            live, shadow = live_result['severity'], result['severity']
+            agreed = live == shadow
+            self._counts['scored'] += 1
+            self._counts['agreed'] += agreed
+            by_type = self._by_model_type.setdefault(model_type, [0, 0])
+            by_type[0] += 1
+            by_type[1] += agreed
+            row = self._confusion.setdefault(live, {})
+            row[shadow] = row.get(shadow, 0) + 1
+            self._confidence_delta += result['confidence'] - live_result['confidence']
+            self._live_seconds.append(live_seconds)
+            self._shadow_seconds.append(shadow_seconds)
+
+    def _stats(self):
+        scored = self._counts['scored']
+        return {
+            'active': self.active,
+            'candidate_version': self.version,
+            'started_at': self.started_at,
+            'sample_rate': self.sample_rate,
+            **self._counts,
+            'pending': self._pending,
+            'agreement_rate': round(self._counts['agreed'] / scored, 4) if scored else None,
+            'agreement_by_model_type': {
+                model_type: round(agreed / total, 4) for model_type, (total, agreed) in self._by_model_type.items()
+            },
+            # live severity -> {candidate severity: count}
+            'confusion': {live: dict(row) for live, row in self._confusion.items()},
+            'mean_confidence_delta': round(self._confidence_delta / scored, 2) if scored else None,
+            'latency_ms': {
+                'live': _percentiles(self._live_seconds),
+                'shadow': _percentiles(self._shadow_seconds)
+            }
+        }
+
+    def stats(self):
+        """Agreement and latency statistics since shadowing started"""
+        with self._lock:
+            return self._stats()
@@ -0,0 +1,119 @@
+"""
+MindNest streaming training helpers
+Encode dataset chunks as they are read and accumulate them in an on-disk feature matrix that
+is memory-mapped for training, so peak memory follows the chunk and sample sizes instead of
+the size of the data
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+
+# pandas 3 keeps missing values as NaN through astype(str); hashing NaN is identity-based,
+# so every missing value is filed under one key
+_MISSING = object()
+
+
+class CategoryCoder:
+    """Gives category values provisional ids as chunks arrive, then sorts them like LabelEncoder.
+
+    Chunks are encoded before every category has been seen, so the ids are in first-seen
+    order. remaps() turns them into the codes the fitted LabelEncoders assign.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self._ids = {column: {} for column in self.columns}
+
+    def encode(self, column, values):
+        """Provisional float64 codes for a chunk of one categorical column"""
+        codes, uniques = pd.factorize(values.astype(str), use_na_sentinel=False)
+        ids = self._ids[column]
+        lookup = np.array(
+            [ids.setdefault(_MISSING if pd.isna(value) else value, len(ids)) for value in uniques],
+            dtype=np.float64
+        )
+        return lookup[codes]
+
+    def label_encoders(self):
+        """(LabelEncoders fitted on every value seen, provisional id -> code arrays)"""
+        encoders, remaps = {}, {}
+        for column, ids in self._ids.items():
+            values = np.array([np.nan if value is _MISSING else value for value in ids], dtype=object)
+            encoder = LabelEncoder().fit(values)
+            encoders[column] = encoder
+            remaps[column] = encoder.transform(values).astype(np.float64)
+        return encoders, remaps
+
+
+class MatrixWriter:
+    """Appends row blocks of a fixed width to a raw file, to be read back as a MappedMatrix"""
+
+    def __init__(self, path, n_columns, dtype=np.float64):
+        self.path = path
+        self.n_columns = n_columns
+        self.dtype = np.dtype(dtype)
+        self.rows = 0
+        self._file = open(path, 'wb')
+
+    def append(self, block):
+        block = np.ascontiguousarray(block, dtype=self.dtype).reshape(-1, self.n_columns)
+        self._file.write(block.tobytes())
+        self.rows += len(block)
+
+    def close(self):
+        """Finish writing and return the data as a MappedMatrix"""
+        self._file.close()
+        return MappedMatrix(self.path, self.rows, self.n_columns, self.dtype)
+
+
+class MappedMatrix:
+    """A (rows, n_columns) array on disk, memory-mapped one row block at a time.
+
+    Pages of a mapping count towards RSS for as long as it is open, so each block is mapped
+    on its own and unmapped when the caller drops it; mapping the whole file would make the
+    peak RSS grow with the data.
+    """
+
+    def __init__(self, path, rows, n_columns, dtype=np.float64):
+        self.path = path
+        self.rows = rows
+        self.n_columns = n_columns
+        self.dtype = np.dtype(dtype)
+
+    def __len__(self):
+        return self.rows
+
+    def block(self, rows, mode='r'):
+        """np.memmap of the rows in the slice rows (1-D for a single column)"""
+        shape = (rows.stop - rows.start, self.n_columns) if self.n_columns > 1 else (rows.stop - rows.start,)
+        offset = rows.start * self.n_columns * self.dtype.itemsize
+        return np.memmap(self.path, dtype=self.dtype, mode=mode, offset=offset, shape=shape)
+
+
+def row_blocks(n_rows, block_rows):
+    """Slices covering range(n_rows) in blocks of at most block_rows"""
+    for start in range(0, n_rows, block_rows):
+        yield slice(start, min(start + block_rows, n_rows))
+
+
+def chunk_rows_for_budget(path, budget_bytes, sample_rows=1000):
+    """CSV rows per chunk so one parsed chunk stays within budget_bytes"""
+    sample = pd.read_csv(path, nrows=sample_rows)
+    if sample.empty:
+        return sample_rows
+    row_bytes = sample.memory_usage(deep=True).sum() / len(sample)
+    return max(1000, int(budget_bytes / row_bytes))
+
+
+def bernoulli_rows(rng, mask_block, probability):
+    """Positions of the True entries of mask_block, each kept with the given probability"""
+    positions = np.flatnonzero(mask_block)
+    if probability >= 1:
+        return positions
+    return positions[rng.random(len(positions)) < probability]
+
+
+def file_size(path):
+    return os.path.getsize(path) if path and os.path.exists(path) else 0
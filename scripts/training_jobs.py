@@ -0,0 +1,243 @@
+"""
+MindNest training jobs
+Runs model training in a separate worker process and tracks each run by job id, so
+requests never block on training and the serving process only swaps in the result
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: one job at a time per process only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def _owner_alive(pid):
+    """Whether the process that started a job is still running; unknown owners count as gone"""
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # Exists but belongs to another user
+        return True
+    return True
+
+
+@dataclass
+class TrainingJob:
+    """Status of one background training run"""
+    job_id: str
+    status: str = 'running'
+    submitted_at: str = None
+    finished_at: str = None
+    duration_seconds: float = None
+    model_version: str = None
+    results: dict = None
+    error: str = None
+    # Serving process that started the job and will record how it ended
+    owner_pid: int = None
+
+    def to_dict(self):
+        return asdict(self)
+
+
+class TrainingJobManager:
+    """Runs one training job at a time in a fresh worker process.
+
+    train_fn runs in the worker and must be a picklable module-level function returning
+    the training results, including the 'model_version' of the bundle it saved.
+    publish_fn runs back in the serving process with that version and makes it live.
+    With state_dir set, job records are also written there as JSON so that every server
+    process can report on jobs, including ones started before a worker restart. Only the
+    newest history records are kept, and a job whose owning process died while it was
+    running is reported as failed. submit() also holds a lock file in state_dir while it
+    checks for a running job, so server processes sharing state_dir run one job between them.
+    """
+
+    def __init__(self, train_fn, publish_fn, start_method='spawn', history=20, state_dir=None):
+        self.train_fn = train_fn
+        self.publish_fn = publish_fn
+        self.start_method = start_method
+        self.history = history
+        self.state_dir = state_dir
+        self._listeners = []
+        self._jobs = OrderedDict()
+        self._active = None
+        self._started_at = None
+        self._last_duration = None
+        self._lock = threading.Lock()
+
+    def submit(self, **options):
+        """Start a training job unless one is running; returns (job, started).
+
+        options are passed on to train_fn as keyword arguments.
+        """
+        with self._lock, self._state_lock():
+            if self._active is not None:
+                return self._active, False
+            # Started by another server process sharing state_dir and still running there
+            running = next((record for record in self._recorded_jobs() if record.status == 'running'), None)
+            if running is not None:
+                return running, False
+
+            job = TrainingJob(job_id=uuid.uuid4().hex[:12], submitted_at=datetime.now().isoformat(),
+                              owner_pid=os.getpid())
+            # A new single-use worker per job: its memory is returned to the OS when it exits
+            executor = ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context(self.start_method)
+            )
+            future = executor.submit(self.train_fn, **options)
+            executor.shutdown(wait=False)
+
+            self._jobs[job.job_id] = job
+            self._active = job
+            self._started_at = time.monotonic()
+            while len(self._jobs) > self.history:
+                self._jobs.popitem(last=False)
+            self._record(job)
+
+        logger.info(f"Training job {job.job_id} started")
+        future.add_done_callback(lambda done: self._finish(job, done))
+        return job, True
+
+    def _finish(self, job, future):
+        try:
+            results = future.result()
+            self.publish_fn(results['model_version'])
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(e) or type(e).__name__
+            logger.error(f"Training job {job.job_id} failed: {job.error}")
+        else:
+            job.status = 'succeeded'
+            job.results = results
+            job.model_version = results['model_version']
+            logger.info(f"Training job {job.job_id} published model bundle {job.model_version}")
+        finally:
+            with self._lock:
+                job.finished_at = datetime.now().isoformat()
+                job.duration_seconds = round(time.monotonic() - self._started_at, 3)
+                if job.status == 'succeeded':
+                    self._last_duration = job.duration_seconds
+                self._active = None
+            self._record(job)
+            for listener in list(self._listeners):
+                try:
+                    listener(job)
+                except Exception as e:
+                    logger.error(f"Training job listener failed: {str(e)}")
+
+    def add_listener(self, listener):
+        """Call listener(job) whenever a job finishes, after its record is written"""
+        self._listeners.append(listener)
+
+    @contextmanager
+    def _state_lock(self):
+        """Exclusive cross-process lock on state_dir; a no-op without state_dir or fcntl"""
+        if not self.state_dir or fcntl is None:
+            yield
+            return
+        os.makedirs(self.state_dir, exist_ok=True)
+        with open(os.path.join(self.state_dir, '.jobs.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _record(self, job):
+        if not self.state_dir:
+            return
+        try:
+            os.makedirs(self.state_dir, exist_ok=True)
+            path = os.path.join(self.state_dir, f"{job.job_id}.json")
+            with open(f"{path}.tmp", 'w') as f:
+                json.dump(job.to_dict(), f, default=str)
+            os.replace(f"{path}.tmp", path)
+            self._prune(keep=path)
+        except OSError as e:
+            logger.warning(f"Could not record training job {job.job_id}: {str(e)}")
+
+    def _prune(self, keep):
+        """Delete all but the newest history job records"""
+        paths = [
+            os.path.join(self.state_dir, name) for name in os.listdir(self.state_dir) if name.endswith('.json')
+        ]
+        paths.sort(key=os.path.getmtime, reverse=True)
+        for path in paths[self.history:]:
+            if path != keep:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _recorded_jobs(self):
+        if not self.state_dir or not os.path.isdir(self.state_dir):
+            return []
+        records = []
+        for name in os.listdir(self.state_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.state_dir, name)) as f:
+                    record = TrainingJob(**json.load(f))
+            except (OSError, ValueError, TypeError):
+                continue
+            if record.status == 'running' and not self._owns_running(record):
+                # The process that would have finished the record was killed or crashed
+                record.status = 'failed'
+                record.error = 'interrupted'
+                self._record(record)
+            records.append(record)
+        return records
+
+    def _owns_running(self, record):
+        """Whether a running record's job is still being tracked, here or by another live process"""
+        if record.owner_pid == os.getpid():
+            active = self._active
+            return active is not None and active.job_id == record.job_id
+        return _owner_alive(record.owner_pid)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            job = next((record for record in self._recorded_jobs() if record.job_id == job_id), None)
+        return job
+
+    def active_job(self):
+        with self._lock:
+            return self._active
+
+    def jobs(self):
+        """Recent jobs, newest first"""
+        with self._lock:
+            jobs = {job.job_id: job for job in self._jobs.values()}
+        for record in self._recorded_jobs():
+            jobs.setdefault(record.job_id, record)
+        recent = sorted(jobs.values(), key=lambda job: job.submitted_at, reverse=True)
+        return [job.to_dict() for job in recent[:self.history]]
+
+    def retry_after(self, default=30):
+        """Seconds a client should wait before retrying, estimated from the last successful run"""
+        with self._lock:
+            if self._active is None or self._last_duration is None:
+                return int(default)
+            remaining = self._last_duration - (time.monotonic() - self._started_at)
+            return max(1, int(remaining + 0.999))
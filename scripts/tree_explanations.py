@@ -0,0 +1,116 @@
+"""
+MindNest decision tree explanations
+Precomputes, for every leaf of a fitted decision tree, the conditions on its decision path
+and the path-based contribution of each feature to every class probability, so a prediction
+is explained by looking up the leaf it landed in. This module imports only NumPy and reads
+the node arrays numpy_inference.export_decision_tree produces.
+
+A feature's contribution is the change in class probability across the splits on that
+feature along the path, so the root probability plus the contributions equals the leaf's
+probability.
+"""
+
+import numpy as np
+
+
+def _round(value):
+    return round(float(value), 4)
+
+
+class LeafExplanations:
+    """Explanation table for one decision tree, keyed by leaf node id"""
+
+    def __init__(self, tree_arrays, feature_names, categories=None, feature_importances=None):
+        """tree_arrays: export_decision_tree output; categories: {feature: values in code order}"""
+        self.feature_names = list(feature_names)
+        self.proba = np.asarray(tree_arrays['tree_proba'])
+        self.classes = np.asarray(tree_arrays['tree_classes'])
+        self.baseline = self.proba[0]
+        self._class_index = {label: i for i, label in enumerate(self.classes.tolist())}
+        self.feature_importance = {
+            name: float(importance) for name, importance in zip(self.feature_names, feature_importances)
+        } if feature_importances is not None else {}
+        categories = categories or {}
+
+        left = np.asarray(tree_arrays['tree_children_left']).tolist()
+        right = np.asarray(tree_arrays['tree_children_right']).tolist()
+        feature = np.asarray(tree_arrays['tree_feature']).tolist()
+        threshold = np.asarray(tree_arrays['tree_threshold']).tolist()
+
+        # leaf id -> (conditions, per class: (baseline, leaf probability, sorted contributions))
+        self._leaves = {}
+        # Depth-first walk carrying (node, [(feature, went_left, threshold, parent)])
+        stack = [(0, [])]
+        while stack:
+            node, path = stack.pop()
+            if left[node] == -1:
+                self._leaves[node] = self._compile_leaf(node, path, categories)
+                continue
+            split = feature[node]
+            stack.append((right[node], path + [(split, False, threshold[node], node)]))
+            stack.append((left[node], path + [(split, True, threshold[node], node)]))
+
+    def _compile_leaf(self, leaf, path, categories):
+        # Tighten every feature's bounds over the path; categorical codes become value sets
+        bounds = {}
+        contributions = {}
+        children = [node for _, _, _, node in path[1:]] + [leaf]
+        for (split, went_left, threshold, parent), child in zip(path, children):
+            lower, upper = bounds.get(split, (None, None))
+            if went_left:
+                upper = threshold if upper is None else min(upper, threshold)
+            else:
+                lower = threshold if lower is None else max(lower, threshold)
+            bounds[split] = (lower, upper)
+            contributions[split] = contributions.get(split, 0.0) + self.proba[child] - self.proba[parent]
+
+        conditions = [self._condition(split, lower, upper, categories) for split, (lower, upper) in bounds.items()]
+        path_features = [self.feature_names[split] for split in contributions]
+        table = np.array(list(contributions.values())).T if contributions else np.empty((len(self.classes), 0))
+        per_class = []
+        for class_index, scores in enumerate(table):
+            order = np.argsort(-np.abs(scores), kind='stable').tolist()
+            per_class.append((
+                _round(self.baseline[class_index]),
+                _round(self.proba[leaf, class_index]),
+                tuple((path_features[i], _round(scores[i])) for i in order)
+            ))
+        return conditions, per_class
+
+    def _condition(self, split, lower, upper, categories):
+        name = self.feature_names[split]
+        values = categories.get(name)
+        if values is not None:
+            # Codes are integers, so code <= t keeps codes 0..floor(t)
+            low = 0 if lower is None else int(np.floor(lower)) + 1
+            high = len(values) - 1 if upper is None else int(np.floor(upper))
+            return {'feature': name, 'in': [str(value) for value in values[low:high + 1]]}
+        condition = {'feature': name}
+        if lower is not None:
+            condition['greater_than'] = _round(lower)
+        if upper is not None:
+            condition['at_most'] = _round(upper)
+        return condition
+
+    @property
+    def n_leaves(self):
+        return len(self._leaves)
+
+    def leaf_proba(self, leaves):
+        """Class probabilities of the given leaves, as the tree's predict_proba returns them"""
+        return self.proba[leaves]
+
+    def explain(self, leaf, label):
+        """How the path to leaf moved the probability of class label; None if the tree never saw it"""
+        class_index = self._class_index.get(int(label))
+        if class_index is None:
+            return None
+        conditions, per_class = self._leaves[int(leaf)]
+        baseline, leaf_probability, contributions = per_class[class_index]
+        return {
+            'leaf': int(leaf),
+            'baseline_probability': baseline,
+            'leaf_probability': leaf_probability,
+            'contributions': dict(contributions),
+            'conditions': conditions
+        }